@@ -92,9 +92,10 @@ classdef HumanComputerExperiment < BaseExperiment
             fprintf('  1. SEA (Synchronization Error Averaging)\n');
             fprintf('  2. Bayesian\n');
             fprintf('  3. BIB (Bayesian-Inverse Bayesian)\n');
+            fprintf('  4-6. SEA / Bayesian / BIB（Python推論サーバー）\n');
 
-            model_choice = input('モデル番号 (1-3): ');
-            if isempty(model_choice) || model_choice < 1 || model_choice > 3
+            model_choice = input('モデル番号 (1-6): ');
+            if isempty(model_choice) || model_choice < 1 || model_choice > 6
                 model_choice = 1;
                 fprintf('デフォルト: SEA\n');
             end
@@ -107,6 +108,12 @@ classdef HumanComputerExperiment < BaseExperiment
                     obj.model = BayesianModel(obj.experiment_config);
                 case 3
                     obj.model = BIBModel(obj.experiment_config);
+                case 4
+                    obj.model = PythonModel(obj.experiment_config, 'sea');
+                case 5
+                    obj.model = PythonModel(obj.experiment_config, 'bayes');
+                case 6
+                    obj.model = PythonModel(obj.experiment_config, 'bib');
             end
 
             fprintf('選択されたモデル: %s\n', obj.model.model_type);
@@ -0,0 +1,116 @@
+classdef PythonModel < BaseModel
+    % PythonModel - Python推論サーバー上のモデル（SEA/Bayes/BIB）
+    %
+    % legacy/scripts/run_inference_server.py で起動したサーバーに
+    % TCP（ループバック）で接続し、同期エラーを送って次の間隔を受け取る。
+    % プロトコルは legacy/src/experiment/inference_server.py を参照。
+
+    properties (Access = public)
+        model_type  % 'Python-SEA', 'Python-BAYES', 'Python-BIB'
+    end
+
+    properties (Constant, Access = private)
+        OP_OPEN = uint8(1)
+        OP_INFER = uint8(2)
+        OP_RESET = uint8(3)
+        OP_CLOSE = uint8(4)
+        STATUS_OK = uint8(0)
+    end
+
+    properties (Access = private)
+        client      % tcpclient
+        session_id  % サーバー上のセッションID (uint32)
+        infer_header  % OP_INFERリクエストの固定部分（長さ・オペコード・セッションID）
+    end
+
+    methods (Access = public)
+        function obj = PythonModel(config, python_model_type, host, port)
+            % PythonModel コンストラクタ
+            %
+            % Parameters:
+            %   config - 実験設定構造体（SPAN, SCALE, BAYES_N_HYPOTHESIS, BIB_L_MEMORYを送信）
+            %   python_model_type - 'sea', 'bayes', 'bib'
+            %   host - サーバーのアドレス（デフォルト: '127.0.0.1'）
+            %   port - サーバーのポート（デフォルト: 50007）
+
+            obj@BaseModel(config);
+            if nargin < 3 || isempty(host)
+                host = '127.0.0.1';
+            end
+            if nargin < 4 || isempty(port)
+                port = 50007;
+            end
+            obj.model_type = sprintf('Python-%s', upper(python_model_type));
+
+            obj.client = tcpclient(host, port, 'Timeout', 5);
+            if isprop(obj.client, 'EnableTransferDelay')
+                obj.client.EnableTransferDelay = false;  % Nagleを無効化して往復遅延を最小化
+            end
+
+            % サーバー側のConfigに渡す設定（存在するフィールドのみ）
+            session_config = struct();
+            fields = {'SPAN', 'SCALE', 'BAYES_N_HYPOTHESIS', 'BIB_L_MEMORY'};
+            for i = 1:numel(fields)
+                if isfield(config, fields{i})
+                    session_config.(fields{i}) = config.(fields{i});
+                end
+            end
+            open_json = jsonencode(struct('model', lower(python_model_type), 'config', session_config));
+
+            reply = obj.request(obj.OP_OPEN, uint32(0), uint8(unicode2native(open_json, 'UTF-8')));
+            obj.session_id = typecast(reply(1:4), 'uint32');
+            obj.infer_header = [typecast(uint32(13), 'uint8'), obj.OP_INFER, ...
+                typecast(obj.session_id, 'uint8')];
+        end
+
+        function next_interval = predict_next_interval(obj, se)
+            % 同期エラーから次の間隔を予測（サーバー上のPythonモデルで推論）
+            %
+            % Parameters:
+            %   se - 同期エラー（秒）
+            %
+            % Returns:
+            %   next_interval - 予測される次の間隔（秒）
+
+            write(obj.client, [obj.infer_header, typecast(double(se), 'uint8')]);
+            reply = obj.read_reply();
+            next_interval = typecast(reply(1:8), 'double');
+        end
+
+        function reset(obj)
+            % サーバー上のモデル状態を初期化
+            obj.request(obj.OP_RESET, obj.session_id, uint8([]));
+        end
+
+        function delete(obj)
+            % セッションを閉じて接続を切断
+            if ~isempty(obj.client) && ~isempty(obj.session_id)
+                try
+                    obj.request(obj.OP_CLOSE, obj.session_id, uint8([]));
+                catch
+                end
+            end
+            obj.client = [];
+        end
+    end
+
+    methods (Access = private)
+        function reply = request(obj, opcode, session_id, body)
+            % リクエストを1つ送り、応答の結果部分を返す
+            payload = [opcode, typecast(uint32(session_id), 'uint8'), body];
+            write(obj.client, [typecast(uint32(numel(payload)), 'uint8'), payload]);
+            reply = obj.read_reply();
+        end
+
+        function reply = read_reply(obj)
+            % 応答フレームを読み、ステータスを確認して結果部分を返す
+            n_bytes = typecast(read(obj.client, 4, 'uint8'), 'uint32');
+            payload = read(obj.client, double(n_bytes), 'uint8');
+            if payload(1) ~= obj.STATUS_OK
+                error('PythonModel:ServerError', '推論サーバーエラー: %s', ...
+                    native2unicode(payload(2:end), 'UTF-8'));
+            end
+            reply = payload(2:end);
+        end
+    end
+end
@@ -19,9 +19,10 @@ from src.analysis.metrics import (
     calculate_correlation, calculate_regression
 )
 from src.analysis.visualizations import create_all_visualizations
+from src.data import SESSION_FILE, SessionCatalog, MatlabSession, read_session
 
 def load_experiment_data(input_dir, model_type, experiment_id=None):
-    """Load experiment data from CSV files.
+    """Load experiment data from a session archive, CSV files or a MATLAB session.
     
     Args:
         input_dir: Directory containing data files
@@ -31,54 +32,44 @@ def load_experiment_data(input_dir, model_type, experiment_id=None):
     Returns:
         Dictionary containing data series and experiment ID
     """
-    # Find date-based directories
+    # Look the session up in the catalog (only new or changed directories are read)
     try:
-        date_dirs = [d for d in os.listdir(input_dir) if os.path.isdir(os.path.join(input_dir, d)) and d.startswith('20')]
-        
-        if not date_dirs:
-            raise ValueError(f"No date-based directories found in {input_dir}")
-        
-        # Sort date directories (newest first)
-        date_dirs.sort(reverse=True)
-        
-        # If no specific experiment ID, find most recent one for the specified model
-        if experiment_id is None:
-            for date_dir in date_dirs:
-                date_path = os.path.join(input_dir, date_dir)
-                model_dirs = [d for d in os.listdir(date_path) 
-                             if os.path.isdir(os.path.join(date_path, d)) and d.startswith(f"{model_type}_")]
-                
-                if model_dirs:
-                    # Sort model directories (newest first by timestamp)
-                    model_dirs.sort(reverse=True)
-                    experiment_id = model_dirs[0].replace(f"{model_type}_", "")
-                    selected_date_dir = date_dir
-                    break
-            else:
-                raise ValueError(f"No data found for model {model_type} in any date directory")
-        else:
-            # If experiment_id is specified, find the corresponding date directory
-            selected_date_dir = None
-            for date_dir in date_dirs:
-                date_path = os.path.join(input_dir, date_dir)
-                if os.path.exists(os.path.join(date_path, f"{model_type}_{experiment_id}")):
-                    selected_date_dir = date_dir
-                    break
-            
-            if selected_date_dir is None:
-                raise ValueError(f"No data found for experiment ID {experiment_id} with model {model_type}")
-        
-        # Base directory for experiment data
-        experiment_path = os.path.join(input_dir, selected_date_dir, f"{model_type}_{experiment_id}")
-        
-        if not os.path.exists(experiment_path):
-            raise ValueError(f"Experiment directory not found: {experiment_path}")
+        with SessionCatalog(input_dir) as catalog:
+            catalog.update()
+            session = catalog.latest(model=model_type, experiment_id=experiment_id)
+        
+        if session is None:
+            if experiment_id is None:
+                raise ValueError(f"No data found for model {model_type} in {input_dir}")
+            raise ValueError(f"No data found for experiment ID {experiment_id} with model {model_type}")
+        
+        experiment_id = session['experiment_id']
+        experiment_path = session['path']
         
         print(f"Loading data from: {experiment_path}")
         
         # Initialize data dictionary
         data = {'experiment_id': experiment_id, 'model_type': model_type}
         
+        # Sessions of the MATLAB system are converted from their Stage 2 taps
+        if session['layout'] == 'matlab':
+            data.update(MatlabSession(experiment_path).to_series())
+            print(f"Loaded MATLAB session - Stimulus: {len(data['stim_tap'])} taps, Player: {len(data['player_tap'])} taps")
+            return data
+        
+        # Sessions saved as a single archive are read in one go
+        session_file = os.path.join(experiment_path, SESSION_FILE)
+        if os.path.exists(session_file):
+            session = read_session(session_file)
+            for name in ('stim_tap', 'player_tap', 'stim_se', 'player_se', 'stim_iti', 'player_iti',
+                         'stim_itiv', 'player_itiv', 'stim_sev', 'player_sev'):
+                data[name] = session[name]
+            if session['hypo'].size > 0:
+                data['hypo'] = list(session['hypo'])
+            print(f"Loaded session archive - Stimulus: {len(data['stim_tap'])} taps, Player: {len(data['player_tap'])} taps")
+            return data
+        
+        # Otherwise fall back to the per-series CSV files
         # Try to load tap data
         # First try processed_taps.csv, then raw_taps.csv
         processed_tap_file = os.path.join(experiment_path, "processed_taps.csv")
@@ -285,10 +276,17 @@ def main():
         help='Directory to save analysis results (default: config PROCESSED_DATA_DIR)'
     )
     
+    parser.add_argument(
+        '--jobs', 
+        type=int,
+        default=1,
+        help='Worker processes for recurrence network analysis (-1: all CPU cores)'
+    )
+    
     args = parser.parse_args()
     
     # Create configuration
-    config = Config()
+    config = Config().create_directories()
     
     # Use default directories if not specified
     input_dir = args.input_dir if args.input_dir else config.RAW_DATA_DIR
@@ -327,7 +325,8 @@ def main():
         
         # Create visualizations
         print("Creating visualizations...")
-        create_all_visualizations(data, args.model, data['experiment_id'], output_dir)
+        create_all_visualizations(data, args.model, data['experiment_id'], output_dir,
+                                  n_jobs=args.jobs)
         
         print("\n" + "="*50)
         print("Analysis completed successfully!")
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+"""
+Microbenchmark of the shared-memory ring buffer.
+Measures the cost of put() and get() in one process, the put() cost of a
+multiprocessing.Queue for comparison, and the one-way latency from put() in
+this process to get() in a consumer process.
+"""
+import argparse
+import sys
+import os
+import time
+import multiprocessing
+
+import numpy as np
+
+# Add parent directory to path to import src modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data.journal import EVENT_PLAYER, EVENT_END
+from src.experiment.ring_buffer import ShmRingBuffer
+
+
+def summarize(name, seconds):
+    """Print median / p99 / max of per-operation times in microseconds."""
+    us = np.asarray(seconds) * 1e6
+    print(f"{name:<32} median {np.median(us):7.2f} us   p99 {np.percentile(us, 99):7.2f} us   "
+          f"max {np.max(us):8.2f} us")
+
+
+def time_operations(operation, n):
+    """Time n calls of operation individually."""
+    clock = time.perf_counter
+    times = np.empty(n)
+    for i in range(n):
+        start = clock()
+        operation(i)
+        times[i] = clock() - start
+    return times
+
+
+def consumer(ring_name, poll_interval, results):
+    """Read records until EVENT_END; report the delay of every record."""
+    ring = ShmRingBuffer.attach(ring_name)
+    clock = time.perf_counter
+    delays = []
+    while True:
+        record = ring.get()
+        if record is None:
+            if poll_interval:
+                time.sleep(poll_interval)
+            continue
+        if record[1] == EVENT_END:
+            break
+        delays.append(clock() - record[0])
+    ring.close()
+    results.put(delays)
+
+
+def main():
+    """Run the benchmarks."""
+    parser = argparse.ArgumentParser(
+        description='Benchmark the shared-memory ring buffer',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+
+    parser.add_argument(
+        '--n',
+        type=int,
+        default=100000,
+        help='Operations per in-process benchmark'
+    )
+
+    parser.add_argument(
+        '--events',
+        type=int,
+        default=2000,
+        help='Records sent to the consumer process'
+    )
+
+    parser.add_argument(
+        '--rate',
+        type=float,
+        default=1000.0,
+        help='Records per second sent to the consumer process'
+    )
+
+    parser.add_argument(
+        '--poll-interval',
+        type=float,
+        default=0.0,
+        help='Consumer sleep while the buffer is empty (0: busy polling)'
+    )
+
+    args = parser.parse_args()
+
+    # In-process cost of each side
+    ring = ShmRingBuffer(capacity=args.n)
+    reader = ShmRingBuffer.attach(ring.name)
+    summarize("ShmRingBuffer.put", time_operations(lambda i: ring.put(EVENT_PLAYER, 1.0, i, 0.1, 0.5), args.n))
+    summarize("ShmRingBuffer.get", time_operations(lambda i: reader.get(), args.n))
+    reader.close()
+    ring.close()
+    ring.unlink()
+
+    queue = multiprocessing.Queue()
+    summarize("multiprocessing.Queue.put", time_operations(
+        lambda i: queue.put((1.0, EVENT_PLAYER, i, 0.1, 0.5)), min(args.n, 10000)))
+    queue.close()
+    queue.cancel_join_thread()
+
+    # One-way latency to a consumer process
+    context = multiprocessing.get_context('spawn')
+    ring = ShmRingBuffer(capacity=max(args.events, 1024))
+    results = context.Queue()
+    process = context.Process(target=consumer, args=(ring.name, args.poll_interval, results))
+    process.start()
+    time.sleep(1.0)  # let the consumer start
+
+    period = 1.0 / args.rate
+    next_time = time.perf_counter()
+    for i in range(args.events):
+        while time.perf_counter() < next_time:
+            pass
+        ring.put(EVENT_PLAYER, time.perf_counter(), i)
+        next_time += period
+    ring.put(EVENT_END, time.perf_counter())
+    delays = results.get()
+    process.join()
+    ring.close()
+    ring.unlink()
+    summarize(f"put -> get across processes", delays)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""
+Script to rebuild interrupted sessions from their tap journals.
+Finds journals without a session archive below a data directory and writes
+the archive recovered from each of them.
+"""
+import argparse
+import sys
+import os
+
+# Add parent directory to path to import src modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.config import Config
+from src.data import find_journals, recover_session, SessionCatalog
+
+
+def main():
+    """Recover interrupted sessions."""
+    parser = argparse.ArgumentParser(
+        description='Rebuild interrupted sessions from their tap journals',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    
+    parser.add_argument(
+        'journals',
+        nargs='*',
+        help='Journal files to recover (default: all unrecovered journals below --data-dir)'
+    )
+    
+    parser.add_argument(
+        '--data-dir',
+        default=None,
+        help='Data directory to search (defaults to config RAW_DATA_DIR)'
+    )
+    
+    parser.add_argument(
+        '--list',
+        action='store_true',
+        help='Only list the journals that would be recovered'
+    )
+    
+    args = parser.parse_args()
+    
+    data_dir = args.data_dir if args.data_dir else Config().RAW_DATA_DIR
+    journals = args.journals if args.journals else find_journals(data_dir)
+    
+    if not journals:
+        print(f"No unrecovered journals found in {data_dir}")
+        return
+    
+    for journal in journals:
+        if args.list:
+            print(journal)
+            continue
+        try:
+            session_path = recover_session(journal)
+            print(f"Recovered {session_path}")
+        except Exception as e:
+            print(f"Failed to recover {journal}: {e}")
+    
+    if not args.list and not args.journals:
+        with SessionCatalog(data_dir) as catalog:
+            catalog.update()
+
+
+if __name__ == '__main__':
+    main()
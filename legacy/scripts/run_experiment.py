@@ -7,6 +7,7 @@ import argparse
 import sys
 import os
 import time
+import numpy as np
 
 # Add parent directory to path to import src modules
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -77,22 +78,35 @@ def main():
         help='Subject/participant ID for data organization'
     )
     
+    parser.add_argument(
+        '--simulate',
+        action='store_true',
+        help='Run headless on a virtual clock with a synthetic tapper'
+    )
+    
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=None,
+        help='Random seed for simulated sessions'
+    )
+    
+    parser.add_argument(
+        '--export-csv',
+        action='store_true',
+        help='Also write the per-series CSV files next to the session archive'
+    )
+    
+    parser.add_argument(
+        '--event-process',
+        action='store_true',
+        help='Journal taps and compute the online statistics in a separate process (x86 CPUs only)'
+    )
+    
     args = parser.parse_args()
     
-    # Create configuration
-    config = Config()
-    
-    # Override configuration from command-line arguments
-    if args.span is not None:
-        config.SPAN = args.span
-    if args.stage1 is not None:
-        config.STAGE1 = args.stage1
-    if args.stage2 is not None:
-        config.STAGE2 = args.stage2
-    if args.buffer is not None:
-        config.BUFFER = args.buffer
-    if args.scale is not None:
-        config.SCALE = args.scale
+    # Create configuration, overridden by the command-line arguments
+    config = Config.from_args(args).create_directories()
     
     # Use default output directory if not specified
     output_dir = args.output_dir if args.output_dir else config.RAW_DATA_DIR
@@ -115,18 +129,34 @@ def main():
     print("="*50 + "\n")
     
     # 実際の値をconfigに設定
-    config.STAGE2 = actual_stage2
-    
-    # Wait for confirmation to start
-    input("Press Enter to start the experiment...")
+    config = config.replace(STAGE2=actual_stage2)
     
     # Create experiment runner
-    experiment = ExperimentRunner(
-        config, 
-        model_type=args.model, 
-        output_dir=output_dir,
-        user_id=args.user_id
-    )
+    if args.simulate:
+        from src.experiment.simulation import SimulatedExperimentRunner, SimulatedTapper
+        if args.seed is not None:
+            np.random.seed(args.seed)
+        experiment = SimulatedExperimentRunner(
+            config,
+            model_type=args.model,
+            output_dir=output_dir,
+            user_id=args.user_id,
+            tapper=SimulatedTapper(config.SPAN, seed=args.seed),
+            export_csv=args.export_csv,
+            event_process=args.event_process
+        )
+    else:
+        # Wait for confirmation to start
+        input("Press Enter to start the experiment...")
+        
+        experiment = ExperimentRunner(
+            config, 
+            model_type=args.model, 
+            output_dir=output_dir,
+            user_id=args.user_id,
+            export_csv=args.export_csv,
+            event_process=args.event_process
+        )
     
     # Run experiment
     start_time = time.time()
@@ -142,6 +172,7 @@ def main():
     else:
         print("\n" + "="*50)
         print("Experiment was interrupted or failed.")
+        print("Taps recorded so far can be restored with scripts/recover_sessions.py")
         print("="*50 + "\n")
     
 
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""
+Script to run the model-inference server.
+Keeps the Python models available to the MATLAB experiment (see
+experiments/human_computer/models/PythonModel.m) over a local socket, so
+each session only opens a model instead of starting a MATLAB engine.
+"""
+import argparse
+import sys
+import os
+
+# Add parent directory to path to import src modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.config import Config
+from src.experiment.inference_server import InferenceServer, DEFAULT_HOST, DEFAULT_PORT
+
+
+def main():
+    """Run the inference server until interrupted."""
+    parser = argparse.ArgumentParser(
+        description='Serve the tapping models to the MATLAB experiment',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+
+    parser.add_argument(
+        '--host',
+        default=DEFAULT_HOST,
+        help='Address to listen on (keep the loopback address unless clients are remote)'
+    )
+
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=DEFAULT_PORT,
+        help='TCP port to listen on'
+    )
+
+    parser.add_argument(
+        '--unix-socket',
+        default=None,
+        help='Listen on this Unix socket path instead of TCP'
+    )
+
+    parser.add_argument(
+        '--config',
+        default=None,
+        help='JSON file with the base configuration of every session'
+    )
+
+    args = parser.parse_args()
+
+    config = Config.from_file(args.config) if args.config else Config()
+    address = args.unix_socket if args.unix_socket else (args.host, args.port)
+
+    with InferenceServer(address, config=config) as server:
+        print(f"Inference server listening on {server.address} (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nInference server stopped")
+
+
+if __name__ == '__main__':
+    main()
@@ -44,7 +44,7 @@ def main():
     args = parser.parse_args()
     
     # Load configuration
-    config = Config()
+    config = Config().create_directories()
     
     try:
         # Initialize MATLAB experiment runner
@@ -3,24 +3,65 @@ Analysis tools for cooperative tapping task.
 """
 from .metrics import (
     calculate_iti, calculate_se, calculate_variations, 
-    r2_score_manual, calculate_correlation, calculate_regression
-)
-from .visualizations import (
-    plot_time_series, plot_histogram, plot_scatter_with_regression,
-    create_all_visualizations
-)
-from .network import (
-    create_recurrence_network, calculate_network_metrics, fit_degree_distribution,
-    analyze_sliding_window, plot_recurrence_network, plot_recurrence_matrix,
-    plot_degree_distribution, plot_sliding_window_metrics, interpret_network_results
+    r2_score_manual, calculate_correlation, calculate_regression,
+    pad_sessions, iti_array, cross_iti_array, se_array, variation_array, alternating_series
 )
+from .online import RunningSeriesStats, OnlineMetrics
+from .parallel import make_executor, resolve_n_jobs
+import importlib
+
+# Submodules with heavy dependencies (Matplotlib, SciPy, scikit-learn, NetworkX)
+# are imported on first access of one of their names
+_LAZY = {
+    'visualizations': (
+        'plot_time_series', 'plot_histogram', 'plot_scatter_with_regression',
+        'create_all_visualizations'
+    ),
+    'network': (
+        'embed_time_series', 'pairwise_distances', 'recurrence_threshold',
+        'create_recurrence_network', 'calculate_network_metrics', 'fit_degree_distribution',
+        'SlidingRecurrenceWindow', 'analyze_sliding_window', 'analyze_recurrence_network',
+        'analyze_recurrence_networks', 'plot_recurrence_network', 'plot_recurrence_matrix',
+        'plot_degree_distribution', 'plot_sliding_window_metrics', 'interpret_network_results'
+    ),
+    'parameter_estimation': (
+        'prctile', 'autocorr', 'bootstrap_ci', 'load_human_human_taps',
+        'estimate_parameters_from_human_data'
+    ),
+    'model_fitting': (
+        'observations_from_taps', 'session_observations', 'session_log_likelihood',
+        'LikelihoodCache', 'fit_model', 'fit_participants'
+    ),
+}
+_LAZY_NAMES = {name: module for module, names in _LAZY.items() for name in names}
+
+def __getattr__(name):
+    module = _LAZY_NAMES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_NAMES))
 
 __all__ = [
     'calculate_iti', 'calculate_se', 'calculate_variations',
     'r2_score_manual', 'calculate_correlation', 'calculate_regression',
+    'pad_sessions', 'iti_array', 'cross_iti_array', 'se_array', 'variation_array',
+    'alternating_series',
+    'RunningSeriesStats', 'OnlineMetrics',
+    'make_executor', 'resolve_n_jobs',
     'plot_time_series', 'plot_histogram', 'plot_scatter_with_regression',
     'create_all_visualizations',
+    'embed_time_series', 'pairwise_distances', 'recurrence_threshold',
     'create_recurrence_network', 'calculate_network_metrics', 'fit_degree_distribution',
-    'analyze_sliding_window', 'plot_recurrence_network', 'plot_recurrence_matrix',
-    'plot_degree_distribution', 'plot_sliding_window_metrics', 'interpret_network_results'
+    'SlidingRecurrenceWindow', 'analyze_sliding_window', 'analyze_recurrence_network',
+    'analyze_recurrence_networks', 'plot_recurrence_network', 'plot_recurrence_matrix',
+    'plot_degree_distribution', 'plot_sliding_window_metrics', 'interpret_network_results',
+    'prctile', 'autocorr', 'bootstrap_ci', 'load_human_human_taps',
+    'estimate_parameters_from_human_data',
+    'observations_from_taps', 'session_observations', 'session_log_likelihood',
+    'LikelihoodCache', 'fit_model', 'fit_participants'
 ]
\ No newline at end of file
@@ -1,52 +1,156 @@
 """
 Metrics calculation for cooperative tapping analysis.
-Provides functions to calculate ITI, SE, and their variations.
+Provides functions to calculate ITI, SE, and their variations. The ``*_array``
+functions work on the last axis of NumPy arrays, so a 2-D batch of sessions
+(see pad_sessions) is processed in one call.
 """
 import numpy as np
 
+def _as_array(values):
+    """Tap times or derived series as a float array."""
+    return np.asarray(values, dtype=float)
+
+def _common_length(first, second):
+    """Truncate two arrays to the length (last axis) of the shorter one."""
+    n = min(first.shape[-1], second.shape[-1])
+    return first[..., :n], second[..., :n]
+
+def pad_sessions(series, fill=np.nan):
+    """Stack series of unequal length into one 2-D batch.
+    
+    Shorter series are padded at the end with ``fill``; with the default NaN
+    the padding propagates through the array metrics below and marks the
+    invalid entries of their results.
+    
+    Args:
+        series: Sequence of 1-D series (e.g. tap times of several sessions)
+        fill: Padding value
+        
+    Returns:
+        ndarray: Array of shape (n_series, longest series)
+    """
+    arrays = [_as_array(values).ravel() for values in series]
+    batch = np.full((len(arrays), max((len(a) for a in arrays), default=0)), fill)
+    for row, values in zip(batch, arrays):
+        row[:len(values)] = values
+    return batch
+
+def iti_array(taps):
+    """Inter Tap-onset Intervals along the last axis.
+    
+    Args:
+        taps: Tap times, 1-D or a 2-D batch of sessions
+        
+    Returns:
+        ndarray: One interval fewer than taps per session
+    """
+    taps = _as_array(taps)
+    if taps.shape[-1] < 2:
+        return taps[..., :0]
+    return np.diff(taps, axis=-1)
+
+def cross_iti_array(leading, following, lag=0):
+    """Intervals from one role's taps to the other role's taps.
+    
+    ``following[n + lag] - leading[n]``, e.g. the stimulus ITI of alternating
+    tapping is ``cross_iti_array(player_tap, stim_tap, lag=1)``.
+    
+    Args:
+        leading: Earlier taps, 1-D or a 2-D batch of sessions
+        following: Later taps, same batch shape as ``leading``
+        lag: Index offset of ``following``
+        
+    Returns:
+        ndarray: Intervals over the common length of both series
+    """
+    leading, following = _common_length(_as_array(leading), _as_array(following))
+    if leading.shape[-1] <= lag:
+        return leading[..., :0]
+    return following[..., lag:] - leading[..., :leading.shape[-1] - lag]
+
+def se_array(stim_taps, player_taps):
+    """Synchronization Errors along the last axis.
+    
+    SE(n) = player(n) - (stim(n-1) + stim(n)) / 2, i.e. the player taps minus
+    a two-point moving average of the stimulus taps.
+    
+    Args:
+        stim_taps: Reference tap times, 1-D or a 2-D batch of sessions
+        player_taps: Tap times, same batch shape as ``stim_taps``
+        
+    Returns:
+        ndarray: One SE fewer than the common number of taps per session
+    """
+    stim_taps, player_taps = _common_length(_as_array(stim_taps), _as_array(player_taps))
+    if stim_taps.shape[-1] < 2:
+        return stim_taps[..., :0]
+    midpoints = 0.5 * (stim_taps[..., :-1] + stim_taps[..., 1:])
+    return player_taps[..., 1:] - midpoints
+
+def variation_array(values):
+    """Differences between consecutive values along the last axis."""
+    return iti_array(values)
+
+def alternating_series(stim_taps, player_taps, stim_se):
+    """Derived series of an alternating-tapping session (ExperimentRunner definitions).
+    
+    Args:
+        stim_taps: Stimulus tap times after buffer removal
+        player_taps: Player tap times after buffer removal
+        stim_se: Stimulus SEs recorded during the session
+        
+    Returns:
+        dict: stim_iti, player_iti, player_se and the variations of ITI and SE
+    """
+    # Stimulus ITI: stimulus tap minus the preceding player tap;
+    # player ITI: player tap minus the stimulus of the same turn
+    stim_iti = cross_iti_array(player_taps, stim_taps, lag=1)
+    player_iti = cross_iti_array(stim_taps, player_taps)
+    player_se = se_array(stim_taps, player_taps)
+    return {
+        'stim_iti': stim_iti,
+        'player_iti': player_iti,
+        'player_se': player_se,
+        'stim_itiv': variation_array(stim_iti),
+        'player_itiv': variation_array(player_iti),
+        'stim_sev': variation_array(stim_se),
+        'player_sev': variation_array(player_se)
+    }
+
 def calculate_iti(taps):
     """Calculate Inter Tap-onset Intervals.
     
     Args:
-        taps: List of tap times
+        taps: Tap times
         
     Returns:
-        List of ITIs
+        ndarray of ITIs
     """
-    if len(taps) < 2:
-        return []
-    return [taps[i+1] - taps[i] for i in range(len(taps) - 1)]
+    return iti_array(taps)
 
 def calculate_se(stim_taps, player_taps):
     """Calculate Synchronization Errors.
     
     Args:
-        stim_taps: List of stimulus tap times
-        player_taps: List of player tap times
+        stim_taps: Stimulus tap times
+        player_taps: Player tap times
         
     Returns:
-        List of SEs
+        ndarray of SEs
     """
-    se_list = []
-    for i in range(1, min(len(stim_taps), len(player_taps))):
-        if i < len(player_taps) and i < len(stim_taps):
-            # SE_A(n) = Tap_B(n) - {(Tap_A(n) + Tap_A(n-1))/2}
-            se = player_taps[i] - (stim_taps[i-1] + stim_taps[i])/2
-            se_list.append(se)
-    return se_list
+    # SE_A(n) = Tap_B(n) - {(Tap_A(n) + Tap_A(n-1))/2}
+    return se_array(stim_taps, player_taps)
 
 def calculate_variations(values):
     """Calculate variations between consecutive values.
     
     Args:
-        values: List of values
+        values: Values
         
     Returns:
-        List of variations
+        ndarray of variations
     """
-    if len(values) < 2:
-        return []
-    return [values[i+1] - values[i] for i in range(len(values) - 1)]
+    return variation_array(values)
 
 def r2_score_manual(y_true, y_pred):
     """Calculate R2 score manually.
@@ -0,0 +1,393 @@
+"""
+Maximum-likelihood fitting of the SEA, Bayes and BIB models to recorded sessions.
+A session is reduced to the sequence of synchronization errors the model saw
+and the intervals it produced. The log-likelihood of those intervals is exact
+for SEA and Bayes (their hypotheses evolve deterministically given the SEs) and
+simulation-based for BIB, whose hypothesis replacements are random: many
+particles are run with common random numbers and their likelihoods averaged.
+Continuous parameters are optimised for every point of a grid of integer
+parameters; grid points run in a process pool and every evaluated
+per-session log-likelihood is cached, optionally on disk.
+"""
+import os
+import json
+import hashlib
+from types import SimpleNamespace
+
+import numpy as np
+from scipy import optimize
+
+from ..config import Config
+from ..models.batch import BatchBIBModel
+from .parallel import make_executor
+
+# Continuous parameters per model and their search bounds
+CONTINUOUS_PARAMETERS = {
+    'sea': {'SCALE': (0.005, 2.0)},
+    'bayes': {'sigma': (0.01, 3.0)},
+    'bib': {'sigma': (0.01, 3.0), 'SCALE': (0.005, 2.0)},
+}
+
+# Default grid of integer parameters per model
+DEFAULT_GRID = {
+    'sea': {},
+    'bayes': {'n_hypothesis': (10, 20, 40)},
+    'bib': {'n_hypothesis': (10, 20, 40), 'l_memory': (1, 2, 3, 5)},
+}
+
+# Starting values of the continuous parameters (the models' defaults)
+DEFAULT_START = {'SCALE': 0.1, 'sigma': 0.3}
+
+_LOG_SQRT_2PI = 0.5 * np.log(2 * np.pi)
+
+def _logsumexp(a, axis):
+    """Numerically stable log(sum(exp(a))) along an axis."""
+    a_max = np.max(a, axis=axis, keepdims=True)
+    return np.squeeze(a_max, axis) + np.log(np.sum(np.exp(a - a_max), axis=axis))
+
+def _normal_logpdf(x, loc, scale):
+    """Log density of N(loc, scale) at x, broadcasting."""
+    z = (x - loc) / scale
+    return -0.5 * z * z - np.log(scale) - _LOG_SQRT_2PI
+
+def observations_from_taps(stim_tap, player_tap, first_turn=1, burn_in=0, tap_delay=0.0):
+    """Model inputs and outputs of an alternating tapping session.
+    
+    Turn i (stimulus tap i, then player tap i) gives the SE
+    ``stim[i] - (player[i] + player[i-1]) / 2`` the model received and the
+    interval ``stim[i+1] - player[i] - tap_delay`` it produced.
+    
+    Args:
+        stim_tap: Stimulus (model) tap times
+        player_tap: Player tap times, player_tap[i] following stim_tap[i]
+        first_turn: First turn answered by the model (the number of Stage 1
+            taps when the full series are given)
+        burn_in: Turns from ``first_turn`` on that the model saw but that are
+            not analysed (the Stage 2 buffer). Their SEs are kept so that the
+            model state is replayed, their intervals are NaN so that the
+            likelihood is not conditioned on them.
+        tap_delay: Fixed delay the runner adds after a player tap (Config.TAP_DELAY)
+    
+    Returns:
+        tuple: (se, output) float64 arrays of equal length
+    """
+    stim = np.asarray(stim_tap, dtype=float)
+    player = np.asarray(player_tap, dtype=float)
+    n = min(len(stim) - 1, len(player))
+    first_turn = max(int(first_turn), 1)
+    if n <= first_turn:
+        return np.empty(0), np.empty(0)
+    turns = np.arange(first_turn, n)
+    se = stim[turns] - (player[turns] + player[turns - 1]) / 2
+    output = stim[turns + 1] - player[turns] - tap_delay
+    output[:burn_in] = np.nan
+    return se, output
+
+def session_observations(session):
+    """Model inputs and outputs of a recorded session.
+    
+    Sessions saved by the runner are replayed from the full tap series: the
+    model's first call answers the first Stage 2 stimulus (index STAGE1 of
+    the metadata), and the BUFFER turns after it are burn-in (see
+    observations_from_taps). Without the full series and metadata the
+    given taps are taken to start one turn before the first analysed call.
+    
+    Args:
+        session: MatlabSession, or a dict with 'stim_tap' and 'player_tap'
+            (as returned by read_session or MatlabSession.to_series)
+    
+    Returns:
+        tuple: (se, output) float64 arrays of equal length, output NaN for burn-in turns
+    """
+    stage2 = getattr(session, 'stage2', None)
+    if stage2 is not None:
+        # The MATLAB system logs the SE and interval of every model call
+        rows = stage2[(stage2['player'] == 'player').to_numpy(dtype=bool)]
+        se = rows['se'].to_numpy(dtype=float)
+        output = rows['predicted_interval'].to_numpy(dtype=float)
+        logged = ~(np.isnan(se) | np.isnan(output))
+        if logged.any():
+            return se[logged], output[logged]
+        return observations_from_taps(*session.taps())
+    config = session.get('metadata', {}).get('config')
+    if config is not None and 'full_stim_tap' in session:
+        return observations_from_taps(session['full_stim_tap'], session['full_player_tap'],
+                                      first_turn=config['STAGE1'], burn_in=config['BUFFER'],
+                                      tap_delay=config.get('TAP_DELAY', Config.TAP_DELAY))
+    return observations_from_taps(session['stim_tap'], session['player_tap'])
+
+def _sea_log_likelihood(se, output, span, scale):
+    """Exact log-likelihood under SEA: output ~ N(SPAN/2 - mean(se[:t+1]), SCALE)."""
+    mean_se = np.cumsum(se) / np.arange(1, len(se) + 1)
+    observed = ~np.isnan(output)
+    return float(np.sum(_normal_logpdf(output[observed], span / 2 - mean_se[observed], scale)))
+
+def _bayes_log_likelihood(se, output, span, n_hypothesis, sigma, x_min, x_max):
+    """Exact log-likelihood under the Bayesian model.
+    
+    With a fixed hypothesis grid the log-posterior after turn t is the
+    cumulative sum of the per-turn log-likelihoods, so all turns are
+    evaluated as one (turns, hypotheses) array.
+    """
+    hypotheses = np.linspace(x_min, x_max, n_hypothesis)
+    diff = se[:, None] - hypotheses[None, :]
+    log_post = np.cumsum(-(diff * diff) / (2 * sigma * sigma), axis=0)
+    log_post -= _logsumexp(log_post, axis=1)[:, None]
+    
+    # prediction = SPAN/2 - output ~ sum_j h_j N(hypothesis_j, sigma)
+    observed = ~np.isnan(output)
+    prediction = span / 2 - output[observed]
+    log_mix = log_post[observed] + _normal_logpdf(prediction[:, None], hypotheses[None, :], sigma)
+    return float(np.sum(_logsumexp(log_mix, axis=1)))
+
+def _bib_log_likelihood(se, output, span, scale, n_hypothesis, l_memory, sigma,
+                        x_min, x_max, n_particles, seed):
+    """Simulated log-likelihood under the BIB model.
+    
+    Hypothesis replacements do not depend on the produced intervals, so the
+    likelihood is the expectation over replacement paths of the product of
+    per-turn mixture densities. Each particle follows one path; the global
+    NumPy random state is seeded with ``seed`` (common random numbers across
+    parameter values) and restored afterwards.
+    """
+    state = np.random.get_state()
+    np.random.seed(seed)
+    try:
+        config = SimpleNamespace(SPAN=span, SCALE=scale)
+        model = BatchBIBModel(config, n_particles, n_hypothesis=n_hypothesis,
+                              l_memory=l_memory, x_min=x_min, x_max=x_max,
+                              sigma=sigma, log_domain=True)
+        prediction = span / 2 - output
+        log_paths = np.zeros(n_particles)
+        for t in range(len(se)):
+            model.inference_batch(np.full(n_particles, se[t]))
+            if np.isnan(prediction[t]):
+                continue  # Burn-in turn: update the state only
+            log_mix = model.log_h_prov + _normal_logpdf(prediction[t], model.likelihood, sigma)
+            log_paths += _logsumexp(log_mix, axis=1)
+    finally:
+        np.random.set_state(state)
+    return float(_logsumexp(log_paths, axis=0) - np.log(n_particles))
+
+def session_log_likelihood(model_type, params, se, output, span=2.0, x_min=-3, x_max=3,
+                           n_particles=200, seed=0):
+    """Log-likelihood of one session's model outputs.
+    
+    Args:
+        model_type: 'sea', 'bayes' or 'bib'
+        params: Parameter dict (SCALE for SEA; n_hypothesis, sigma for Bayes;
+            n_hypothesis, l_memory, sigma, SCALE for BIB)
+        se: SEs the model received
+        output: Intervals the model produced (NaN for burn-in turns, which
+            only update the model state)
+        span: Base interval SPAN of the session
+        x_min: Minimum value of the hypothesis space
+        x_max: Maximum value of the hypothesis space
+        n_particles: Simulated paths for BIB
+        seed: Seed of the BIB simulation
+    
+    Returns:
+        float: Log-likelihood
+    """
+    se = np.asarray(se, dtype=float)
+    output = np.asarray(output, dtype=float)
+    if len(se) == 0:
+        return 0.0
+    if model_type == 'sea':
+        return _sea_log_likelihood(se, output, span, params['SCALE'])
+    if model_type == 'bayes':
+        return _bayes_log_likelihood(se, output, span, int(params['n_hypothesis']),
+                                     params['sigma'], x_min, x_max)
+    if model_type == 'bib':
+        return _bib_log_likelihood(se, output, span, params['SCALE'],
+                                   int(params['n_hypothesis']), int(params['l_memory']),
+                                   params['sigma'], x_min, x_max, n_particles, seed)
+    raise ValueError(f"Unknown model type: {model_type}")
+
+def _fingerprint(se, output):
+    """Content hash identifying a session's observations in the cache."""
+    digest = hashlib.sha1()
+    digest.update(np.ascontiguousarray(se, dtype=float).tobytes())
+    digest.update(np.ascontiguousarray(output, dtype=float).tobytes())
+    return digest.hexdigest()
+
+class LikelihoodCache:
+    """Per-session log-likelihoods keyed by model, parameters, settings and data.
+    
+    With a path, entries are loaded from and saved to a JSON file, so repeated
+    and interrupted fits reuse earlier evaluations.
+    """
+    
+    def __init__(self, path=None):
+        """Open a cache.
+        
+        Args:
+            path: JSON file backing the cache (None: in memory only)
+        """
+        self.path = path
+        self.entries = {}
+        if path is not None and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    @staticmethod
+    def key(model_type, params, settings, fingerprint):
+        """Cache key of one per-session evaluation."""
+        rounded = {name: float(f"{value:.10g}") for name, value in sorted(params.items())}
+        return json.dumps([model_type, rounded, settings, fingerprint], sort_keys=True)
+    
+    def update(self, entries):
+        """Add evaluated entries."""
+        self.entries.update(entries)
+    
+    def save(self):
+        """Write the cache file (atomically); no-op for in-memory caches."""
+        if self.path is None:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+
+def _fit_grid_point(model_type, fixed, observations, fingerprints, cached, settings):
+    """Optimise the continuous parameters for one point of the integer grid.
+    
+    Runs in a worker process.
+    
+    Returns:
+        tuple: (result dict, new cache entries)
+    """
+    names = list(CONTINUOUS_PARAMETERS[model_type])
+    bounds = [CONTINUOUS_PARAMETERS[model_type][name] for name in names]
+    start = [settings['start'].get(name, DEFAULT_START[name]) for name in names]
+    new_entries = {}
+    
+    def total_log_likelihood(params):
+        total = 0.0
+        for (se, output), fingerprint in zip(observations, fingerprints):
+            key = LikelihoodCache.key(model_type, params, settings['key'], fingerprint)
+            if key in cached:
+                value = cached[key]
+            elif key in new_entries:
+                value = new_entries[key]
+            else:
+                value = session_log_likelihood(
+                    model_type, params, se, output, span=settings['span'],
+                    x_min=settings['x_min'], x_max=settings['x_max'],
+                    n_particles=settings['n_particles'], seed=settings['seed']
+                )
+                new_entries[key] = value
+            total += value
+        return total
+    
+    def objective(log_values):
+        values = np.clip(np.exp(log_values), [b[0] for b in bounds], [b[1] for b in bounds])
+        params = dict(fixed, **dict(zip(names, values)))
+        value = total_log_likelihood(params)
+        return -value if np.isfinite(value) else np.inf
+    
+    # Search in log space: all continuous parameters are positive scales
+    result = optimize.minimize(
+        objective, np.log(start), method='Nelder-Mead',
+        bounds=[(np.log(lo), np.log(hi)) for lo, hi in bounds],
+        options={'xatol': settings['xatol'], 'fatol': settings['fatol'],
+                 'maxiter': settings['maxiter']}
+    )
+    values = np.clip(np.exp(result.x), [b[0] for b in bounds], [b[1] for b in bounds])
+    params = dict(fixed, **{name: float(v) for name, v in zip(names, values)})
+    log_likelihood = total_log_likelihood(params)
+    return {'params': params, 'log_likelihood': log_likelihood}, new_entries
+
+def _grid_points(grid):
+    """All combinations of a {name: values} grid as dicts."""
+    points = [{}]
+    for name, values in grid.items():
+        points = [dict(point, **{name: int(v)}) for point in points for v in values]
+    return points
+
+def fit_participants(groups, model_type, grid=None, start=None, span=2.0, x_min=-3, x_max=3,
+                     n_particles=200, seed=0, n_jobs=1, cache_path=None,
+                     xatol=1e-3, fatol=1e-3, maxiter=200):
+    """Fit a model separately to several groups of sessions (e.g. one per participant).
+    
+    Every (group, grid point) pair is one task of the process pool.
+    
+    Args:
+        groups: Mapping from group name to a list of sessions, each either a
+            (se, output) pair or anything session_observations accepts
+        model_type: 'sea', 'bayes' or 'bib'
+        grid: Integer parameter values to try, e.g. {'n_hypothesis': (10, 20)}
+            (default: DEFAULT_GRID[model_type])
+        start: Starting values of the continuous parameters (default: DEFAULT_START)
+        span: Base interval SPAN of the sessions
+        x_min: Minimum value of the hypothesis space
+        x_max: Maximum value of the hypothesis space
+        n_particles: Simulated paths per session for BIB
+        seed: Seed of the BIB simulation (the same for every evaluation)
+        n_jobs: Worker processes (None / -1: one per CPU core)
+        cache_path: JSON file caching per-session log-likelihoods across runs
+        xatol: Absolute tolerance of the log-parameters in the optimiser
+        fatol: Absolute tolerance of the log-likelihood in the optimiser
+        maxiter: Maximum optimiser iterations per grid point
+    
+    Returns:
+        dict: Group name -> {'params', 'log_likelihood', 'n_sessions', 'n_observations', 'grid'}
+            where 'grid' lists the best result of every grid point
+    """
+    if model_type not in CONTINUOUS_PARAMETERS:
+        raise ValueError(f"Unknown model type: {model_type}")
+    grid = DEFAULT_GRID[model_type] if grid is None else grid
+    settings = {
+        'start': dict(DEFAULT_START, **(start or {})),
+        'span': span, 'x_min': x_min, 'x_max': x_max,
+        'n_particles': n_particles, 'seed': seed,
+        'xatol': xatol, 'fatol': fatol, 'maxiter': maxiter,
+        'key': [span, x_min, x_max] + ([n_particles, seed] if model_type == 'bib' else [])
+    }
+    
+    prepared = {}
+    for name, sessions in groups.items():
+        observations = [s if isinstance(s, tuple) else session_observations(s) for s in sessions]
+        observations = [(np.asarray(se, dtype=float), np.asarray(output, dtype=float))
+                        for se, output in observations]
+        prepared[name] = (observations, [_fingerprint(se, out) for se, out in observations])
+    
+    cache = LikelihoodCache(cache_path)
+    points = _grid_points(grid)
+    with make_executor(n_jobs) as executor:
+        futures = {
+            (name, i): executor.submit(_fit_grid_point, model_type, point, observations,
+                                       fingerprints, cache.entries, settings)
+            for name, (observations, fingerprints) in prepared.items()
+            for i, point in enumerate(points)
+        }
+        results = {}
+        for (name, i), future in futures.items():
+            result, new_entries = future.result()
+            cache.update(new_entries)
+            results.setdefault(name, []).append(result)
+    cache.save()
+    
+    fits = {}
+    for name, grid_results in results.items():
+        best = max(grid_results, key=lambda r: r['log_likelihood'])
+        observations = prepared[name][0]
+        fits[name] = {
+            'params': best['params'],
+            'log_likelihood': best['log_likelihood'],
+            'n_sessions': len(observations),
+            'n_observations': int(sum(np.count_nonzero(~np.isnan(out)) for _, out in observations)),
+            'grid': grid_results
+        }
+    return fits
+
+def fit_model(sessions, model_type, **kwargs):
+    """Fit a model to a list of sessions (see fit_participants for the options).
+    
+    Returns:
+        dict: {'params', 'log_likelihood', 'n_sessions', 'n_observations', 'grid'}
+    """
+    return fit_participants({'all': sessions}, model_type, **kwargs)['all']
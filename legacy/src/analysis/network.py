@@ -3,16 +3,180 @@ Recurrence network analysis tools for cooperative tapping task.
 Provides functions to build recurrence networks from time series data and analyze their properties.
 """
 import numpy as np
-import matplotlib.pyplot as plt
 import pandas as pd
-import networkx as nx
 import os
-from scipy import stats
+from scipy import stats, sparse as sp
+from scipy.sparse import csgraph
+from scipy.spatial import cKDTree
 import sys # コマンドライン引数処理のために追加
-from sklearn.linear_model import LinearRegression
+from .parallel import make_executor, resolve_n_jobs
+
+# Matplotlib, NetworkX and scikit-learn are imported on first use (see _pyplot,
+# _networkx and fit_degree_distribution) so the array-based analysis loads without them
+
+def _pyplot():
+    """matplotlib.pyplot, imported on first use."""
+    import matplotlib.pyplot as plt
+    return plt
+
+def _networkx():
+    """NetworkX, imported on first use; only needed for network plots and the 'networkx' metrics backend."""
+    try:
+        import networkx as nx
+    except ImportError:
+        raise ImportError("networkx is required for this function") from None
+    return nx
+
+# Upper bound on the size of temporary arrays in the blocked distance computation
+DISTANCE_BLOCK_BYTES = 64 * 1024 * 1024
+
+def embed_time_series(time_series, delay=1, embedding_dim=1):
+    """Time delay embedding of a scalar time series.
+    
+    Args:
+        time_series: Time series data
+        delay: Delay parameter for time delay embedding
+        embedding_dim: Embedding dimension for state space reconstruction
+        
+    Returns:
+        numpy.ndarray: State vectors of shape (N, embedding_dim)
+    """
+    time_series = np.asarray(time_series, dtype=float)
+    if embedding_dim > 1:
+        n_states = max(len(time_series) - (embedding_dim-1)*delay, 0)
+        return np.column_stack([time_series[j*delay:j*delay + n_states]
+                                for j in range(embedding_dim)])
+    return time_series.reshape(-1, 1)
+
+def pairwise_distances(states, block_bytes=DISTANCE_BLOCK_BYTES):
+    """Euclidean distance matrix between all pairs of state vectors.
+    
+    Rows are computed in blocks so that temporaries stay below ``block_bytes``
+    regardless of the number of states.
+    
+    Args:
+        states: State vectors of shape (N, dim)
+        block_bytes: Memory budget for temporaries of one block
+        
+    Returns:
+        numpy.ndarray: Symmetric (N, N) distance matrix
+    """
+    states = np.asarray(states, dtype=float)
+    N, dim = states.shape
+    distances = np.empty((N, N))
+    block = max(1, int(block_bytes // max(1, N * dim * 8)))
+    
+    for start in range(0, N, block):
+        stop = min(start + block, N)
+        _cross_distances(states[start:stop], states, out=distances[start:stop])
+    
+    return distances
+
+def _cross_distances(a, b, out=None):
+    """Distances between every state in ``a`` and every state in ``b``.
+    
+    Args:
+        a: State vectors of shape (M, dim)
+        b: State vectors of shape (N, dim)
+        out: Optional (M, N) array to write the result into
+    
+    Returns:
+        numpy.ndarray: (M, N) distance matrix
+    """
+    return _vector_norms(a[:, None, :] - b[None, :, :], out=out)
+
+def _vector_norms(diff, out=None):
+    """Euclidean norms along the last axis, bit-identical to np.linalg.norm of each vector.
+    
+    np.linalg.norm of a vector is sqrt(x.dot(x)), and matmul of stacked
+    vectors calls the same dot kernel. Summing the squares in another order
+    (einsum, norm with ``axis``) differs in the last bit and flips ties at
+    the threshold on rounded data such as millisecond ITIs.
+    """
+    if diff.shape[-1] == 1:
+        return np.abs(diff[..., 0], out=out)
+    return np.sqrt(np.matmul(diff[..., None, :], diff[..., :, None])[..., 0, 0], out=out)
+
+def recurrence_threshold(distances, recurrence_rate):
+    """Distance threshold giving the target recurrence rate.
+    
+    Selects the same order statistic of the upper-triangle distances as a
+    full sort would, using an O(n) partition.
+    
+    Args:
+        distances: Symmetric (N, N) distance matrix
+        recurrence_rate: Target recurrence rate
+        
+    Returns:
+        float: Threshold epsilon
+    """
+    N = distances.shape[0]
+    upper = np.arange(N)[:, None] < np.arange(N)[None, :]
+    flat_distances = distances[upper]
+    idx = int(recurrence_rate * len(flat_distances))
+    return np.partition(flat_distances, idx)[idx]
+
+def _pair_distances(states, i, j):
+    """Distances between states[i] and states[j], computed as in pairwise_distances."""
+    return _vector_norms(states[i] - states[j])
+
+def _neighbour_pairs(tree, states, radius):
+    """Pairs (i < j) of states within ``radius``, with their exact distances.
+    
+    The tree query uses a slightly enlarged radius and the result is filtered
+    with the same distance formula as the dense engine, so pairs lying exactly
+    on the threshold are classified identically in both modes.
+    """
+    pairs = tree.query_pairs(radius * (1 + 1e-9) + 1e-300, output_type='ndarray')
+    if len(pairs) == 0:
+        return pairs[:, 0], pairs[:, 1], np.empty(0)
+    i, j = pairs[:, 0], pairs[:, 1]
+    d = _pair_distances(states, i, j)
+    keep = d <= radius
+    return i[keep], j[keep], d[keep]
+
+def sparse_recurrence_threshold(tree, states, recurrence_rate):
+    """Distance threshold giving the target recurrence rate, without a dense matrix.
+    
+    Bisects the radius with KD-tree pair counts until enough pairs fall
+    inside it, then takes the exact order statistic among those pairs. The
+    result equals recurrence_threshold on the dense distance matrix.
+    
+    Args:
+        tree: cKDTree built on ``states``
+        states: State vectors of shape (N, dim)
+        recurrence_rate: Target recurrence rate
+        
+    Returns:
+        float: Threshold epsilon
+    """
+    N = len(states)
+    n_pairs = N * (N - 1) // 2
+    idx = int(recurrence_rate * n_pairs)
+    if idx >= n_pairs:
+        raise IndexError("recurrence_rate selects no pair distance")
+    
+    def pairs_within(r):
+        # count_neighbors counts ordered pairs including i == j
+        return (tree.count_neighbors(tree, r) - N) // 2
+    
+    lo = 0.0
+    hi = float(np.linalg.norm(np.ptp(states, axis=0))) * (1 + 1e-9) or 1.0
+    target = idx + 1
+    for _ in range(64):
+        if pairs_within(hi) <= 2 * target + N:
+            break
+        mid = 0.5 * (lo + hi)
+        if pairs_within(mid) >= target:
+            hi = mid
+        else:
+            lo = mid
+    
+    _, _, d = _neighbour_pairs(tree, states, hi)
+    return np.partition(d, idx)[idx]
 
 def create_recurrence_network(time_series, epsilon=None, recurrence_rate=0.05, 
-                              delay=1, embedding_dim=1):
+                              delay=1, embedding_dim=1, sparse=False):
     """Create a recurrence network from a time series.
     
     Args:
@@ -21,57 +185,152 @@ def create_recurrence_network(time_series, epsilon=None, recurrence_rate=0.05,
         recurrence_rate: Target recurrence rate if epsilon is None
         delay: Delay parameter for time delay embedding
         embedding_dim: Embedding dimension for state space reconstruction
+        sparse: Find neighbours with a KD-tree radius query and return a
+            scipy.sparse CSR matrix instead of a dense array
         
     Returns:
         adjacency_matrix: Adjacency matrix of the recurrence network
     """
     # Time delay embedding
-    if embedding_dim > 1:
-        vectors = []
-        for i in range(len(time_series) - (embedding_dim-1)*delay):
-            vector = [time_series[i + j*delay] for j in range(embedding_dim)]
-            vectors.append(vector)
-        states = np.array(vectors)
-    else:
-        states = np.array(time_series).reshape(-1, 1)
+    states = embed_time_series(time_series, delay, embedding_dim)
+    
+    if sparse:
+        N = len(states)
+        tree = cKDTree(states)
+        if epsilon is None:
+            epsilon = sparse_recurrence_threshold(tree, states, recurrence_rate)
+        i, j, _ = _neighbour_pairs(tree, states, epsilon)
+        rows = np.concatenate([i, j])
+        cols = np.concatenate([j, i])
+        adjacency_matrix = sp.csr_matrix(
+            (np.ones(len(rows)), (rows, cols)), shape=(N, N)
+        )
+        return adjacency_matrix, epsilon
     
     # Calculate distances
-    N = len(states)
-    distances = np.zeros((N, N))
-    
-    for i in range(N):
-        for j in range(i+1, N):
-            dist = np.linalg.norm(states[i] - states[j])
-            distances[i, j] = distances[j, i] = dist
+    distances = pairwise_distances(states)
     
     # If epsilon is not provided, calculate from recurrence rate
     if epsilon is None:
-        # Flatten the upper triangular part of the distance matrix
-        flat_distances = distances[np.triu_indices(N, k=1)]
-        # Sort distances
-        sorted_distances = np.sort(flat_distances)
-        # Calculate the threshold for the desired recurrence rate
-        idx = int(recurrence_rate * len(sorted_distances))
-        epsilon = sorted_distances[idx]
+        epsilon = recurrence_threshold(distances, recurrence_rate)
     
     # Create adjacency matrix
-    adjacency_matrix = np.zeros((N, N))
-    adjacency_matrix[distances <= epsilon] = 1
+    adjacency_matrix = (distances <= epsilon).astype(float)
     np.fill_diagonal(adjacency_matrix, 0)  # Remove self-loops
     
     return adjacency_matrix, epsilon
 
-def calculate_network_metrics(adjacency_matrix):
+def _to_graph(adjacency_matrix):
+    """Build a NetworkX graph from a dense or scipy.sparse adjacency matrix."""
+    nx = _networkx()
+    if sp.issparse(adjacency_matrix):
+        return nx.from_scipy_sparse_array(adjacency_matrix)
+    return nx.from_numpy_array(adjacency_matrix)
+
+def _degrees(adjacency_matrix):
+    """Node degrees of a dense or scipy.sparse adjacency matrix."""
+    if sp.issparse(adjacency_matrix):
+        return np.diff(sp.csr_matrix(adjacency_matrix).indptr)
+    return np.count_nonzero(adjacency_matrix, axis=1)
+
+def calculate_network_metrics(adjacency_matrix, backend='csgraph'):
     """Calculate various network metrics from an adjacency matrix.
     
     Args:
-        adjacency_matrix: Adjacency matrix of the network
+        adjacency_matrix: Adjacency matrix of the network (dense or scipy.sparse)
+        backend: 'csgraph' (array-based, default) or 'networkx' (reference implementation)
         
     Returns:
         dict: Dictionary of network metrics
     """
+    if backend == 'networkx':
+        return _networkx_network_metrics(adjacency_matrix)
+    if backend != 'csgraph':
+        raise ValueError(f"Unknown backend: {backend}")
+    
+    # Binary symmetric CSR adjacency without self-loops
+    A = sp.csr_matrix(adjacency_matrix, dtype=float)
+    A.setdiag(0)
+    A.eliminate_zeros()
+    A.data[:] = 1.0
+    
+    # Basic metrics
+    n_nodes = A.shape[0]
+    degrees = np.diff(A.indptr)
+    n_edges = int(degrees.sum()) // 2
+    density = 2 * n_edges / (n_nodes * (n_nodes - 1)) if n_nodes > 1 else 0.0
+    
+    # Breadth-first search from every node, in chunks of sources to bound memory
+    total_distance = np.zeros(n_nodes)
+    reachable = np.zeros(n_nodes, dtype=int)
+    chunk = max(1, int(DISTANCE_BLOCK_BYTES // max(1, n_nodes * 8)))
+    for start in range(0, n_nodes, chunk):
+        dist = csgraph.shortest_path(A, directed=False, unweighted=True,
+                                     indices=np.arange(start, min(start + chunk, n_nodes)))
+        finite = np.isfinite(dist)
+        total_distance[start:start + len(dist)] = np.where(finite, dist, 0).sum(axis=1)
+        reachable[start:start + len(dist)] = finite.sum(axis=1)
+    
+    # Average shortest path length (largest connected component if disconnected)
+    n_components, labels = csgraph.connected_components(A, directed=False)
+    if n_nodes == 0:
+        avg_path_length = np.nan
+    else:
+        largest = np.argmax(np.bincount(labels))
+        members = labels == largest
+        size = int(members.sum())
+        avg_path_length = total_distance[members].sum() / (size * (size - 1)) if size > 1 else 0.0
+    
+    # Clustering coefficient: diag(A^3) counts each triangle at a node twice
+    closed_walks = np.asarray((A @ A).multiply(A).sum(axis=1)).ravel()
+    possible = degrees * (degrees - 1)
+    local_clustering = np.divide(closed_walks, possible, out=np.zeros(n_nodes),
+                                 where=possible > 0)
+    clustering_coef = local_clustering.mean() if n_nodes else 0.0
+    
+    # Assortativity: Pearson correlation of degrees at both ends of every edge
+    rows, cols = A.nonzero()
+    deg_u, deg_v = degrees[rows].astype(float), degrees[cols].astype(float)
+    if len(rows) > 0 and np.std(deg_u) > 0:
+        assortativity = np.corrcoef(deg_u, deg_v)[0, 1]
+    else:
+        assortativity = np.nan
+    
+    # Centrality measures
+    if n_nodes > 1:
+        degree_centrality = np.mean(degrees / (n_nodes - 1))
+        # Wasserman-Faust closeness, as networkx computes it for disconnected graphs
+        closeness = np.divide((reachable - 1) ** 2, total_distance * (n_nodes - 1),
+                              out=np.zeros(n_nodes), where=total_distance > 0)
+        closeness_centrality = np.mean(closeness)
+    else:
+        degree_centrality = 1.0 if n_nodes == 1 else np.nan
+        closeness_centrality = 0.0 if n_nodes == 1 else np.nan
+    
+    # Degree distribution
+    avg_degree = np.mean(degrees)
+    std_degree = np.std(degrees)
+    max_degree = int(degrees.max()) if n_nodes else 0
+    
+    return {
+        'n_nodes': n_nodes,
+        'n_edges': n_edges,
+        'density': density,
+        'avg_path_length': avg_path_length,
+        'clustering_coefficient': clustering_coef,
+        'assortativity': assortativity,
+        'avg_degree': avg_degree,
+        'std_degree': std_degree,
+        'max_degree': max_degree,
+        'degree_centrality': degree_centrality,
+        'closeness_centrality': closeness_centrality
+    }
+
+def _networkx_network_metrics(adjacency_matrix):
+    """NetworkX implementation of calculate_network_metrics, kept for cross-checking."""
+    nx = _networkx()
     # Create NetworkX graph
-    G = nx.from_numpy_array(adjacency_matrix)
+    G = _to_graph(adjacency_matrix)
     
     # Basic metrics
     n_nodes = G.number_of_nodes()
@@ -129,13 +388,14 @@ def fit_degree_distribution(adjacency_matrix):
     """Fit the degree distribution to power-law and exponential distributions.
     
     Args:
-        adjacency_matrix: Adjacency matrix of the network
+        adjacency_matrix: Adjacency matrix of the network (dense or scipy.sparse)
         
     Returns:
         dict: Fit parameters and goodness of fit
     """
-    G = nx.from_numpy_array(adjacency_matrix)
-    degrees = [d for _, d in G.degree()]
+    from sklearn.linear_model import LinearRegression
+    
+    degrees = _degrees(adjacency_matrix).tolist()
     
     if not degrees or max(degrees) == min(degrees):
         return {
@@ -211,31 +471,271 @@ def fit_degree_distribution(adjacency_matrix):
         'best_fit': best_fit
     }
 
-def analyze_sliding_window(time_series, window_size=20, step=5, epsilon=None, 
-                           recurrence_rate=0.05, embedding_dim=1):
-    """Analyze network metrics in sliding windows.
-    
-    Args:
-        time_series: Time series data
-        window_size: Size of sliding window
-        step: Step size for sliding window
-        epsilon: Threshold for recurrence (if None, calculated from recurrence_rate)
-        recurrence_rate: Target recurrence rate if epsilon is None
-        embedding_dim: Embedding dimension for state space reconstruction
+class SlidingRecurrenceWindow:
+    """Dense recurrence network of a window sliding over a sequence of states.
+    
+    The window's distance matrix is kept in a ring buffer: state ``k`` lives
+    in slot ``k % n_states``. When the window advances, only the rows and
+    columns of the entering states are computed, overwriting the slots of
+    the states that left, so a slide by ``step`` states costs
+    O(step * n_states) distance evaluations instead of O(n_states²).
         
-    Returns:
-        DataFrame: DataFrame with network metrics for each window
+    The adjacency matrix is stored mirrored, as a (2n, 2n) buffer holding
+    every slot at ``a`` and ``a + n``, so that the window in time order is
+    the plain view ``buffer[o:o+n, o:o+n]`` with ``o = start % n`` and no
+    copy is needed to hand it on. Edges are written to all four copies.
+    
+    With a fixed ``epsilon`` the rows of the entering states are simply
+    rewritten. With a recurrence rate the pair distances are kept in value
+    buckets (about one bucket per state, bounds taken from the quantiles at
+    the last rebuild) with a live count per bucket. A slide subtracts the
+    pairs of the leaving states from the counts, appends those of the
+    entering states to their buckets, finds the bucket holding the
+    recurrence-rate rank from the cumulative counts and selects the
+    threshold inside it. Besides the entering rows, only the edges whose
+    distance lies between the old and the new threshold change, and those
+    are read from the buckets spanning that range. Pairs of states that
+    have left are dropped lazily when a bucket is scanned, and all buckets
+    are rebuilt once one of them runs full, which happens about every
+    n_states / step slides, so a slide costs O(step * n_states) amortized.
+    
+    Node order in ``distances`` and ``adjacency`` is rotated with respect to
+    time order. Use ``ordered_adjacency`` wherever node order matters, e.g.
+    for plotting or for calculate_network_metrics, which picks the first of
+    several equally large components for the average path length.
     """
-    results = []
     
-    for i in range(0, len(time_series) - window_size + 1, step):
-        window = time_series[i:i+window_size]
+    def __init__(self, states, n_states, epsilon=None, recurrence_rate=0.05):
+        """Initialize an empty window.
         
-        # Create recurrence network for this window
-        adj_matrix, window_epsilon = create_recurrence_network(
-            window, epsilon, recurrence_rate, embedding_dim=embedding_dim
-        )
+        Args:
+            states: Embedded state vectors of the whole series, shape (N, dim)
+            n_states: Number of states in one window
+            epsilon: Threshold for recurrence (if None, calculated from recurrence_rate)
+            recurrence_rate: Target recurrence rate if epsilon is None
+        """
+        self.states = np.asarray(states, dtype=float)
+        self.n_states = int(n_states)
+        self.fixed_epsilon = epsilon
+        self.recurrence_rate = recurrence_rate
+        self.start = None
+        self.epsilon = epsilon
+        self.index = np.empty(self.n_states, dtype=int)
+        self.distances = np.zeros((self.n_states, self.n_states))
+        self.degrees = np.zeros(self.n_states, dtype=int)
+        self._mirror = np.zeros((2 * self.n_states, 2 * self.n_states))
+        # Value buckets of the pair distances (recurrence-rate threshold only)
+        self._bounds = np.empty(0)
+        self._counts = np.zeros(1, dtype=int)       # Pairs in the window per bucket
+        self._offsets = np.zeros(1, dtype=int)      # Bucket b occupies _offsets[b] .. + _capacity[b]
+        self._capacity = np.zeros(1, dtype=int)
+        self._fill = np.zeros(1, dtype=int)         # Stored entries per bucket, incl. left pairs
+        self._older = np.empty(0, dtype=int)        # Per entry: state indices and distance
+        self._newer = np.empty(0, dtype=int)
+        self._values = np.empty(0)
+    
+    @property
+    def adjacency(self):
+        """Adjacency matrix of the current window in slot order (a view)."""
+        return self._mirror[:self.n_states, :self.n_states]
+    
+    def slide(self, start):
+        """Move the window so that it covers states ``start .. start + n_states - 1``.
+        
+        Args:
+            start: Index of the first state in the window
+        
+        Returns:
+            SlidingRecurrenceWindow: self, for chaining
+        """
+        n = self.n_states
+        rebuild = self.start is None or not self.start <= start < self.start + n
+        if rebuild:
+            entering = np.arange(start, start + n)
+        else:
+            entering = np.arange(self.start + n, start + n)
+        self.start = start
+        if len(entering) == 0:
+            return self
+        
+        slots = entering % n
+        old_rows = self.distances[slots, :]
+        self.index[slots] = entering
+        rows = _cross_distances(self.states[entering], self.states[self.index])
+        self.distances[slots, :] = rows
+        self.distances[:, slots] = rows.T
+        
+        if self.fixed_epsilon is None:
+            if rebuild:
+                self._rebuild_threshold()
+            else:
+                self._update_threshold(slots, old_rows, rows)
+            return self
         
+        # Fixed threshold: drop the edges of the leaving states, add those of the entering ones
+        new_rows = (rows <= self.epsilon).astype(float)
+        new_rows[np.arange(len(slots)), slots] = 0  # Remove self-loops
+        self._set_rows(slots, new_rows)
+        return self
+    
+    def _rebuild_threshold(self):
+        """Bucket all pair distances and build the network of a completely new window."""
+        n = self.n_states
+        a, b = np.triu_indices(n, k=1)
+        values = self.distances[a, b]
+        order = np.argsort(values, kind='stable')
+        a, b, values = a[order], b[order], values[order]
+        
+        # About one bucket per state, bounded by the current quantiles
+        n_buckets = max(n, 1)
+        self._bounds = values[(np.arange(1, n_buckets) * len(values)) // n_buckets]
+        buckets = np.searchsorted(self._bounds, values, side='left')
+        self._counts = np.bincount(buckets, minlength=n_buckets)
+        self._capacity = 2 * self._counts + max(len(values) // n_buckets, 8)
+        self._offsets = np.concatenate([[0], np.cumsum(self._capacity)[:-1]])
+        self._fill = self._counts.copy()
+        rank = np.arange(len(values)) - np.searchsorted(buckets, buckets, side='left')
+        positions = self._offsets[buckets] + rank
+        size = int(self._capacity.sum())
+        self._older = np.empty(size, dtype=int)
+        self._newer = np.empty(size, dtype=int)
+        self._values = np.empty(size)
+        states_a, states_b = self.index[a], self.index[b]
+        self._older[positions] = np.minimum(states_a, states_b)
+        self._newer[positions] = np.maximum(states_a, states_b)
+        self._values[positions] = values
+        
+        self.epsilon = values[int(self.recurrence_rate * len(values))]
+        adjacency = (self.distances <= self.epsilon).astype(float)
+        np.fill_diagonal(adjacency, 0)
+        self._mirror[:] = np.tile(adjacency, (2, 2))
+        self.degrees = np.count_nonzero(adjacency, axis=1)
+    
+    def _update_threshold(self, slots, old_rows, rows):
+        """Replace the pairs of ``slots`` in the buckets and update the network."""
+        n = self.n_states
+        entering = np.zeros(n, dtype=bool)
+        entering[slots] = True
+        
+        # Pairs involving the replaced slots, each pair among them once
+        row_positions = np.repeat(np.arange(len(slots)), n)
+        row_slots = slots[row_positions]
+        col_slots = np.tile(np.arange(n), len(slots))
+        pairs = (~entering[col_slots]) | (row_slots < col_slots)
+        row_positions, row_slots, col_slots = row_positions[pairs], row_slots[pairs], col_slots[pairs]
+        old_values = old_rows[row_positions, col_slots]
+        new_values = rows[row_positions, col_slots]
+        
+        # Leaving pairs: count them out (their entries are dropped lazily) and remove their edges
+        self._counts -= np.bincount(np.searchsorted(self._bounds, old_values, side='left'),
+                                    minlength=len(self._counts))
+        self._set_rows(slots, np.zeros((len(slots), n)))
+        
+        # Entering pairs: append them to their buckets, rebuilding if one runs full
+        buckets = np.searchsorted(self._bounds, new_values, side='left')
+        order = np.argsort(buckets, kind='stable')
+        sorted_buckets = buckets[order]
+        rank = np.arange(len(order)) - np.searchsorted(sorted_buckets, sorted_buckets, side='left')
+        fill = self._fill[sorted_buckets] + rank
+        if np.any(fill >= self._capacity[sorted_buckets]):
+            self._rebuild_threshold()
+            return
+        positions = self._offsets[sorted_buckets] + fill
+        states_a, states_b = self.index[row_slots[order]], self.index[col_slots[order]]
+        self._older[positions] = np.minimum(states_a, states_b)
+        self._newer[positions] = np.maximum(states_a, states_b)
+        self._values[positions] = new_values[order]
+        added = np.bincount(buckets, minlength=len(self._counts))
+        self._counts += added
+        self._fill += added
+        
+        # Re-threshold: only pairs between the old and the new epsilon change
+        old_epsilon = self.epsilon
+        self.epsilon = self._threshold_from_buckets()
+        if self.epsilon != old_epsilon:
+            lo, hi = min(old_epsilon, self.epsilon), max(old_epsilon, self.epsilon)
+            first, last = np.searchsorted(self._bounds, [lo, hi], side='left')
+            for bucket in range(first, last + 1):
+                older, newer, values = self._bucket(bucket)
+                changed = (values > lo) & (values <= hi)
+                self._set_edges(older[changed] % n, newer[changed] % n,
+                                values[changed] <= self.epsilon)
+        self._set_edges(row_slots, col_slots, new_values <= self.epsilon)
+    
+    def _bucket(self, bucket):
+        """Entries of ``bucket`` still in the window, after dropping those that left."""
+        begin = self._offsets[bucket]
+        end = begin + self._fill[bucket]
+        keep = self._older[begin:end] >= self.start
+        entries = [array[begin:end][keep] for array in (self._older, self._newer, self._values)]
+        self._fill[bucket] = len(entries[0])
+        for array, entry in zip((self._older, self._newer, self._values), entries):
+            array[begin:begin + len(entry)] = entry
+        return entries
+    
+    def _threshold_from_buckets(self):
+        """Order statistic of the pair distances selected by recurrence_threshold."""
+        total = np.cumsum(self._counts)
+        rank = int(self.recurrence_rate * total[-1])
+        bucket = int(np.searchsorted(total, rank, side='right'))
+        values = self._bucket(bucket)[2]
+        rank -= total[bucket] - self._counts[bucket]
+        return np.partition(values, rank)[rank]
+    
+    def _set_rows(self, slots, rows):
+        """Replace the edges of ``slots`` by ``rows`` (in slot order) and update the degrees."""
+        n = self.n_states
+        self.degrees -= np.count_nonzero(self.adjacency[:, slots], axis=1)
+        tiled = np.tile(rows, 2)
+        for offset in (0, n):
+            self._mirror[slots + offset, :] = tiled
+            self._mirror[:, slots + offset] = tiled.T
+        self.degrees += np.count_nonzero(self.adjacency[:, slots], axis=1)
+        self.degrees[slots] = np.count_nonzero(rows, axis=1)
+    
+    def _set_edges(self, a, b, values):
+        """Set the (symmetric) edges between slots ``a`` and ``b`` and update the degrees."""
+        n = self.n_states
+        values = np.broadcast_to(np.asarray(values, dtype=float), np.shape(a))
+        delta = (values - self._mirror[a, b]).astype(int)
+        for row_offset in (0, n):
+            for col_offset in (0, n):
+                self._mirror[a + row_offset, b + col_offset] = values
+                self._mirror[b + row_offset, a + col_offset] = values
+        np.add.at(self.degrees, a, delta)
+        np.add.at(self.degrees, b, delta)
+    
+    def ordered_adjacency(self):
+        """Adjacency matrix of the current window with nodes in time order.
+        
+        The result is a view into the window's buffer, valid until the next
+        slide; copy it to keep it.
+        """
+        offset = self.start % self.n_states
+        return self._mirror[offset:offset + self.n_states, offset:offset + self.n_states]
+
+def _sliding_window_metrics(time_series, starts, window_size, epsilon, recurrence_rate,
+                            embedding_dim, sparse):
+    """Network metrics of the windows beginning at ``starts`` (ascending).
+    
+    Dense windows share one SlidingRecurrenceWindow so that overlapping parts
+    of consecutive windows are not recomputed; sparse windows are built
+    independently with create_recurrence_network.
+    """
+    results = []
+    if sparse:
+        networks = (create_recurrence_network(time_series[i:i+window_size], epsilon,
+                                              recurrence_rate, embedding_dim=embedding_dim,
+                                              sparse=True)
+                    for i in starts)
+    else:
+        # Window i covers the states i .. i + window_size - embedding_dim of the whole series
+        states = embed_time_series(time_series, 1, embedding_dim)
+        window = SlidingRecurrenceWindow(states, window_size - (embedding_dim - 1),
+                                         epsilon, recurrence_rate)
+        networks = ((window.slide(i).ordered_adjacency(), window.epsilon) for i in starts)
+    
+    for i, (adj_matrix, window_epsilon) in zip(starts, networks):
         # Calculate network metrics
         metrics = calculate_network_metrics(adj_matrix)
         
@@ -251,12 +751,165 @@ def analyze_sliding_window(time_series, window_size=20, step=5, epsilon=None,
         
         results.append(metrics)
     
+    return results
+
+def _sliding_window_chunk(time_series, offset, starts, window_size, epsilon, recurrence_rate,
+                          embedding_dim, sparse):
+    """Worker task: metrics of the windows ``starts`` of a series slice beginning at ``offset``."""
+    results = _sliding_window_metrics(time_series, starts, window_size, epsilon,
+                                      recurrence_rate, embedding_dim, sparse)
+    for metrics in results:
+        metrics['window_start'] += offset
+        metrics['window_end'] += offset
+        metrics['window_center'] += offset
+    return results
+
+def _submit_sliding_window(executor, time_series, window_size=20, step=5, epsilon=None,
+                           recurrence_rate=0.05, embedding_dim=1, sparse=False,
+                           n_workers=1, chunk_size=None):
+    """Submit the sliding-window analysis of one series as chunks of consecutive windows.
+    
+    Each task receives only the slice of the series its windows cover, and
+    consecutive windows within a chunk still share one incremental window.
+    
+    Args:
+        executor: Executor to submit to (see parallel.make_executor)
+        n_workers: Number of workers of ``executor``, used for the default chunk size
+        chunk_size: Windows per task (default: one chunk for a single worker,
+            otherwise about four chunks per worker)
+        Other arguments as in analyze_sliding_window.
+    
+    Returns:
+        list: Futures in window order, to be passed to _collect_sliding_window
+    """
+    time_series = np.asarray(time_series, dtype=float)
+    starts = list(range(0, len(time_series) - window_size + 1, step))
+    if not starts:
+        return []
+    if chunk_size is None:
+        chunk_size = len(starts) if n_workers == 1 else -(-len(starts) // (4 * n_workers))
+    
+    futures = []
+    for c in range(0, len(starts), max(1, int(chunk_size))):
+        chunk = starts[c:c + max(1, int(chunk_size))]
+        offset = chunk[0]
+        futures.append(executor.submit(
+            _sliding_window_chunk, time_series[offset:chunk[-1] + window_size], offset,
+            [i - offset for i in chunk], window_size, epsilon, recurrence_rate,
+            embedding_dim, sparse
+        ))
+    return futures
+
+def _collect_sliding_window(futures):
+    """Gather the results of _submit_sliding_window into a DataFrame (in window order)."""
+    results = [metrics for future in futures for metrics in future.result()]
+    
     # Create DataFrame
     if results:
         return pd.DataFrame(results)
     else:
         return pd.DataFrame()
 
+def analyze_sliding_window(time_series, window_size=20, step=5, epsilon=None, 
+                           recurrence_rate=0.05, embedding_dim=1, sparse=False,
+                           n_jobs=1, chunk_size=None):
+    """Analyze network metrics in sliding windows.
+    
+    Dense windows are built incrementally (see SlidingRecurrenceWindow), so
+    the distance evaluations per window scale with ``step`` rather than with
+    ``window_size``², and a recurrence-rate threshold is maintained on the
+    sorted pair distances instead of being re-selected per window. With ``n_jobs`` > 1 the windows are split
+    into chunks analysed in a process pool; results are identical and in
+    the same order as a serial run.
+    
+    Args:
+        time_series: Time series data
+        window_size: Size of sliding window
+        step: Step size for sliding window
+        epsilon: Threshold for recurrence (if None, calculated from recurrence_rate)
+        recurrence_rate: Target recurrence rate if epsilon is None
+        embedding_dim: Embedding dimension for state space reconstruction
+        sparse: Build each window's network in sparse mode
+        n_jobs: Number of worker processes (None or -1 for all CPU cores)
+        chunk_size: Windows per worker task (default: about four tasks per worker)
+    
+    Returns:
+        DataFrame: DataFrame with network metrics for each window
+    """
+    n_workers = resolve_n_jobs(n_jobs)
+    with make_executor(n_workers) as executor:
+        futures = _submit_sliding_window(executor, time_series, window_size, step, epsilon,
+                                         recurrence_rate, embedding_dim, sparse,
+                                         n_workers=n_workers, chunk_size=chunk_size)
+        return _collect_sliding_window(futures)
+    
+def analyze_recurrence_network(time_series, epsilon=None, recurrence_rate=0.05, embedding_dim=1):
+    """Build a recurrence network and compute its metrics and degree distribution fit.
+    
+    Args:
+        time_series: Time series data
+        epsilon: Threshold for recurrence (if None, calculated from recurrence_rate)
+        recurrence_rate: Target recurrence rate if epsilon is None
+        embedding_dim: Embedding dimension for state space reconstruction
+    
+    Returns:
+        tuple: (adjacency_matrix, epsilon, metrics, fit_results)
+    """
+    adjacency_matrix, epsilon = create_recurrence_network(
+        time_series, epsilon, recurrence_rate, embedding_dim=embedding_dim
+    )
+    metrics = calculate_network_metrics(adjacency_matrix)
+    fit_results = fit_degree_distribution(adjacency_matrix)
+    metrics.update(fit_results)
+    return adjacency_matrix, epsilon, metrics, fit_results
+
+def analyze_recurrence_networks(series, min_length=20, window_min_length=50, window_size=30,
+                                step=5, epsilon=None, recurrence_rate=0.05, embedding_dim=2,
+                                n_jobs=1):
+    """Whole-series and sliding-window network analyses of several series in one process pool.
+    
+    All analyses are independent, so they are submitted together and run in
+    parallel when ``n_jobs`` > 1; the sliding windows of each series are
+    split into chunks as in analyze_sliding_window. The pool is shut down
+    before returning, also on errors.
+    
+    Args:
+        series: Series name -> time series data
+        min_length: Shortest series that gets a whole-series analysis
+        window_min_length: Shortest series that gets a sliding-window analysis
+        window_size: Size of sliding window
+        step: Step size for sliding window
+        epsilon: Threshold for recurrence (if None, calculated from recurrence_rate)
+        recurrence_rate: Target recurrence rate if epsilon is None
+        embedding_dim: Embedding dimension for state space reconstruction
+        n_jobs: Number of worker processes (None or -1 for all CPU cores)
+    
+    Returns:
+        tuple: (networks, windows) dicts keyed by series name, holding the
+            analyze_recurrence_network result and the analyze_sliding_window
+            DataFrame of every series long enough for them
+    """
+    n_workers = resolve_n_jobs(n_jobs)
+    with make_executor(n_workers) as executor:
+        network_futures = {}
+        window_futures = {}
+        for name, time_series in series.items():
+            time_series = np.asarray(time_series, dtype=float)
+            if len(time_series) >= min_length:
+                network_futures[name] = executor.submit(
+                    analyze_recurrence_network, time_series, epsilon, recurrence_rate,
+                    embedding_dim
+                )
+            if len(time_series) >= window_min_length:
+                window_futures[name] = _submit_sliding_window(
+                    executor, time_series, window_size, step, epsilon, recurrence_rate,
+                    embedding_dim, n_workers=n_workers
+                )
+        networks = {name: future.result() for name, future in network_futures.items()}
+        windows = {name: _collect_sliding_window(futures)
+                   for name, futures in window_futures.items()}
+    return networks, windows
+
 def plot_recurrence_network(adjacency_matrix, node_size=30, edge_width=0.5, 
                             node_color='skyblue', edge_color='gray', alpha=0.7,
                             title='Recurrence Network', figsize=(10, 8),
@@ -264,7 +917,7 @@ def plot_recurrence_network(adjacency_matrix, node_size=30, edge_width=0.5,
     """Plot the recurrence network.
     
     Args:
-        adjacency_matrix: Adjacency matrix of the network
+        adjacency_matrix: Adjacency matrix of the network (dense or scipy.sparse)
         node_size: Size of nodes in the plot
         edge_width: Width of edges in the plot
         node_color: Color of nodes
@@ -274,11 +927,13 @@ def plot_recurrence_network(adjacency_matrix, node_size=30, edge_width=0.5,
         figsize: Figure size (width, height)
         output_path: Path to save the plot (if None, plot is not saved)
     """
+    plt = _pyplot()
+    nx = _networkx()
     # 明示的にfigとaxを作成
     fig, ax = plt.subplots(figsize=figsize)
     
     # Create network
-    G = nx.from_numpy_array(adjacency_matrix)
+    G = _to_graph(adjacency_matrix)
     
     # Calculate node positions
     pos = nx.spring_layout(G, seed=42)
@@ -317,19 +972,25 @@ def plot_recurrence_matrix(adjacency_matrix, title='Recurrence Matrix',
     """Plot the recurrence matrix as a heatmap.
     
     Args:
-        adjacency_matrix: Adjacency matrix of the network
+        adjacency_matrix: Adjacency matrix of the network (dense or scipy.sparse)
         title: Plot title
         figsize: Figure size (width, height)
         output_path: Path to save the plot (if None, plot is not saved)
     """
+    plt = _pyplot()
     fig, ax = plt.subplots(figsize=figsize)
     
-    im = ax.imshow(adjacency_matrix, cmap='binary', interpolation='none', aspect='equal')
+    if sp.issparse(adjacency_matrix):
+        # Plot only the recurrent points so large networks are never densified
+        ax.spy(adjacency_matrix, markersize=1, color='black', aspect='equal')
+        ax.xaxis.set_ticks_position('bottom')
+    else:
+        im = ax.imshow(adjacency_matrix, cmap='binary', interpolation='none', aspect='equal')
+        cbar = fig.colorbar(im, ax=ax, label='Recurrence')
     
     ax.set_title(title)
     ax.set_xlabel('Time Index')
     ax.set_ylabel('Time Index')
-    cbar = fig.colorbar(im, ax=ax, label='Recurrence')
     
     # Create directory if it doesn't exist
     if output_path:
@@ -343,17 +1004,16 @@ def plot_degree_distribution(adjacency_matrix, fit=True, title='Degree Distribut
     """Plot the degree distribution of the network.
     
     Args:
-        adjacency_matrix: Adjacency matrix of the network
+        adjacency_matrix: Adjacency matrix of the network (dense or scipy.sparse)
         fit: Whether to plot power-law and exponential fits
         title: Plot title
         figsize: Figure size (width, height)
         output_path: Path to save the plot (if None, plot is not saved)
     """
+    plt = _pyplot()
     fig, ax = plt.subplots(figsize=figsize)
     
-    # Create network
-    G = nx.from_numpy_array(adjacency_matrix)
-    degrees = [d for _, d in G.degree()]
+    degrees = _degrees(adjacency_matrix).tolist()
     
     if not degrees:
         ax.set_title("No degrees to plot")
@@ -437,6 +1097,7 @@ def plot_sliding_window_metrics(window_results, metrics_to_plot=None,
         figsize: Figure size (width, height)
         output_path: Path to save the plot (if None, plot is not saved)
     """
+    plt = _pyplot()
     if window_results.empty:
         print("No window results to plot")
         return
@@ -0,0 +1,182 @@
+"""
+Online metrics for a running session.
+Accumulates ITI/SE statistics tap by tap during Stage 2 (O(1) per update and
+no per-tap allocation), so drift or a disengaged participant can be seen
+while the session is still running. The series follow the definitions of
+ExperimentRunner.analyze_data.
+"""
+import math
+
+import numpy as np
+
+# Series tracked by OnlineMetrics
+ONLINE_SERIES = ('stim_se', 'player_se', 'stim_iti', 'player_iti')
+
+
+class RunningSeriesStats:
+    """Running statistics of one series.
+
+    Keeps Welford mean/variance over all values, mean/SD over the last
+    ``window`` values (ring buffer with running sums) and the lag-1
+    autocorrelation over all values. Values are stored relative to the
+    first one to keep the running sums well conditioned.
+    """
+
+    __slots__ = ('window', 'n', 'mean', '_m2', '_shift', '_first', '_last',
+                 '_sum', '_lag_products', '_ring', '_ring_pos', '_ring_sum', '_ring_sumsq')
+
+    def __init__(self, window=10):
+        """Initialize empty statistics.
+
+        Args:
+            window: Number of most recent values in the rolling statistics
+        """
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        self.window = int(window)
+        self._ring = np.zeros(self.window)
+        self.reset()
+
+    def reset(self):
+        """Forget all values (the ring buffer is reused)."""
+        self.n = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self._shift = 0.0
+        self._first = 0.0
+        self._last = 0.0
+        self._sum = 0.0
+        self._lag_products = 0.0
+        self._ring_pos = 0
+        self._ring_sum = 0.0
+        self._ring_sumsq = 0.0
+
+    def update(self, value):
+        """Add one value."""
+        if self.n == 0:
+            self._shift = value
+        x = value - self._shift
+
+        # Welford update
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self._m2 += delta * (value - self.mean)
+
+        # Sums for the lag-1 autocorrelation
+        if self.n == 1:
+            self._first = x
+        else:
+            self._lag_products += x * self._last
+        self._last = x
+        self._sum += x
+
+        # Rolling window: replace the oldest value
+        old = self._ring[self._ring_pos]
+        if self.n > self.window:
+            self._ring_sum -= old
+            self._ring_sumsq -= old * old
+        self._ring[self._ring_pos] = x
+        self._ring_sum += x
+        self._ring_sumsq += x * x
+        self._ring_pos = (self._ring_pos + 1) % self.window
+
+    @property
+    def variance(self):
+        """Sample variance of all values."""
+        return self._m2 / (self.n - 1) if self.n > 1 else math.nan
+
+    @property
+    def std(self):
+        """Sample standard deviation of all values."""
+        return math.sqrt(self.variance) if self.n > 1 else math.nan
+
+    @property
+    def rolling_mean(self):
+        """Mean of the last ``window`` values."""
+        count = min(self.n, self.window)
+        return self._shift + self._ring_sum / count if count else math.nan
+
+    @property
+    def rolling_std(self):
+        """Sample standard deviation of the last ``window`` values."""
+        count = min(self.n, self.window)
+        if count < 2:
+            return math.nan
+        centred = self._ring_sumsq - self._ring_sum * self._ring_sum / count
+        return math.sqrt(max(centred, 0.0) / (count - 1))
+
+    @property
+    def lag1_autocorr(self):
+        """Lag-1 autocorrelation of all values (definition of analysis.autocorr)."""
+        if self.n < 3 or self._m2 <= 0:
+            return math.nan
+        mean = self._sum / self.n
+        # sum over t of (x[t] - mean) * (x[t-1] - mean), expanded into running sums
+        covariance = (self._lag_products
+                      - mean * (2 * self._sum - self._first - self._last)
+                      + (self.n - 1) * mean * mean)
+        return covariance / self._m2
+
+    def snapshot(self):
+        """Current statistics as a dict."""
+        return {
+            'n': self.n,
+            'mean': self.mean if self.n else math.nan,
+            'std': self.std,
+            'rolling_mean': self.rolling_mean,
+            'rolling_std': self.rolling_std,
+            'lag1_autocorr': self.lag1_autocorr
+        }
+
+
+class OnlineMetrics:
+    """Streaming ITI/SE statistics of a Stage 2 session.
+
+    Fed once per turn with the stimulus time, the following player tap and
+    the stimulus SE the runner passed to the model.
+    """
+
+    __slots__ = ('series', '_prev_stim', '_prev_player', 'turns')
+
+    def __init__(self, window=10):
+        """Initialize empty metrics.
+
+        Args:
+            window: Number of most recent turns in the rolling statistics
+        """
+        self.series = {name: RunningSeriesStats(window) for name in ONLINE_SERIES}
+        self.reset()
+
+    def reset(self):
+        """Forget all turns."""
+        for stats in self.series.values():
+            stats.reset()
+        self._prev_stim = math.nan
+        self._prev_player = math.nan
+        self.turns = 0
+
+    def update(self, stim_time, player_time, stim_se):
+        """Add one turn.
+
+        Args:
+            stim_time: Time of the stimulus of this turn
+            player_time: Time of the player tap answering it
+            stim_se: SE of the stimulus relative to the last two player taps
+        """
+        series = self.series
+        series['stim_se'].update(stim_se)
+        series['player_iti'].update(player_time - stim_time)
+        if self.turns > 0:
+            series['stim_iti'].update(stim_time - self._prev_player)
+            series['player_se'].update(player_time - (self._prev_stim + stim_time) / 2)
+        self._prev_stim = stim_time
+        self._prev_player = player_time
+        self.turns += 1
+
+    def snapshot(self):
+        """Statistics of all series, keyed by series name."""
+        return {name: stats.snapshot() for name, stats in self.series.items()}
+
+    def __getitem__(self, name):
+        return self.series[name]
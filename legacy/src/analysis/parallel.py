@@ -0,0 +1,50 @@
+"""
+Process-pool helpers shared by the analysis and sweep entry points.
+Every function taking ``n_jobs`` resolves it with resolve_n_jobs and submits
+its tasks to make_executor, which runs a single worker in the calling
+process so that n_jobs=1 needs no pickling and keeps tracebacks simple.
+"""
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+
+class _SerialExecutor:
+    """Executor running each task immediately in the calling process (n_jobs=1)."""
+    
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    
+    def shutdown(self, wait=True):
+        pass
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+def resolve_n_jobs(n_jobs):
+    """Number of worker processes for an ``n_jobs`` setting.
+    
+    Args:
+        n_jobs: Positive worker count, or None / -1 for one worker per CPU core
+    
+    Returns:
+        int: Number of workers
+    """
+    if n_jobs is None or n_jobs == -1:
+        return os.cpu_count() or 1
+    if n_jobs < 1:
+        raise ValueError(f"n_jobs must be positive, -1 or None, got {n_jobs}")
+    return int(n_jobs)
+
+def make_executor(n_jobs):
+    """Process pool for ``n_jobs`` workers, or a serial executor for a single one."""
+    n_workers = resolve_n_jobs(n_jobs)
+    if n_workers == 1:
+        return _SerialExecutor()
+    return ProcessPoolExecutor(max_workers=n_workers)
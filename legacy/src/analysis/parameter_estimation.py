@@ -0,0 +1,189 @@
+"""
+Model parameter estimation from human-human tapping data.
+Python port of analysis/estimate_parameters_from_human_data.m: estimates
+SPAN, SCALE, BAYES_N_HYPOTHESIS and BIB_L_MEMORY from the Stage 2 taps of all
+human-human sessions below a data directory.
+"""
+import numpy as np
+from scipy import stats
+
+from .parallel import make_executor
+
+# Upper bound on the size of the resampled data matrix of one bootstrap chunk
+BOOTSTRAP_BLOCK_BYTES = 64 * 1024 * 1024
+
+def _std(values, axis=None):
+    """Sample standard deviation (MATLAB ``std``)."""
+    return np.std(values, axis=axis, ddof=1)
+
+def prctile(values, q):
+    """Percentiles as computed by MATLAB ``prctile`` (midpoint interpolation).
+    
+    Args:
+        values: Sample
+        q: Percentile or sequence of percentiles in [0, 100]
+    
+    Returns:
+        Percentile(s) of the sample
+    """
+    values = np.sort(np.asarray(values, dtype=float))
+    n = len(values)
+    positions = 100.0 * (np.arange(1, n + 1) - 0.5) / n
+    return np.interp(q, positions, values)
+
+def autocorr(values, n_lags):
+    """Sample autocorrelation for lags 0..n_lags (MATLAB ``autocorr``).
+    
+    Args:
+        values: Time series
+        n_lags: Largest lag
+    
+    Returns:
+        ndarray: Autocorrelation of length n_lags + 1, starting at lag 0
+    """
+    x = np.asarray(values, dtype=float)
+    x = x - x.mean()
+    n = len(x)
+    # Autocovariance of all lags at once from the zero-padded power spectrum
+    n_fft = 1 << int(np.ceil(np.log2(2 * n - 1)))
+    spectrum = np.fft.rfft(x, n_fft)
+    acov = np.fft.irfft(spectrum * np.conj(spectrum), n_fft)[:n_lags + 1]
+    return acov / acov[0]
+
+def bootstrap_ci(values, statistic=_std, n_boot=1000, alpha=0.05, method='bca',
+                 seed=None, block_bytes=BOOTSTRAP_BLOCK_BYTES):
+    """Bootstrap confidence interval of a statistic (MATLAB ``bootci``).
+    
+    Resamples are drawn as an index matrix and evaluated along its rows, in
+    chunks whose resampled data stays below ``block_bytes``.
+    
+    Args:
+        values: Sample
+        statistic: Function of (array, axis) reducing along ``axis``
+        n_boot: Number of bootstrap resamples
+        alpha: 1 - confidence level
+        method: 'bca' (bias-corrected and accelerated, bootci's default) or 'percentile'
+        seed: Seed for the resampling
+        block_bytes: Upper bound on the memory of one chunk of resamples
+    
+    Returns:
+        ndarray: Lower and upper confidence bound
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    rng = np.random.default_rng(seed)
+    
+    chunk = max(1, int(block_bytes // max(1, n * 8)))
+    boot = np.empty(n_boot)
+    for start in range(0, n_boot, chunk):
+        stop = min(start + chunk, n_boot)
+        indices = rng.integers(0, n, size=(stop - start, n))
+        boot[start:stop] = statistic(values[indices], axis=1)
+    
+    if method == 'percentile':
+        return prctile(boot, [100 * alpha / 2, 100 * (1 - alpha / 2)])
+    if method != 'bca':
+        raise ValueError(f"Unknown bootstrap method: {method}")
+    
+    estimate = statistic(values, axis=None)
+    # Bias correction from the share of resamples below the estimate
+    z0 = stats.norm.ppf(np.mean(boot < estimate) + np.mean(boot == estimate) / 2)
+    
+    # Acceleration from jackknife (leave-one-out) estimates, in chunks of rows
+    jack = np.empty(n)
+    chunk = max(1, int(block_bytes // max(1, (n - 1) * 8)))
+    columns = np.arange(n - 1)
+    for start in range(0, n, chunk):
+        left_out = np.arange(start, min(start + chunk, n))
+        indices = columns[None, :] + (columns[None, :] >= left_out[:, None])
+        jack[start:start + len(left_out)] = statistic(values[indices], axis=1)
+    deviations = jack.mean() - jack
+    denominator = 6 * np.sum(deviations ** 2) ** 1.5
+    acceleration = np.sum(deviations ** 3) / denominator if denominator > 0 else 0.0
+    
+    z = stats.norm.ppf([alpha / 2, 1 - alpha / 2])
+    levels = stats.norm.cdf(z0 + (z0 + z) / (1 - acceleration * (z0 + z)))
+    return prctile(boot, 100 * levels)
+
+def _session_taps(path):
+    """ITIs and inter-player asynchronies of one human-human session."""
+    from ..data import MatlabSession
+    
+    stage2 = MatlabSession(path).stage2
+    timestamps = stage2['timestamp'].to_numpy(dtype=float)
+    p1_taps = timestamps[(stage2['player'] == '1').to_numpy(dtype=bool)]
+    p2_taps = timestamps[(stage2['player'] == '2').to_numpy(dtype=bool)]
+    min_len = min(len(p1_taps), len(p2_taps))
+    return {
+        'iti': np.diff(timestamps),
+        'asynchrony': np.abs(p1_taps[:min_len] - p2_taps[:min_len]),
+        'path': path
+    }
+
+def load_human_human_taps(data_dir, n_jobs=1):
+    """Per-session ITIs and asynchronies of all human-human sessions.
+    
+    Args:
+        data_dir: Data directory (e.g. data/raw or data/raw/human_human)
+        n_jobs: Worker processes for reading the sessions (None / -1: one per CPU core)
+    
+    Returns:
+        list: One dict per session with 'iti', 'asynchrony' and 'path', ordered by start time
+    """
+    from ..data import SessionCatalog
+    
+    with SessionCatalog(data_dir) as catalog:
+        catalog.update()
+        paths = [entry['path'] for entry in catalog.query(experiment_type='human_human')
+                 if "stage2_cooperative_taps.csv" in entry['files']]
+    
+    with make_executor(n_jobs) as executor:
+        futures = [executor.submit(_session_taps, path) for path in paths]
+        return [future.result() for future in futures]
+
+def estimate_parameters_from_human_data(data_dir, n_boot=1000, seed=None, n_jobs=1):
+    """Estimate model parameters from human-human Stage 2 taps.
+    
+    Args:
+        data_dir: Data directory (e.g. data/raw or data/raw/human_human)
+        n_boot: Bootstrap resamples for the SCALE confidence interval
+        seed: Seed for the bootstrap
+        n_jobs: Worker processes for reading the sessions (None / -1: one per CPU core)
+    
+    Returns:
+        dict: SPAN_mean, SPAN_ci, SCALE_mean, SCALE_ci, BAYES_N_HYPOTHESIS, BIB_L_MEMORY
+    """
+    sessions = load_human_human_taps(data_dir, n_jobs=n_jobs)
+    if not sessions:
+        raise ValueError(f"No human-human data found in {data_dir}")
+    
+    all_iti = np.concatenate([session['iti'] for session in sessions])
+    params = {}
+    
+    # SPAN: twice the median ITI (one cycle)
+    params['SPAN_mean'] = 2 * np.median(all_iti)
+    params['SPAN_ci'] = prctile(all_iti * 2, [2.5, 97.5])
+    
+    # SCALE: ITI standard deviation
+    params['SCALE_mean'] = _std(all_iti)
+    if len(all_iti) > 100:
+        params['SCALE_ci'] = bootstrap_ci(all_iti, _std, n_boot=n_boot, seed=seed)
+    else:
+        # Normal approximation for small samples
+        se = params['SCALE_mean'] / np.sqrt(len(all_iti))
+        params['SCALE_ci'] = np.array([params['SCALE_mean'] - 1.96 * se,
+                                       params['SCALE_mean'] + 1.96 * se])
+    
+    # BIB_L_MEMORY: first lag whose autocorrelation drops below 0.2
+    params['BIB_L_MEMORY'] = 1
+    if len(all_iti) > 20:
+        acf = autocorr(all_iti, min(10, len(all_iti) // 2))
+        below = np.flatnonzero(acf < 0.2)
+        if len(below) > 0:
+            params['BIB_L_MEMORY'] = max(1, int(below[0]))
+    
+    # BAYES_N_HYPOTHESIS: cover mean ± 3SD in 0.05 s steps
+    variation_range = 6 * params['SCALE_mean']
+    params['BAYES_N_HYPOTHESIS'] = max(10, int(np.ceil(variation_range / 0.05)))
+    
+    return params
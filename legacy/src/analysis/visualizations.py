@@ -111,7 +111,7 @@ def plot_scatter_with_regression(x, y, title, xlabel, ylabel, output_path, figsi
     plt.savefig(output_path, bbox_inches='tight', dpi=300)
     plt.close()
 
-def create_all_visualizations(data_dict, model_type, experiment_id, output_dir):
+def create_all_visualizations(data_dict, model_type, experiment_id, output_dir, n_jobs=1):
     """Create all standard visualizations for experiment data.
     
     Args:
@@ -119,6 +119,8 @@ def create_all_visualizations(data_dict, model_type, experiment_id, output_dir):
         model_type: Type of model used (sea, bayes, bib)
         experiment_id: Experiment ID (timestamp)
         output_dir: Directory to save plots
+        n_jobs: Worker processes for the recurrence network analyses of all
+            series and windows (None or -1 for all CPU cores)
     """
     import datetime
     
@@ -228,11 +230,9 @@ def create_all_visualizations(data_dict, model_type, experiment_id, output_dir):
     
     # Import recurrence network visualization functions
     from .network import (
-        create_recurrence_network, plot_recurrence_network, 
+        analyze_recurrence_networks, plot_recurrence_network, 
         plot_recurrence_matrix, plot_degree_distribution,
-        analyze_sliding_window, plot_sliding_window_metrics,
-        calculate_network_metrics, fit_degree_distribution,
-        interpret_network_results
+        plot_sliding_window_metrics, interpret_network_results
     )
     
     # Create recurrence network visualizations
@@ -243,24 +243,22 @@ def create_all_visualizations(data_dict, model_type, experiment_id, output_dir):
         'player_iti': data_dict.get('player_iti', [])
     }
     
+    # Run all network analyses up front; they are independent and run in
+    # parallel when n_jobs > 1. Printing and plotting stay in this process.
+    network_results, window_results_by_series = analyze_recurrence_networks(
+        time_series_data, min_length=20, window_min_length=50, window_size=30, step=5,
+        recurrence_rate=0.05,
+        embedding_dim=2,  # Use 2D embedding for better capturing dynamics
+        n_jobs=n_jobs
+    )
+    
     # For each time series, create recurrence network analysis visualizations
     for ts_name, ts_data in time_series_data.items():
         if len(ts_data) >= 20:  # Minimum length for meaningful analysis
             print(f"Creating recurrence network visualizations for {ts_name}...")
             
-            # Create recurrence network
-            adjacency_matrix, epsilon = create_recurrence_network(
-                ts_data, 
-                recurrence_rate=0.05,
-                embedding_dim=2  # Use 2D embedding for better capturing dynamics
-            )
-            
-            # Calculate network metrics
-            metrics = calculate_network_metrics(adjacency_matrix)
-            
-            # Add degree distribution fit information
-            fit_results = fit_degree_distribution(adjacency_matrix)
-            metrics.update(fit_results)
+            # Recurrence network, its metrics and degree distribution fit
+            adjacency_matrix, epsilon, metrics, fit_results = network_results[ts_name]
             
             # Get model-specific interpretation
             interpretation = interpret_network_results(metrics, model_type)
@@ -378,13 +376,7 @@ def create_all_visualizations(data_dict, model_type, experiment_id, output_dir):
             # Perform sliding window analysis for longer time series
             if len(ts_data) >= 50:
                 print(f"時間窓分析の実行中 - {ts_name}...")
-                window_results = analyze_sliding_window(
-                    ts_data,
-                    window_size=30,
-                    step=5,
-                    recurrence_rate=0.05,
-                    embedding_dim=2
-                )
+                window_results = window_results_by_series[ts_name]
                 
                 # Plot sliding window metrics
                 if not window_results.empty:
@@ -3,40 +3,157 @@ Configuration for cooperative tapping experiment.
 Centralized configuration parameters for the entire project.
 """
 import os
+import json
+import hashlib
+import functools
+import dataclasses
+from dataclasses import dataclass, field
 
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _path(**metadata):
+    """Field holding a path; derived from BASE_DIR when left as None."""
+    return field(default=None, metadata={'path': True, **metadata})
+
+def _setting(default):
+    """Field that changes how a session runs or reports, but not its results."""
+    return field(default=default, metadata={'setting': True})
+
+@dataclass(frozen=True)
 class Config:
-    """Configuration for cooperative tapping experiment."""
-    
-    def __init__(self):
-        """Initialize configuration with default values."""
-        # Basic timing parameters
-        self.SPAN = 2.0          # Base interval in seconds
-        self.STAGE1 = 10         # Number of taps in Stage 1 (metronome)
-        self.STAGE2 = 100        # Number of taps in Stage 2 (interaction)
-        self.BUFFER = 10         # Number of taps to exclude from analysis
-        self.SCALE = 0.1         # Variance scale for random timings
-        
-        # Paths for assets and data
-        self.BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        self.ASSETS_DIR = os.path.join(self.BASE_DIR, 'assets')
-        self.SOUND_DIR = os.path.join(self.ASSETS_DIR, 'sounds')
-        self.DATA_DIR = os.path.join(self.BASE_DIR, 'data')
-        self.RAW_DATA_DIR = os.path.join(self.DATA_DIR, 'raw')
-        self.PROCESSED_DATA_DIR = os.path.join(self.DATA_DIR, 'processed')
-        
-        # Sound file paths - 実際に存在するWAVファイルを使用
-        self.SOUND_STIM = os.path.join(self.SOUND_DIR, 'stim_beat.wav')
-        self.SOUND_PLAYER = os.path.join(self.SOUND_DIR, 'player_beat.wav')
-        
-        # Model parameters
-        self.BAYES_N_HYPOTHESIS = 20  # Number of hypotheses for Bayesian models
-        self.BIB_L_MEMORY = 1         # Memory length for BIB model
-        
-        # Create directories if they don't exist
-        self._create_directories()
-        
-    def _create_directories(self):
-        """Create necessary directories if they don't exist."""
+    """Configuration for cooperative tapping experiment.
+
+    Immutable and hashable: derive changed configurations with replace(),
+    build them from dicts, files or CLI arguments with from_dict(),
+    from_file() and from_args(). Creating a Config does no filesystem I/O;
+    call create_directories() where the data directories are needed.
+    """
+
+    # Basic timing parameters
+    SPAN: float = 2.0          # Base interval in seconds
+    STAGE1: int = 10           # Number of taps in Stage 1 (metronome)
+    STAGE2: int = 100          # Number of taps in Stage 2 (interaction)
+    BUFFER: int = 10           # Number of taps to exclude from analysis
+    SCALE: float = 0.1         # Variance scale for random timings
+    TAP_DELAY: float = 0.1     # Fixed delay after a Stage 2 player tap before the model interval
+
+    # Model parameters
+    BAYES_N_HYPOTHESIS: int = 20  # Number of hypotheses for Bayesian models
+    BIB_L_MEMORY: int = 1         # Memory length for BIB model
+    LOOKAHEAD_INFERENCE: bool = _setting(False)  # Precompute the next inference while waiting for the tap
+
+    # Online metrics during Stage 2
+    ONLINE_WINDOW: int = _setting(10)           # Turns in the rolling statistics
+    ONLINE_REPORT_INTERVAL: int = _setting(10)  # Print the statistics every N turns (0: never)
+
+    # MATLAB bridge settings
+    SHOW_TAP: bool = _setting(False)
+    WRITE_OUTPUT: bool = _setting(True)
+
+    # Paths for assets and data
+    BASE_DIR: str = field(default=_BASE_DIR, metadata={'path': True})
+    ASSETS_DIR: str = _path(parent='BASE_DIR', name='assets')
+    SOUND_DIR: str = _path(parent='ASSETS_DIR', name='sounds')
+    DATA_DIR: str = _path(parent='BASE_DIR', name='data')
+    RAW_DATA_DIR: str = _path(parent='DATA_DIR', name='raw')
+    PROCESSED_DATA_DIR: str = _path(parent='DATA_DIR', name='processed')
+    LOG_DIR: str = _path(parent='DATA_DIR', name='logs')
+
+    # Sound file paths - 実際に存在するWAVファイルを使用
+    SOUND_STIM: str = _path(parent='SOUND_DIR', name='stim_beat.wav')
+    SOUND_PLAYER: str = _path(parent='SOUND_DIR', name='player_beat.wav')
+
+    def __post_init__(self):
+        """Coerce parameter types and fill in the derived paths."""
+        for f in dataclasses.fields(self):
+            value = getattr(self, f.name)
+            if f.metadata.get('path'):
+                if value is None:
+                    value = os.path.join(getattr(self, f.metadata['parent']), f.metadata['name'])
+                object.__setattr__(self, f.name, os.fspath(value))
+            elif f.type is bool:
+                object.__setattr__(self, f.name, _as_bool(value))
+            elif f.type in (int, float):
+                object.__setattr__(self, f.name, f.type(value))
+
+    @classmethod
+    def from_dict(cls, values):
+        """Configuration with the given fields changed from the defaults.
+
+        Unknown keys raise a TypeError. Results are cached, so building the
+        same configuration many times (e.g. in worker processes) is cheap.
+        All fields hold scalars or paths, so unhashable values (e.g. lists
+        from a JSON file) raise a TypeError naming the field.
+
+        Args:
+            values: Mapping of field name -> value
+        """
+        for name, value in values.items():
+            try:
+                hash(value)
+            except TypeError:
+                raise TypeError(f"Config field {name} got an unhashable "
+                                f"{type(value).__name__}: {value!r}") from None
+        return _cached_config(cls, tuple(sorted(values.items())))
+
+    @classmethod
+    def from_file(cls, path):
+        """Configuration from a JSON file of field name -> value."""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    @classmethod
+    def from_args(cls, args, base=None):
+        """Configuration from parsed command-line arguments.
+
+        Every argument named like a field (lower case, e.g. ``--stage2``)
+        that is not None overrides that field.
+
+        Args:
+            args: argparse.Namespace
+            base: Configuration to start from (default: the defaults)
+        """
+        changes = {}
+        for f in dataclasses.fields(cls):
+            value = getattr(args, f.name.lower(), None)
+            if value is not None:
+                changes[f.name] = value
+        return (base if base is not None else cls()).replace(**changes)
+
+    def replace(self, **changes):
+        """Copy with some fields changed; derived paths follow a changed parent directory."""
+        if not changes:
+            return self
+        values = {f.name: getattr(self, f.name) for f in dataclasses.fields(self)}
+        values.update(changes)
+        for f in dataclasses.fields(self):
+            parent = f.metadata.get('parent')
+            # Paths still at their derived default are derived again from the new parent
+            if parent and f.name not in changes and \
+                    getattr(self, f.name) == os.path.join(getattr(self, parent), f.metadata['name']):
+                values[f.name] = None
+        return type(self)(**values)
+
+    def to_dict(self):
+        """All fields as a plain dict."""
+        return dataclasses.asdict(self)
+
+    def parameters(self):
+        """Fields that affect simulation and analysis results (no paths or run settings)."""
+        return {f.name: getattr(self, f.name) for f in dataclasses.fields(self)
+                if not (f.metadata.get('path') or f.metadata.get('setting'))}
+
+    def parameter_hash(self):
+        """Stable hash of parameters(), usable as a cache key across processes."""
+        payload = json.dumps(self.parameters(), sort_keys=True)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def create_directories(self):
+        """Create the asset and data directories if they don't exist.
+
+        Returns:
+            Config: self, for chaining
+        """
         directories = [
             self.ASSETS_DIR,
             self.SOUND_DIR,
@@ -44,10 +161,11 @@ class Config:
             self.RAW_DATA_DIR,
             self.PROCESSED_DATA_DIR
         ]
-        
+
         for directory in directories:
             os.makedirs(directory, exist_ok=True)
-            
+        return self
+
     def __str__(self):
         """String representation of configuration."""
         return (
@@ -62,4 +180,14 @@ class Config:
             f"DATA_DIR: {self.DATA_DIR}\n"
             f"SOUND_STIM: {self.SOUND_STIM}\n"
             f"SOUND_PLAYER: {self.SOUND_PLAYER}\n"
-        )
\ No newline at end of file
+        )
+
+def _as_bool(value):
+    """Boolean from a bool, number or string such as 'false' / '0'."""
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
+    return bool(value)
+
+@functools.lru_cache(maxsize=1024)
+def _cached_config(cls, items):
+    return cls(**dict(items))
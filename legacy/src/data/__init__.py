@@ -0,0 +1,43 @@
+"""
+Data storage and loading for cooperative tapping sessions.
+"""
+from .session_store import (
+    SESSION_FILE, SERIES, write_session, read_session, find_sessions,
+    load_sessions, export_session_csv
+)
+from .catalog import CATALOG_FILE, SessionCatalog
+from .journal import (
+    JOURNAL_FILE, RECORD_DTYPE, EVENT_STIM, EVENT_PLAYER, EVENT_STAGE, EVENT_END,
+    TapJournal, read_journal, find_journals, recover_session
+)
+import importlib
+
+# The MATLAB reader needs pandas; it is imported on first access of one of its names
+_LAZY = {
+    'matlab_loader': (
+        'STAGE1_COLUMNS', 'STAGE2_COLUMNS', 'DEBUG_COLUMNS', 'MatlabSession',
+        'load_matlab_sessions', 'concat_stage2'
+    ),
+}
+_LAZY_NAMES = {name: module for module, names in _LAZY.items() for name in names}
+
+def __getattr__(name):
+    module = _LAZY_NAMES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_NAMES))
+
+__all__ = [
+    'SESSION_FILE', 'SERIES', 'write_session', 'read_session', 'find_sessions',
+    'load_sessions', 'export_session_csv',
+    'CATALOG_FILE', 'SessionCatalog',
+    'JOURNAL_FILE', 'RECORD_DTYPE', 'EVENT_STIM', 'EVENT_PLAYER', 'EVENT_STAGE', 'EVENT_END',
+    'TapJournal', 'read_journal', 'find_journals', 'recover_session',
+    'STAGE1_COLUMNS', 'STAGE2_COLUMNS', 'DEBUG_COLUMNS', 'MatlabSession', 'load_matlab_sessions',
+    'concat_stage2'
+]
\ No newline at end of file
@@ -0,0 +1,386 @@
+"""
+Persistent catalog of recorded sessions.
+The catalog is a SQLite database with one row per session directory below a
+data root. It covers the Python runner layout
+(``YYYYMMDD_<user>/<model>_<YYYYmmddHHMM>/``) and the MATLAB DataRecorder
+layout (``<experiment_type>/YYYYMMDD/<participant>_<model>_<YYYYmmdd_HHMMSS>/``).
+Updates only re-read session directories that are new or have changed since
+the last update, so lookups never need a filesystem scan. The modification
+time of every directory is recorded as well: directories whose entries have
+not changed since the last update are neither listed again nor are the files
+of their sessions stat'ed, so an update of an unchanged tree costs one stat
+per directory.
+"""
+import os
+import re
+import json
+import sqlite3
+import hashlib
+import datetime
+
+from .session_store import SESSION_FILE, read_session
+
+# File name of the catalog database inside the data root
+CATALOG_FILE = "session_catalog.sqlite"
+
+# Files marking a directory as a session of the Python runner
+_RUNNER_FILES = (SESSION_FILE, "raw_taps.csv", "processed_taps.csv")
+
+# Files marking a directory as a session of the MATLAB DataRecorder
+_MATLAB_FILES = (
+    "experiment_data.mat", "stage1_synchronous_taps.csv", "stage1_metronome.csv",
+    "stage2_alternating_taps.csv", "stage2_cooperative_taps.csv"
+)
+
+_RUNNER_PARENT = re.compile(r'^(?P<date>\d{8})_(?P<participant>.+)$')
+_RUNNER_DIR = re.compile(r'^(?P<model>[^_]+)_(?P<timestamp>\d{12})$')
+_MATLAB_HH_DIR = re.compile(
+    r'^(?P<participant>.+?)_(?P<partner>.+)_human_human_(?P<timestamp>\d{8}_\d{6})$'
+)
+# DataRecorder uses YYYYmmdd_HHMMSS, the pre-OOP MATLAB runner YYYYmmddHHMM
+_MATLAB_HC_DIR = re.compile(
+    r'^(?P<participant>.+)_(?P<model>[^_]+)_(?P<timestamp>\d{8}_\d{6}|\d{12})$'
+)
+
+_COLUMNS = (
+    'path', 'layout', 'experiment_type', 'participant', 'partner', 'model',
+    'experiment_id', 'started_at', 'n_taps', 'files', 'content_hash', 'signature'
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    path TEXT PRIMARY KEY,
+    layout TEXT NOT NULL,
+    experiment_type TEXT NOT NULL,
+    participant TEXT,
+    partner TEXT,
+    model TEXT,
+    experiment_id TEXT,
+    started_at TEXT,
+    n_taps INTEGER,
+    files TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    signature TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_lookup ON sessions (model, participant, started_at);
+CREATE INDEX IF NOT EXISTS sessions_started ON sessions (started_at);
+CREATE TABLE IF NOT EXISTS directories (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    is_session INTEGER NOT NULL,
+    subdirs TEXT NOT NULL
+);
+"""
+
+
+def _count_rows(path):
+    """Number of data rows in a CSV file with one header line."""
+    with open(path, 'rb') as f:
+        return max(sum(1 for line in f if line.strip()) - 1, 0)
+
+
+def _content_hash(session_dir, files):
+    """SHA-256 over the names and contents of a session's files."""
+    digest = hashlib.sha256()
+    for name in files:
+        digest.update(name.encode('utf-8'))
+        with open(os.path.join(session_dir, name), 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _parse_runner(session_dir, files):
+    """Catalog fields of a Python runner session."""
+    parent = _RUNNER_PARENT.match(os.path.basename(os.path.dirname(session_dir)))
+    name = _RUNNER_DIR.match(os.path.basename(session_dir))
+    entry = {
+        'layout': 'runner',
+        'experiment_type': 'human_computer',
+        'participant': parent.group('participant') if parent else None,
+        'model': name.group('model').lower() if name else None,
+        'experiment_id': name.group('timestamp') if name else None,
+        'started_at': None,
+        'n_taps': None
+    }
+    if name:
+        started = datetime.datetime.strptime(name.group('timestamp'), '%Y%m%d%H%M')
+        entry['started_at'] = started.isoformat(sep=' ')
+    
+    if SESSION_FILE in files:
+        metadata = read_session(os.path.join(session_dir, SESSION_FILE), series=())['metadata']
+        lengths = metadata.get('lengths', {})
+        entry['n_taps'] = (lengths.get('full_stim_tap_length', 0)
+                           + lengths.get('full_player_tap_length', 0))
+    elif "raw_taps.csv" in files:
+        entry['n_taps'] = 2 * _count_rows(os.path.join(session_dir, "raw_taps.csv"))
+    return entry
+
+
+def _parse_matlab(session_dir, files):
+    """Catalog fields of a MATLAB DataRecorder session."""
+    dir_name = os.path.basename(session_dir)
+    experiment_type = os.path.basename(os.path.dirname(os.path.dirname(session_dir)))
+    
+    match = _MATLAB_HH_DIR.match(dir_name)
+    if match:
+        experiment_type = 'human_human'
+        model = None
+    else:
+        match = _MATLAB_HC_DIR.match(dir_name)
+        if experiment_type not in ('human_computer', 'human_human'):
+            experiment_type = 'human_computer'
+        model = match.group('model').lower() if match else None
+    
+    entry = {
+        'layout': 'matlab',
+        'experiment_type': experiment_type,
+        'participant': match.group('participant') if match else None,
+        'partner': match.groupdict().get('partner') if match else None,
+        'model': model,
+        'experiment_id': match.group('timestamp') if match else None,
+        'started_at': None,
+        'n_taps': sum(_count_rows(os.path.join(session_dir, name))
+                      for name in files if name.startswith('stage') and name.endswith('.csv'))
+    }
+    if match:
+        timestamp = match.group('timestamp')
+        started = datetime.datetime.strptime(
+            timestamp, '%Y%m%d_%H%M%S' if '_' in timestamp else '%Y%m%d%H%M'
+        )
+        entry['started_at'] = started.isoformat(sep=' ')
+    return entry
+
+
+def _session_layout(files):
+    """'runner', 'matlab' or None for a directory with the given file names."""
+    names = set(files)
+    # MATLAB sessions of the pre-OOP runner also contain processed_taps.csv
+    if names.intersection(_MATLAB_FILES):
+        return 'matlab'
+    if names.intersection(_RUNNER_FILES):
+        return 'runner'
+    return None
+
+
+class SessionCatalog:
+    """SQLite index of the sessions below a data root."""
+    
+    def __init__(self, root, db_path=None):
+        """Open (or create) the catalog of a data root.
+        
+        Args:
+            root: Data directory such as Config.RAW_DATA_DIR
+            db_path: Catalog database (default: CATALOG_FILE inside ``root``)
+        """
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+        self.db_path = db_path if db_path is not None else os.path.join(self.root, CATALOG_FILE)
+        self._conn = sqlite3.connect(self.db_path)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(_SCHEMA)
+    
+    def close(self):
+        """Close the database connection."""
+        self._conn.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+    
+    def _scan(self, full=False):
+        """Walk the root, listing only directories whose modification time changed.
+        
+        Args:
+            full: List every directory regardless of its recorded modification time
+        
+        Returns:
+            tuple: (absolute path -> file names of the session directories
+                that were listed, relative paths of all session directories)
+        """
+        known = {row['path']: row for row in self._conn.execute("SELECT * FROM directories")}
+        listed = {}
+        sessions = set()
+        visited = set()
+        records = []
+        
+        pending = [self.root]
+        while pending:
+            dirpath = pending.pop()
+            rel = os.path.relpath(dirpath, self.root)
+            try:
+                mtime_ns = os.stat(dirpath).st_mtime_ns
+            except FileNotFoundError:
+                continue
+            visited.add(rel)
+            
+            row = known.get(rel)
+            if not full and row is not None and row['mtime_ns'] == mtime_ns:
+                # Entries unchanged: reuse what the last update found
+                if row['is_session']:
+                    sessions.add(rel)
+                else:
+                    pending.extend(os.path.join(dirpath, name)
+                                   for name in json.loads(row['subdirs']))
+                continue
+            
+            subdirs, filenames = [], []
+            with os.scandir(dirpath) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        if not entry.is_symlink():
+                            subdirs.append(entry.name)
+                    else:
+                        filenames.append(entry.name)
+            is_session = _session_layout(filenames) is not None
+            if is_session:
+                listed[dirpath] = sorted(filenames)
+                sessions.add(rel)
+                subdirs = []
+            else:
+                pending.extend(os.path.join(dirpath, name) for name in subdirs)
+            records.append((rel, mtime_ns, int(is_session), json.dumps(sorted(subdirs))))
+        
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO directories (path, mtime_ns, is_session, subdirs) "
+                "VALUES (?, ?, ?, ?)", records
+            )
+            self._conn.executemany("DELETE FROM directories WHERE path = ?",
+                                   [(path,) for path in known.keys() - visited])
+        return listed, sessions
+    
+    def add(self, session_dir, files=None):
+        """Add or refresh a single session directory.
+        
+        The directory is only re-read when its file names, sizes or
+        modification times differ from the catalog entry.
+        
+        Args:
+            session_dir: Session directory below the root
+            files: File names in the directory (default: list it)
+        
+        Returns:
+            bool: True if the entry was written, False if it was up to date
+        """
+        session_dir = os.path.abspath(session_dir)
+        if files is None:
+            files = sorted(f for f in os.listdir(session_dir)
+                           if os.path.isfile(os.path.join(session_dir, f)))
+        layout = _session_layout(files)
+        if layout is None:
+            raise ValueError(f"Not a session directory: {session_dir}")
+        
+        path = os.path.relpath(session_dir, self.root)
+        stats = [os.stat(os.path.join(session_dir, name)) for name in files]
+        signature = json.dumps(
+            [(name, st.st_size, st.st_mtime_ns) for name, st in zip(files, stats)]
+        )
+        row = self._conn.execute(
+            "SELECT signature FROM sessions WHERE path = ?", (path,)
+        ).fetchone()
+        if row is not None and row['signature'] == signature:
+            return False
+        
+        parse = _parse_runner if layout == 'runner' else _parse_matlab
+        entry = {'partner': None}
+        entry.update(parse(session_dir, files))
+        entry.update({
+            'path': path,
+            'files': json.dumps(files),
+            'content_hash': _content_hash(session_dir, files),
+            'signature': signature
+        })
+        with self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO sessions ({', '.join(_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(_COLUMNS))})",
+                [entry[column] for column in _COLUMNS]
+            )
+        return True
+    
+    def update(self, full=False):
+        """Bring the catalog up to date with the data root.
+        
+        New and changed session directories are (re-)read, entries of removed
+        directories are dropped; unchanged sessions are not opened.
+        
+        Only directories whose entries changed since the last update are
+        looked into, so a file rewritten in place (rather than created,
+        replaced or deleted) is not noticed; refresh such a session with
+        add() or pass ``full=True``.
+        
+        Args:
+            full: Check the files of every session directory
+        
+        Returns:
+            dict: Numbers of 'added or changed' and 'removed' sessions
+        """
+        listed, present = self._scan(full)
+        changed = sum(self.add(session_dir, files) for session_dir, files in listed.items())
+        
+        known = {row['path'] for row in self._conn.execute("SELECT path FROM sessions")}
+        removed = sorted(known - present)
+        with self._conn:
+            self._conn.executemany("DELETE FROM sessions WHERE path = ?", [(p,) for p in removed])
+        return {'changed': changed, 'removed': len(removed)}
+    
+    def query(self, participant=None, model=None, experiment_type=None, layout=None,
+              experiment_id=None, since=None, until=None, newest_first=False):
+        """Look up sessions in the catalog.
+        
+        Args:
+            participant: Participant ID (matches either participant of human-human sessions)
+            model: Model name ('sea', 'bayes', 'bib'), case-insensitive
+            experiment_type: 'human_computer' or 'human_human'
+            layout: 'runner' or 'matlab'
+            experiment_id: Timestamp part of the session directory name
+            since: Earliest start time, inclusive (ISO date or datetime string)
+            until: Latest start time, exclusive (ISO date or datetime string)
+            newest_first: Sort by descending start time
+        
+        Returns:
+            list: One dict per session with an absolute 'path' and 'files' as a list
+        """
+        clauses, params = [], []
+        if participant is not None:
+            clauses.append("(participant = ? OR partner = ?)")
+            params += [participant, participant]
+        if model is not None:
+            clauses.append("model = ?")
+            params.append(model.lower())
+        for column, value in (('experiment_type', experiment_type), ('layout', layout),
+                              ('experiment_id', experiment_id)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("started_at >= ?")
+            params.append(str(since))
+        if until is not None:
+            clauses.append("started_at < ?")
+            params.append(str(until))
+        
+        sql = "SELECT * FROM sessions"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY started_at {'DESC' if newest_first else 'ASC'}, path"
+        
+        sessions = []
+        for row in self._conn.execute(sql, params):
+            entry = {column: row[column] for column in _COLUMNS
+                     if column != 'signature'}
+            entry['path'] = os.path.join(self.root, entry['path'])
+            entry['files'] = json.loads(entry['files'])
+            sessions.append(entry)
+        return sessions
+    
+    def latest(self, **filters):
+        """Most recently started session matching ``filters`` (see query), or None."""
+        sessions = self.query(newest_first=True, **filters)
+        return sessions[0] if sessions else None
@@ -0,0 +1,231 @@
+"""
+Append-only tap journal for crash-safe sessions.
+While a session runs, every tap is appended to a journal of fixed-size
+binary records next to where the session archive will be written. Records
+are handed to a background writer thread, which writes them in batches and
+fsyncs, so the timing loop never waits for the disk. If the session ends
+without its archive (exception, Escape, power loss), recover_session
+rebuilds the archive from the journal.
+"""
+import os
+import json
+import glob
+import queue
+import time
+import struct
+import threading
+
+import numpy as np
+
+from ..analysis.metrics import alternating_series
+from .session_store import SESSION_FILE, write_session
+
+JOURNAL_FILE = "session.journal"
+
+# File header: magic, then the metadata as length-prefixed UTF-8 JSON
+_MAGIC = b"CTJ1"
+_HEADER_LENGTH = struct.Struct('<I')
+
+# One record per event: time, event type, turn (stage number for EVENT_STAGE), SE, model output
+_RECORD = struct.Struct('<dBIdd')
+RECORD_DTYPE = np.dtype([
+    ('time', '<f8'), ('event', 'u1'), ('turn', '<u4'), ('se', '<f8'), ('model_output', '<f8')
+])
+
+# Event types
+EVENT_STIM = 1
+EVENT_PLAYER = 2
+EVENT_STAGE = 3
+EVENT_END = 4
+
+
+class TapJournal:
+    """Write-ahead journal of one session.
+
+    append() only enqueues the record; a background thread packs queued
+    records, writes them and fsyncs every ``batch_size`` records or
+    ``flush_interval`` seconds, whichever comes first.
+    """
+
+    def __init__(self, path, metadata=None, batch_size=32, flush_interval=0.5):
+        """Create the journal file and start the writer thread.
+
+        Args:
+            path: Journal file (an existing file is replaced)
+            metadata: JSON-serialisable session information stored in the header
+            batch_size: Records per write/fsync
+            flush_interval: Longest time (seconds) a record stays unwritten
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.records_written = 0
+        self._error = None
+
+        header = json.dumps(metadata or {}).encode('utf-8')
+        self._file = open(path, 'wb')
+        self._file.write(_MAGIC + _HEADER_LENGTH.pack(len(header)) + header)
+        self._sync()
+
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._writer, name="TapJournalWriter", daemon=True)
+        self._thread.start()
+
+    def append(self, event, event_time, turn=0, se=np.nan, model_output=np.nan):
+        """Queue one record (does not block on I/O).
+
+        Args:
+            event: EVENT_STIM, EVENT_PLAYER, EVENT_STAGE or EVENT_END
+            event_time: Event time on the session clock (seconds)
+            turn: Turn number (stage number for EVENT_STAGE)
+            se: Synchronization error passed to the model, if any
+            model_output: Interval returned by the model, if any
+        """
+        self._queue.put((event_time, event, turn, se, model_output))
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _writer(self):
+        """Drain the queue in batches until close() enqueues None."""
+        batch = bytearray(self.batch_size * _RECORD.size)
+        pending = 0
+        closing = False
+        deadline = time.monotonic() + self.flush_interval
+        while not closing:
+            try:
+                record = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                record = ()
+            if record is None:
+                closing = True
+            elif record:
+                _RECORD.pack_into(batch, pending * _RECORD.size, *record)
+                pending += 1
+            if closing or pending == self.batch_size or time.monotonic() >= deadline:
+                if pending:
+                    try:
+                        self._file.write(memoryview(batch)[:pending * _RECORD.size])
+                        self._sync()
+                        self.records_written += pending
+                    except OSError as e:
+                        self._error = e
+                    pending = 0
+                deadline = time.monotonic() + self.flush_interval
+
+    def close(self, completed=True, end_time=np.nan):
+        """Write an end record, flush everything and stop the writer thread.
+
+        Args:
+            completed: Whether the session finished normally
+            end_time: Time of the end of the session
+        """
+        if self._file.closed:
+            return
+        self.append(EVENT_END, end_time, turn=int(completed))
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(completed=exc_type is None)
+
+
+def read_journal(path):
+    """Read a journal, ignoring a partially written last record.
+
+    Args:
+        path: Journal file
+
+    Returns:
+        tuple: (metadata dict, records as a RECORD_DTYPE array)
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:len(_MAGIC)] != _MAGIC:
+        raise ValueError(f"Not a tap journal: {path}")
+    offset = len(_MAGIC)
+    (length,) = _HEADER_LENGTH.unpack_from(data, offset)
+    offset += _HEADER_LENGTH.size
+    metadata = json.loads(data[offset:offset + length].decode('utf-8'))
+    offset += length
+    n_records = (len(data) - offset) // RECORD_DTYPE.itemsize
+    records = np.frombuffer(data, dtype=RECORD_DTYPE, count=n_records, offset=offset)
+    return metadata, records
+
+
+def find_journals(root, unrecovered=True):
+    """Journals below a data directory.
+
+    Args:
+        root: Directory such as Config.RAW_DATA_DIR
+        unrecovered: Only journals without a session archive next to them
+
+    Returns:
+        list: Journal paths, sorted
+    """
+    paths = sorted(glob.glob(os.path.join(root, '**', JOURNAL_FILE), recursive=True))
+    if unrecovered:
+        paths = [p for p in paths if not os.path.exists(os.path.join(os.path.dirname(p), SESSION_FILE))]
+    return paths
+
+
+def _stages(records):
+    """Stage number of every record, from the EVENT_STAGE markers."""
+    markers = np.where(records['event'] == EVENT_STAGE, records['turn'], 0).astype(int)
+    return np.maximum.accumulate(markers) if len(markers) else markers
+
+
+def recover_session(path, experiment_dir=None):
+    """Rebuild the session archive of an interrupted session from its journal.
+
+    Derived series follow ExperimentRunner.analyze_data. Model hypotheses are
+    not journaled, so the recovered archive has no hypothesis matrix.
+
+    Args:
+        path: Journal file
+        experiment_dir: Where to write the archive (default: the journal's directory)
+
+    Returns:
+        str: Path of the written session archive
+    """
+    metadata, records = read_journal(path)
+    stages = _stages(records)
+    is_stim = records['event'] == EVENT_STIM
+    is_player = records['event'] == EVENT_PLAYER
+    end = records[records['event'] == EVENT_END]
+
+    full_stim = records['time'][is_stim]
+    full_player = records['time'][is_player]
+    # Stage 2 SEs are journaled with the player tap they were computed from
+    stim_se = records['se'][is_player & (stages == 2) & ~np.isnan(records['se'])]
+
+    n = min(len(full_stim), len(full_player))
+    buffer = int(metadata.get('config', {}).get('BUFFER', 0))
+    stim = full_stim[:n][buffer:] if n > buffer else full_stim[:n]
+    player = full_player[:n][buffer:] if n > buffer else full_player[:n]
+    stim_se = stim_se[1:]
+
+    series = {
+        'full_stim_tap': full_stim,
+        'full_player_tap': full_player,
+        'stim_tap': stim,
+        'player_tap': player,
+        'stim_se': stim_se,
+        **alternating_series(stim, player, stim_se)
+    }
+    metadata = dict(metadata)
+    metadata['lengths'] = {f"{name}_length": len(values) for name, values in series.items()}
+    metadata['lengths']['hypo_length'] = 0
+    metadata['recovered_from_journal'] = True
+    metadata['completed'] = bool(len(end) and end['turn'][-1])
+
+    if experiment_dir is None:
+        experiment_dir = os.path.dirname(os.path.abspath(path))
+    return write_session(experiment_dir, series, metadata=metadata)
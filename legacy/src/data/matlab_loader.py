@@ -0,0 +1,272 @@
+"""
+Reader for sessions recorded by the MATLAB experiment system.
+Parses the CSV files written by ``core/data/DataRecorder.m`` (human-computer
+and human-human) and by the pre-OOP MATLAB runner into one session structure
+with normalised, typed tap tables, and derives the SE/ITI series used by
+``src.analysis``.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from ..analysis.metrics import iti_array, se_array, variation_array
+from .catalog import SessionCatalog, _parse_matlab
+
+try:
+    import pyarrow  # noqa: F401
+    _CSV_ENGINE = 'pyarrow'
+except ImportError:
+    _CSV_ENGINE = 'c'
+
+# Stage 1 / Stage 2 file names per experiment type
+_STAGE1_FILES = ("stage1_synchronous_taps.csv", "stage1_metronome.csv")
+_STAGE2_FILES = ("stage2_alternating_taps.csv", "stage2_cooperative_taps.csv")
+_DEBUG_FILE = "debug_log.csv"
+
+# Normalised columns and their dtypes
+STAGE1_COLUMNS = {'timestamp': 'float64', 'source': 'string', 'beat': 'Int64'}
+STAGE2_COLUMNS = {
+    'player': 'string', 'timestamp': 'float64', 'turn': 'Int64',
+    'se': 'float64', 'predicted_interval': 'float64'
+}
+DEBUG_COLUMNS = {
+    'turn': 'Int64', 'se': 'float64', 'model_output': 'float64', 'timer_reset_time': 'float64'
+}
+
+# Column names used by the different recorders (lower case) -> normalised name
+_ALIASES = {
+    'timestamp': 'timestamp', 'taptime': 'timestamp', 'tap_time': 'timestamp',
+    'sound_type': 'source', 'beat_number': 'beat', 'beatnumber': 'beat',
+    'player_id': 'player', 'playerid': 'player', 'player': 'player',
+    'turn': 'turn', 'cycle': 'turn', 'cyclenumber': 'turn', 'cycle_number': 'turn',
+    'se': 'se', 'predicted_interval': 'predicted_interval',
+    'model_output': 'model_output', 'timer_reset_time': 'timer_reset_time',
+}
+
+# Roles in the two-column (stim_tap, player_tap) layout of the pre-OOP runner
+_WIDE_COLUMNS = ('stim_tap', 'player_tap')
+
+
+def _read_header(path):
+    """Column names of a CSV file."""
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        return [name.strip() for name in f.readline().strip().split(',')]
+
+
+def _read_table(path, columns):
+    """Read a recorder CSV into a DataFrame with normalised names and dtypes.
+    
+    Columns that the recorder did not write are added as all-missing columns,
+    unknown columns are dropped.
+    """
+    header = _read_header(path)
+    lower = [name.lower() for name in header]
+    
+    if all(name in lower for name in _WIDE_COLUMNS):
+        wide = pd.read_csv(path, engine=_CSV_ENGINE,
+                           dtype={header[lower.index(name)]: 'float64' for name in _WIDE_COLUMNS})
+        return _wide_to_long(wide, header, lower, columns)
+    
+    rename = {}
+    for name, key in zip(header, lower):
+        target = _ALIASES.get(key)
+        if target == 'player' and 'source' in columns:
+            # Stage 1 of human-human sessions: player number stands in for the sound type
+            target = 'source'
+        if target in columns and target not in rename.values():
+            rename[name] = target
+    
+    dtype = {}
+    for name, target in rename.items():
+        # MATLAB writes missing values as empty fields, so integers are read as floats
+        dtype[name] = 'float64' if columns[target] == 'Int64' else columns[target]
+    table = pd.read_csv(path, engine=_CSV_ENGINE, usecols=list(rename), dtype=dtype)
+    table = table.rename(columns=rename)
+    return _normalise(table, columns)
+
+
+def _wide_to_long(wide, header, lower, columns):
+    """Interleave (stim_tap, player_tap) rows into one tap per row."""
+    stim = wide[header[lower.index('stim_tap')]].to_numpy()
+    player = wide[header[lower.index('player_tap')]].to_numpy()
+    n = len(wide)
+    role = 'player' if 'player' in columns else 'source'
+    table = pd.DataFrame({
+        'timestamp': np.column_stack([stim, player]).ravel(),
+        role: np.tile(['stim', 'player'], n),
+    })
+    if 'turn' in columns:
+        table['turn'] = np.repeat(np.arange(1, n + 1), 2)
+    elif 'beat' in columns:
+        table['beat'] = np.repeat(np.arange(1, n + 1), 2)
+    table = table[table['timestamp'].notna()].reset_index(drop=True)
+    return _normalise(table, columns)
+
+
+def _normalise(table, columns):
+    """Add missing columns and cast to the normalised dtypes."""
+    for name, dtype in columns.items():
+        if name not in table:
+            missing = np.nan if dtype == 'float64' else pd.NA
+            table[name] = pd.Series(missing, index=table.index, dtype=dtype)
+        elif dtype == 'Int64':
+            table[name] = table[name].round().astype('Int64')
+        elif dtype == 'string':
+            values = table[name].astype('string').str.strip()
+            # Numeric IDs come back as '1.0' from float-typed reads
+            table[name] = values.str.replace(r'\.0$', '', regex=True)
+        else:
+            table[name] = table[name].astype(dtype)
+    return table[list(columns)]
+
+
+class MatlabSession:
+    """One session directory written by the MATLAB experiment system.
+    
+    Tables are read from disk on first access and cached.
+    
+    Attributes:
+        path: Session directory
+        experiment_type: 'human_computer' or 'human_human'
+        participants: Participant IDs (two for human-human sessions)
+        model: Model name of human-computer sessions, otherwise None
+        experiment_id: Timestamp part of the directory name
+        started_at: Start time as 'YYYY-MM-DD HH:MM:SS', or None
+    """
+    
+    def __init__(self, path):
+        """Describe a session directory without reading its tables.
+        
+        Args:
+            path: Session directory
+        """
+        self.path = os.path.abspath(path)
+        self.files = sorted(os.listdir(self.path))
+        info = _parse_matlab(self.path, [])
+        self.experiment_type = info['experiment_type']
+        self.participants = tuple(p for p in (info['participant'], info['partner']) if p)
+        self.model = info['model']
+        self.experiment_id = info['experiment_id']
+        self.started_at = info['started_at']
+        self._tables = {}
+    
+    def __repr__(self):
+        return (f"MatlabSession({self.experiment_type}, participants={self.participants}, "
+                f"model={self.model}, experiment_id={self.experiment_id})")
+    
+    def _table(self, key, filenames, columns):
+        """Read (once) the first existing file of ``filenames``."""
+        if key not in self._tables:
+            table = None
+            for filename in filenames:
+                if filename in self.files:
+                    table = _read_table(os.path.join(self.path, filename), columns)
+                    break
+            if table is None:
+                table = _normalise(pd.DataFrame(), columns)
+            self._tables[key] = table
+        return self._tables[key]
+    
+    @property
+    def stage1(self):
+        """Stage 1 events: timestamp, source ('stim'/'player' or player number), beat."""
+        return self._table('stage1', _STAGE1_FILES, STAGE1_COLUMNS)
+    
+    @property
+    def stage2(self):
+        """Stage 2 taps: player, timestamp, turn (cycle), se, predicted_interval."""
+        return self._table('stage2', _STAGE2_FILES, STAGE2_COLUMNS)
+    
+    @property
+    def debug_log(self):
+        """Per-turn debug log of the model (empty if the session has none)."""
+        return self._table('debug', (_DEBUG_FILE,), DEBUG_COLUMNS)
+    
+    def roles(self):
+        """Stage 2 player labels taking the stimulus and the player role.
+        
+        Human-computer sessions use 'stim'/'player'; in human-human sessions
+        player 1 takes the stimulus role and player 2 the player role.
+        """
+        if self.experiment_type == 'human_human':
+            return '1', '2'
+        return 'stim', 'player'
+    
+    def taps(self):
+        """Stage 2 tap times of both roles.
+        
+        Returns:
+            tuple: (stim_tap, player_tap) float64 arrays, sorted by time
+        """
+        stage2 = self.stage2.sort_values('timestamp', kind='stable')
+        stim_role, player_role = self.roles()
+        stim = stage2.loc[stage2['player'] == stim_role, 'timestamp'].to_numpy(dtype=float)
+        player = stage2.loc[stage2['player'] == player_role, 'timestamp'].to_numpy(dtype=float)
+        return stim, player
+    
+    def to_series(self, buffer=0):
+        """Session data in the form used by ``src.analysis`` and the session store.
+        
+        Args:
+            buffer: Number of taps to drop from both ends of each role's taps
+        
+        Returns:
+            dict: Arrays keyed like ``SERIES``; ``full_*`` keep all Stage 2 taps
+        """
+        full_stim, full_player = self.taps()
+        stim = full_stim[buffer:len(full_stim) - buffer]
+        player = full_player[buffer:len(full_player) - buffer]
+        
+        stim_se = se_array(player, stim)
+        player_se = se_array(stim, player)
+        stim_iti = iti_array(stim)
+        player_iti = iti_array(player)
+        return {
+            'full_stim_tap': full_stim,
+            'full_player_tap': full_player,
+            'stim_tap': stim,
+            'player_tap': player,
+            'stim_se': stim_se,
+            'player_se': player_se,
+            'stim_iti': stim_iti,
+            'player_iti': player_iti,
+            'stim_itiv': variation_array(stim_iti),
+            'player_itiv': variation_array(player_iti),
+            'stim_sev': variation_array(stim_se),
+            'player_sev': variation_array(player_se)
+        }
+
+
+def load_matlab_sessions(root, **filters):
+    """Find MATLAB sessions below a data directory.
+    
+    Sessions are looked up through the SessionCatalog of ``root``; their
+    tables are only read when accessed.
+    
+    Args:
+        root: Data directory such as Config.RAW_DATA_DIR
+        **filters: Catalog filters (participant, model, experiment_type, since, until, ...)
+    
+    Returns:
+        list: MatlabSession objects ordered by start time
+    """
+    with SessionCatalog(root) as catalog:
+        catalog.update()
+        entries = catalog.query(layout='matlab', **filters)
+    return [MatlabSession(entry['path']) for entry in entries]
+
+
+def concat_stage2(sessions):
+    """Stage 2 taps of several sessions in one table.
+    
+    Args:
+        sessions: MatlabSession objects
+    
+    Returns:
+        DataFrame: STAGE2_COLUMNS plus 'session' (index into ``sessions``)
+    """
+    tables = [session.stage2.assign(session=i) for i, session in enumerate(sessions)]
+    if not tables:
+        return _normalise(pd.DataFrame(), STAGE2_COLUMNS).assign(session=pd.Series(dtype='int64'))
+    return pd.concat(tables, ignore_index=True)
@@ -0,0 +1,171 @@
+"""
+Single-file columnar storage for experiment sessions.
+A session is one NumPy ``.npz`` archive holding every tap and derived series
+as a typed float64 array, the model hypotheses as one 2-D matrix and the
+session metadata as JSON. The legacy per-series CSV layout can still be
+written from the same data.
+"""
+import json
+import os
+import glob
+
+import numpy as np
+
+# File name of the session archive inside an experiment directory
+SESSION_FILE = "session.npz"
+
+# Series stored in a session, in the order the runner produces them
+SERIES = (
+    'full_stim_tap', 'full_player_tap', 'stim_tap', 'player_tap',
+    'stim_se', 'player_se', 'stim_iti', 'player_iti',
+    'stim_itiv', 'player_itiv', 'stim_sev', 'player_sev'
+)
+
+_METADATA_KEY = '__metadata__'
+_HYPO_KEY = 'hypo'
+
+# Legacy CSV layout: file name and column of each one-column series file
+_CSV_SERIES = {
+    'stim_se': ("stim_synchronization_errors.csv", 'Stim_SE'),
+    'player_se': ("player_synchronization_errors.csv", 'Player_SE'),
+    'stim_iti': ("stim_intertap_intervals.csv", 'Stim_ITI'),
+    'player_iti': ("player_intertap_intervals.csv", 'Player_ITI'),
+    'stim_itiv': ("stim_iti_variations.csv", 'Stim_ITIv'),
+    'player_itiv': ("player_iti_variations.csv", 'Player_ITIv'),
+    'stim_sev': ("stim_se_variations.csv", 'Stim_SEv'),
+    'player_sev': ("player_se_variations.csv", 'Player_SEv'),
+}
+
+
+def _hypothesis_matrix(hypo):
+    """Stack per-turn hypothesis vectors into an (n_turns, n_hypothesis) matrix."""
+    if hypo is None or len(hypo) == 0:
+        return np.empty((0, 0))
+    return np.vstack([np.asarray(h, dtype=float).ravel() for h in hypo])
+
+
+def write_session(experiment_dir, series, hypo=None, metadata=None):
+    """Write a session archive into an experiment directory.
+    
+    The archive is written to a temporary file and renamed into place, so
+    readers never see a partially written session.
+    
+    Args:
+        experiment_dir: Directory of the session (created if missing)
+        series: Mapping from series name (see SERIES) to a sequence of floats
+        hypo: Sequence of equally long hypothesis vectors, one per turn
+        metadata: JSON-serialisable dict (model, config values, lengths, ...)
+    
+    Returns:
+        str: Path of the written archive
+    """
+    os.makedirs(experiment_dir, exist_ok=True)
+    arrays = {name: np.asarray(series.get(name, ()), dtype=float) for name in SERIES}
+    arrays[_HYPO_KEY] = _hypothesis_matrix(hypo)
+    arrays[_METADATA_KEY] = np.array(json.dumps(metadata or {}, ensure_ascii=False))
+    
+    path = os.path.join(experiment_dir, SESSION_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_session(path, series=None):
+    """Read a session archive.
+    
+    Only the requested arrays are decoded; the others are never read from disk.
+    
+    Args:
+        path: Archive path, or the experiment directory containing it
+        series: Names of the series to load (default: all of SERIES)
+    
+    Returns:
+        dict: Series arrays, 'hypo' (2-D array) and 'metadata' (dict)
+    """
+    if os.path.isdir(path):
+        path = os.path.join(path, SESSION_FILE)
+    names = SERIES if series is None else series
+    
+    with np.load(path, allow_pickle=False) as archive:
+        data = {name: archive[name] for name in names if name in archive.files}
+        if series is None or _HYPO_KEY in series:
+            data[_HYPO_KEY] = archive[_HYPO_KEY]
+        data['metadata'] = json.loads(archive[_METADATA_KEY].item())
+    return data
+
+
+def find_sessions(root):
+    """Session archives below a data directory, sorted by path.
+    
+    Args:
+        root: Directory such as Config.RAW_DATA_DIR
+    
+    Returns:
+        list: Archive paths
+    """
+    pattern = os.path.join(root, '**', SESSION_FILE)
+    return sorted(glob.glob(pattern, recursive=True))
+
+
+def load_sessions(root, series=None):
+    """Read every session archive below a data directory.
+    
+    Args:
+        root: Directory such as Config.RAW_DATA_DIR
+        series: Names of the series to load (default: all of SERIES)
+    
+    Returns:
+        dict: Archive path -> session dict as returned by read_session
+    """
+    return {path: read_session(path, series) for path in find_sessions(root)}
+
+
+def export_session_csv(experiment_dir, data=None):
+    """Write a session in the legacy one-CSV-per-series layout.
+    
+    Args:
+        experiment_dir: Directory to write the CSV files into
+        data: Session dict as returned by read_session (default: read the
+            archive in ``experiment_dir``)
+    """
+    import pandas as pd
+    
+    if data is None:
+        data = read_session(experiment_dir)
+    os.makedirs(experiment_dir, exist_ok=True)
+    
+    # Tap pairs, cut to the shorter of the two series
+    for prefix, filename in (('full_', "raw_taps.csv"), ('', "processed_taps.csv")):
+        stim = data.get(prefix + 'stim_tap', ())
+        player = data.get(prefix + 'player_tap', ())
+        if len(stim) > 0 and len(player) > 0:
+            n = min(len(stim), len(player))
+            pd.DataFrame({'Stim_tap': stim[:n], 'Player_tap': player[:n]}).to_csv(
+                os.path.join(experiment_dir, filename), index=False
+            )
+    
+    for name, (filename, column) in _CSV_SERIES.items():
+        values = data.get(name, ())
+        if len(values) > 0:
+            pd.DataFrame({column: values}).to_csv(
+                os.path.join(experiment_dir, filename), index=False
+            )
+    
+    hypo = data.get(_HYPO_KEY)
+    if hypo is not None and len(hypo) > 0:
+        hypo_data = [','.join(map(str, h)) for h in hypo]
+        pd.DataFrame({'Hypothesis': hypo_data}).to_csv(
+            os.path.join(experiment_dir, "model_hypotheses.csv"), index=False
+        )
+    
+    metadata = data.get('metadata', {})
+    if 'config' in metadata:
+        pd.DataFrame([metadata['config']]).to_csv(
+            os.path.join(experiment_dir, "experiment_config.csv"), index=False
+        )
+    if 'lengths' in metadata:
+        pd.DataFrame([metadata['lengths']]).to_csv(
+            os.path.join(experiment_dir, "data_metadata.csv"), index=False
+        )
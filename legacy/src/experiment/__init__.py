@@ -1,6 +1,29 @@
 """
 Experiment framework for cooperative tapping task.
 """
+import importlib
+
 from .runner import ExperimentRunner
 
-__all__ = ['ExperimentRunner']
\ No newline at end of file
+# Parameter sweeps need pandas and the analysis process pool; imported on first access
+_LAZY = {
+    'sweep': ('parameter_grid', 'random_design', 'run_sweep', 'SweepCache'),
+    'inference_server': ('InferenceServer', 'InferenceClient'),
+}
+_LAZY_NAMES = {name: module for module, names in _LAZY.items() for name in names}
+
+def __getattr__(name):
+    module = _LAZY_NAMES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_NAMES))
+
+__all__ = [
+    'ExperimentRunner', 'parameter_grid', 'random_design', 'run_sweep', 'SweepCache',
+    'InferenceServer', 'InferenceClient'
+]
@@ -0,0 +1,134 @@
+"""
+Preallocated session buffers for the experiment runner.
+Tap times, SEs and model hypotheses are written into NumPy arrays sized for
+the whole session up front, so recording a tap in the timing loop neither
+grows a container nor keeps references to live model state.
+"""
+import numpy as np
+
+
+class TapSeries:
+    """Append-only float64 series backed by a preallocated array.
+
+    Supports the list operations the runner uses (append, len, indexing,
+    slicing); slices and copy() return NumPy arrays.
+    """
+
+    __slots__ = ('_data', '_n')
+
+    def __init__(self, capacity):
+        """Allocate an empty series.
+
+        Args:
+            capacity: Number of values to preallocate
+        """
+        self._data = np.empty(max(1, int(capacity)))
+        self._n = 0
+
+    def append(self, value):
+        """Store one value (grows the storage only if the capacity is exceeded)."""
+        if self._n == len(self._data):
+            self._data = np.concatenate([self._data, np.empty(len(self._data))])
+        self._data[self._n] = value
+        self._n += 1
+
+    def __len__(self):
+        return self._n
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._data[:self._n][index]
+        if index < 0:
+            index += self._n
+        if not 0 <= index < self._n:
+            raise IndexError("TapSeries index out of range")
+        return self._data[index]
+
+    def __iter__(self):
+        return iter(self._data[:self._n])
+
+    def __array__(self, dtype=None, copy=None):
+        values = self._data[:self._n]
+        if dtype is not None:
+            return values.astype(dtype)
+        return values.copy() if copy else values
+
+    @property
+    def values(self):
+        """Recorded values as a view of the buffer."""
+        return self._data[:self._n]
+
+    def copy(self):
+        """Recorded values as a new array."""
+        return self._data[:self._n].copy()
+
+
+class HypothesisHistory:
+    """Per-turn model hypotheses in a preallocated (turns, n_hypothesis) matrix.
+
+    append() copies the hypothesis vector into the next row, so later updates
+    of the model's own array do not change the history.
+    """
+
+    __slots__ = ('_data', '_n')
+
+    def __init__(self, capacity, n_hypothesis):
+        """Allocate an empty history.
+
+        Args:
+            capacity: Number of turns to preallocate
+            n_hypothesis: Length of one hypothesis vector
+        """
+        self._data = np.empty((max(1, int(capacity)), int(n_hypothesis)))
+        self._n = 0
+
+    def append(self, hypothesis):
+        """Copy one hypothesis vector into the next row."""
+        if self._n == len(self._data):
+            self._data = np.concatenate([self._data, np.empty_like(self._data)])
+        self._data[self._n] = hypothesis
+        self._n += 1
+
+    def __len__(self):
+        return self._n
+
+    def __getitem__(self, index):
+        return self._data[:self._n][index]
+
+    def __array__(self, dtype=None, copy=None):
+        values = self._data[:self._n]
+        if dtype is not None:
+            return values.astype(dtype)
+        return values.copy() if copy else values
+
+    def copy(self):
+        """Recorded hypotheses as a new (turns, n_hypothesis) array."""
+        return self._data[:self._n].copy()
+
+
+class SessionBuffer:
+    """All per-tap recordings of one session.
+
+    Attributes:
+        stim_tap: Stimulus tap times of both stages
+        player_tap: Player tap times of both stages
+        stim_se: Stage 2 SEs passed to the model
+        hypo: Model hypotheses at every Stage 2 stimulus
+    """
+
+    __slots__ = ('stim_tap', 'player_tap', 'stim_se', 'hypo')
+
+    def __init__(self, config, n_hypothesis=0):
+        """Allocate buffers for a session of the configured length.
+
+        Args:
+            config: Configuration object (STAGE1, STAGE2, BUFFER)
+            n_hypothesis: Length of the model's hypothesis vector (0 for models without one)
+        """
+        stage2_turns = config.STAGE2 + 2 * config.BUFFER
+        capacity = config.STAGE1 + stage2_turns
+        self.stim_tap = TapSeries(capacity)
+        # One extra slot for the final player tap
+        self.player_tap = TapSeries(capacity + 1)
+        self.stim_se = TapSeries(stage2_turns)
+        self.hypo = HypothesisHistory(stage2_turns, n_hypothesis)
@@ -0,0 +1,151 @@
+"""
+Event process for a running session.
+Moves journaling and the online Stage 2 statistics (and their console
+reports) out of the timing loop: the runner only puts each tap record into a
+shared-memory ring buffer, and a separate process reads the records, writes
+the tap journal and updates the statistics.
+"""
+import math
+import time
+import multiprocessing
+
+from ..data.journal import TapJournal, EVENT_STIM, EVENT_PLAYER, EVENT_STAGE, EVENT_END
+from ..analysis.online import OnlineMetrics
+from .ring_buffer import ShmRingBuffer
+
+
+def print_online_report(metrics):
+    """Print the online Stage 2 statistics to the console."""
+    se = metrics['stim_se']
+    iti = metrics['player_iti']
+    print(f"INFO: 逐次統計({metrics.turns}ターン) - SE 平均: {se.mean:.3f}秒, SD: {se.std:.3f}秒, "
+          f"直近{se.window}回 平均: {se.rolling_mean:.3f}秒, SD: {se.rolling_std:.3f}秒 / "
+          f"プレイヤーITI 平均: {iti.mean:.3f}秒, 直近SD: {iti.rolling_std:.3f}秒, "
+          f"lag1自己相関: {iti.lag1_autocorr:.2f}", flush=True)
+
+
+def consume_events(ring_name, journal_path=None, metadata=None, window=10,
+                   report_interval=10, poll_interval=0.001):
+    """Read tap records from a ring buffer until the session ends.
+
+    Target of EventProcess. Stage 2 player taps with an SE update the online
+    statistics exactly as ExperimentRunner.run_stage2 does.
+
+    Args:
+        ring_name: Name of the ShmRingBuffer
+        journal_path: Tap journal to write (None: no journal)
+        metadata: Journal header metadata
+        window: Rolling window of the online statistics
+        report_interval: Print the statistics every N turns (0: never)
+        poll_interval: Sleep (seconds) while the buffer is empty
+    """
+    ring = ShmRingBuffer.attach(ring_name)
+    journal = TapJournal(journal_path, metadata=metadata) if journal_path else None
+    metrics = OnlineMetrics(window=window)
+    stage = 0
+    last_stim = math.nan
+    completed, end_time = False, math.nan
+    finished = False
+    try:
+        while not finished:
+            records = ring.peek()
+            if len(records) == 0:
+                if ring.done and len(ring) == 0:
+                    break
+                time.sleep(poll_interval)
+                continue
+            for event_time, event, turn, se, model_output in records.tolist():
+                if event == EVENT_END:
+                    completed, end_time = bool(turn), event_time
+                    finished = True
+                    break
+                if journal is not None:
+                    journal.append(event, event_time, turn, se, model_output)
+                if event == EVENT_STAGE:
+                    stage = turn
+                elif event == EVENT_PLAYER:
+                    if stage == 2 and not math.isnan(se) and not math.isnan(last_stim):
+                        metrics.update(last_stim, event_time, se)
+                        if report_interval and metrics.turns % report_interval == 0:
+                            print_online_report(metrics)
+                elif event == EVENT_STIM:
+                    last_stim = event_time
+            ring.advance(len(records))
+            del records
+    finally:
+        if journal is not None:
+            journal.close(completed=completed, end_time=end_time)
+        ring.close()
+
+
+class EventProcess:
+    """Session event consumer in its own process, fed through a ShmRingBuffer.
+
+    Has the append/close interface of TapJournal, so the runner can use it
+    in place of the journal.
+    """
+
+    def __init__(self, journal_path=None, metadata=None, window=10, report_interval=10,
+                 capacity=4096):
+        """Create the ring buffer and start the consumer process.
+
+        Args:
+            journal_path: Tap journal the consumer writes (None: no journal)
+            metadata: Journal header metadata
+            window: Rolling window of the online statistics
+            report_interval: Print the statistics every N turns (0: never)
+            capacity: Ring buffer size in records
+        """
+        self.path = journal_path
+        self.dropped = 0
+        self.ring = ShmRingBuffer(capacity)
+        # spawn: the consumer must not inherit audio/display state of the runner
+        context = multiprocessing.get_context('spawn')
+        self.process = context.Process(
+            target=consume_events,
+            args=(self.ring.name, journal_path, metadata, window, report_interval),
+            name="SessionEventProcess",
+            daemon=True
+        )
+        try:
+            self.process.start()
+        except Exception:
+            self.ring.close()
+            self.ring.unlink()
+            raise
+
+    def append(self, event, event_time, turn=0, se=math.nan, model_output=math.nan):
+        """Hand one record to the consumer (non-blocking; dropped if the buffer is full).
+
+        The first dropped record is reported right away; the total is counted
+        in ``dropped`` and raised by close().
+        """
+        if not self.ring.put(event, event_time, turn, se, model_output):
+            self.dropped += 1
+            if self.dropped == 1:
+                print(f"警告: リングバッファが一杯のため記録を破棄しました (イベント {event}, "
+                      f"時刻 {event_time:.3f}秒)", flush=True)
+
+    def close(self, completed=True, end_time=math.nan, timeout=10.0):
+        """End the session: let the consumer drain the buffer, then free it.
+
+        Args:
+            completed: Whether the session finished normally
+            end_time: Time of the end of the session
+            timeout: Longest wait (seconds) for the consumer
+        """
+        if self.ring is None:
+            return
+        ring, self.ring = self.ring, None
+        ring.put(EVENT_END, end_time, int(completed))
+        ring.mark_done()
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        ring.close()
+        ring.unlink()
+        if self.dropped:
+            raise RuntimeError(f"{self.dropped} events were dropped (ring buffer full)")
+        if self.process.exitcode != 0:
+            raise RuntimeError(f"Event process exited with code {self.process.exitcode}")
@@ -0,0 +1,304 @@
+"""
+Model-inference server for experiments driven from outside Python.
+A long-lived local service (TCP loopback or Unix socket) that hosts
+SEAModel/BayesModel/BIBModel instances, one per session, so the MATLAB
+experiment can ask the Python models for the next interval without starting
+a MATLAB engine or a Python interpreter per run.
+
+Protocol: every message is a frame of a uint32 payload length followed by the
+payload, all little-endian. A request payload is a uint8 opcode and a uint32
+session id, followed by:
+
+    OP_OPEN   UTF-8 JSON {"model": "sea", "config": {...}}  (session id 0)
+    OP_INFER  float64 SE
+    OP_RESET  -
+    OP_CLOSE  -
+
+A reply payload is a uint8 status followed by the result (OP_OPEN: uint32
+session id, OP_INFER: float64 interval) or, for STATUS_ERROR, a UTF-8 error
+message. Sessions belong to their connection and are closed with it.
+"""
+import os
+import json
+import socket
+import struct
+import itertools
+import threading
+import socketserver
+
+from ..config import Config
+from .runner import create_model
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 50007
+
+# Opcodes
+OP_OPEN = 1
+OP_INFER = 2
+OP_RESET = 3
+OP_CLOSE = 4
+
+# Reply status
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+_LENGTH = struct.Struct('<I')
+_REQUEST = struct.Struct('<BI')
+_INFER_REQUEST = struct.Struct('<IBId')    # frame length + request + SE
+_OK = struct.Struct('<B')
+_OPEN_REPLY = struct.Struct('<IBI')        # frame length + status + session id
+_INFER_REPLY = struct.Struct('<IBd')       # frame length + status + interval
+_EMPTY_REPLY = _LENGTH.pack(_OK.size) + _OK.pack(STATUS_OK)
+
+
+def _recv_exact(sock, buffer, n):
+    """Read exactly n bytes into buffer; False if the peer closed the connection."""
+    view = memoryview(buffer)
+    received = 0
+    while received < n:
+        count = sock.recv_into(view[received:n])
+        if count == 0:
+            return False
+        received += count
+    return True
+
+
+def _error_reply(message):
+    payload = _OK.pack(STATUS_ERROR) + str(message).encode('utf-8')
+    return _LENGTH.pack(len(payload)) + payload
+
+
+class _InferenceHandler(socketserver.BaseRequestHandler):
+    """Serves the requests of one client connection."""
+
+    def setup(self):
+        if self.request.family in (socket.AF_INET, socket.AF_INET6):
+            self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sessions = {}
+
+    def handle(self):
+        sock = self.request
+        header = bytearray(_LENGTH.size)
+        payload = bytearray(_INFER_REQUEST.size)
+        while _recv_exact(sock, header, _LENGTH.size):
+            (length,) = _LENGTH.unpack(header)
+            if length > len(payload):
+                payload = bytearray(length)
+            if not _recv_exact(sock, payload, length):
+                break
+            sock.sendall(self._reply(memoryview(payload)[:length]))
+
+    def _reply(self, payload):
+        """Reply frame to one request payload."""
+        if len(payload) < _REQUEST.size:
+            return _error_reply("Truncated request")
+        opcode, session_id = _REQUEST.unpack_from(payload)
+        try:
+            if opcode == OP_OPEN:
+                request = json.loads(bytes(payload[_REQUEST.size:]).decode('utf-8'))
+                model = self.server.open_model(request.get('model', 'sea'), request.get('config') or {})
+                session_id = self.server.next_session_id()
+                self.sessions[session_id] = model
+                return _OPEN_REPLY.pack(_OPEN_REPLY.size - _LENGTH.size, STATUS_OK, session_id)
+            model = self.sessions.get(session_id)
+            if model is None:
+                return _error_reply(f"Unknown session: {session_id}")
+            if opcode == OP_INFER:
+                (se,) = struct.unpack_from('<d', payload, _REQUEST.size)
+                return _INFER_REPLY.pack(_INFER_REPLY.size - _LENGTH.size, STATUS_OK,
+                                         float(model.inference(se)))
+            if opcode == OP_RESET:
+                model.reset()
+                return _EMPTY_REPLY
+            if opcode == OP_CLOSE:
+                del self.sessions[session_id]
+                return _EMPTY_REPLY
+            return _error_reply(f"Unknown opcode: {opcode}")
+        except Exception as e:
+            return _error_reply(f"{type(e).__name__}: {e}")
+
+
+class _ServerMixin:
+    daemon_threads = True
+    base_config = None
+    _session_ids = None
+
+    def next_session_id(self):
+        return next(self._session_ids)
+
+    def open_model(self, model_type, changes):
+        """Model of a new session, with config changes from the client applied."""
+        return create_model(model_type, self.base_config.replace(**changes))
+
+
+class _TCPServer(_ServerMixin, socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, 'ThreadingUnixStreamServer'):
+    class _UnixServer(_ServerMixin, socketserver.ThreadingUnixStreamServer):
+        pass
+else:
+    _UnixServer = None
+
+
+class InferenceServer:
+    """Inference service hosting one model per client session.
+
+    Use serve_forever() in a dedicated process, or start() to serve from a
+    background thread (e.g. in tests).
+    """
+
+    def __init__(self, address=(DEFAULT_HOST, DEFAULT_PORT), config=None):
+        """Bind the server socket.
+
+        Args:
+            address: (host, port) for TCP (port 0: any free port), or a
+                filesystem path for a Unix socket
+            config: Configuration the session configs are derived from
+                (default: the defaults)
+        """
+        if isinstance(address, str):
+            if _UnixServer is None:
+                raise ValueError("Unix sockets are not supported on this platform")
+            self._server = _UnixServer(address, _InferenceHandler)
+        else:
+            self._server = _TCPServer(tuple(address), _InferenceHandler)
+        self._server.base_config = config if config is not None else Config()
+        self._server._session_ids = itertools.count(1)
+        self._thread = None
+
+    @property
+    def address(self):
+        """Address the server is bound to ((host, port) or socket path)."""
+        return self._server.server_address
+
+    def serve_forever(self):
+        """Serve requests until shutdown() is called."""
+        self._server.serve_forever()
+
+    def start(self):
+        """Serve from a daemon thread.
+
+        Returns:
+            InferenceServer: self
+        """
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name="InferenceServer", daemon=True)
+        self._thread.start()
+        return self
+
+    def shutdown(self):
+        """Stop serving and close the server socket."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.remove(self.address)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
+
+
+class RemoteModel:
+    """A model session on an inference server, used like a local model."""
+
+    def __init__(self, client, session_id, model_type):
+        self.client = client
+        self.session_id = session_id
+        self.name = model_type
+
+    def inference(self, se):
+        """Next interval for a synchronization error (see BaseModel.inference)."""
+        return self.client.infer(self.session_id, se)
+
+    def reset(self):
+        """Reset the model state on the server."""
+        self.client.reset(self.session_id)
+
+    def close(self):
+        """Close the session on the server."""
+        self.client.close_session(self.session_id)
+
+
+class InferenceClient:
+    """Python client of the inference server (stand-in for the MATLAB client)."""
+
+    def __init__(self, address=(DEFAULT_HOST, DEFAULT_PORT), timeout=5.0):
+        """Connect to a server.
+
+        Args:
+            address: (host, port) or Unix socket path, as given to InferenceServer
+            timeout: Socket timeout in seconds
+        """
+        if isinstance(address, str):
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.settimeout(timeout)
+        self.sock.connect(address if isinstance(address, str) else tuple(address))
+        self._buffer = bytearray(64)
+
+    def _request(self, frame):
+        """Send one request frame and return the reply payload (status checked)."""
+        self.sock.sendall(frame)
+        if not _recv_exact(self.sock, self._buffer, _LENGTH.size):
+            raise ConnectionError("Inference server closed the connection")
+        (length,) = _LENGTH.unpack_from(self._buffer)
+        if length > len(self._buffer):
+            self._buffer = bytearray(length)
+        if not _recv_exact(self.sock, self._buffer, length):
+            raise ConnectionError("Inference server closed the connection")
+        payload = memoryview(self._buffer)[:length]
+        if payload[0] != STATUS_OK:
+            raise RuntimeError(bytes(payload[1:]).decode('utf-8'))
+        return payload
+
+    def _simple_request(self, opcode, session_id, body=b''):
+        payload = _REQUEST.pack(opcode, session_id) + body
+        return self._request(_LENGTH.pack(len(payload)) + payload)
+
+    def open_session(self, model_type='sea', **config):
+        """Create a model on the server.
+
+        Args:
+            model_type: Type of model to use ('sea', 'bayes', or 'bib')
+            **config: Config fields to change for this session (e.g. SPAN=1.0)
+
+        Returns:
+            RemoteModel: The session
+        """
+        body = json.dumps({'model': model_type, 'config': config}).encode('utf-8')
+        payload = self._simple_request(OP_OPEN, 0, body)
+        (session_id,) = struct.unpack_from('<I', payload, _OK.size)
+        return RemoteModel(self, session_id, model_type)
+
+    def infer(self, session_id, se):
+        """Next interval of a session's model for a synchronization error."""
+        payload = self._request(_INFER_REQUEST.pack(_INFER_REQUEST.size - _LENGTH.size,
+                                                    OP_INFER, session_id, se))
+        return struct.unpack_from('<d', payload, _OK.size)[0]
+
+    def reset(self, session_id):
+        """Reset a session's model."""
+        self._simple_request(OP_RESET, session_id)
+
+    def close_session(self, session_id):
+        """Close a session."""
+        self._simple_request(OP_CLOSE, session_id)
+
+    def close(self):
+        """Close the connection (and with it all its sessions)."""
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,194 @@
+"""
+Shared-memory ring buffer for tap events.
+A single-producer/single-consumer queue of fixed-size tap records (the
+record layout of the tap journal) in multiprocessing.shared_memory. The
+timing loop puts records without locks, system calls or allocation beyond
+packing the record; another process reads them, optionally as a zero-copy
+NumPy view of the buffer.
+
+Read and write positions are monotonically increasing 64-bit counters on
+separate cache lines. Each side writes only its own counter, after the
+record itself, so no lock is needed. The counters are accessed through
+ctypes, so each update is a single aligned 8-byte store that the other side
+can never see half-written (struct packs byte by byte).
+
+Python offers no release/acquire barriers, so the protocol relies on the
+CPU keeping stores (and loads) in program order. x86 guarantees this (TSO);
+ARM (e.g. Apple silicon Macs) does not, and the consumer could see the new
+write counter before the record it publishes. The buffer therefore refuses
+to run on other architectures (see SUPPORTED); callers fall back to
+in-process handling there.
+"""
+import sys
+import math
+import platform
+import ctypes
+import struct
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from ..data.journal import RECORD_DTYPE
+
+_RECORD = struct.Struct('<dBIdd')
+
+# Header layout: counters on their own cache lines, then the fixed fields
+_WRITE_OFFSET = 0
+_READ_OFFSET = 64
+_CAPACITY_OFFSET = 128
+_DONE_OFFSET = 136
+_HEADER_SIZE = 192
+
+# Whether this CPU keeps stores and loads in program order (x86 / x86-64)
+SUPPORTED = platform.machine().lower() in ('x86_64', 'amd64', 'i386', 'i686', 'x86')
+
+
+class ShmRingBuffer:
+    """Lock-free SPSC ring buffer of tap records in shared memory.
+
+    One process creates the buffer and passes ``name`` to the other, which
+    attaches with attach(). Only one process may put() and only one may
+    get()/peek(); the creator should unlink() the buffer when both are done.
+    Raises RuntimeError where SUPPORTED is False.
+    """
+
+    __slots__ = ('shm', 'capacity', '_mask', '_buf', '_records', '_write_index', '_read_index',
+                 '_done', '_write', '_read', '_read_cache', '_write_cache')
+
+    def __init__(self, capacity=4096, name=None, _create=True):
+        """Create a ring buffer.
+
+        Args:
+            capacity: Number of records (rounded up to a power of two)
+            name: Shared memory block name (default: chosen by the system)
+        """
+        if not SUPPORTED:
+            raise RuntimeError(f"ShmRingBuffer needs x86 store ordering, not available on "
+                               f"{platform.machine() or 'this CPU'}")
+        if _create:
+            capacity = 1 << max(0, math.ceil(math.log2(max(1, int(capacity)))))
+            size = _HEADER_SIZE + capacity * _RECORD.size
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            self.shm.buf[:_HEADER_SIZE] = bytes(_HEADER_SIZE)
+            ctypes.c_uint64.from_buffer(self.shm.buf, _CAPACITY_OFFSET).value = capacity
+        else:
+            if sys.version_info >= (3, 13):
+                self.shm = shared_memory.SharedMemory(name=name, track=False)
+            else:
+                self.shm = shared_memory.SharedMemory(name=name)
+            capacity = ctypes.c_uint64.from_buffer(self.shm.buf, _CAPACITY_OFFSET).value
+        self.capacity = capacity
+        self._mask = capacity - 1
+        self._buf = self.shm.buf
+        self._write_index = ctypes.c_uint64.from_buffer(self._buf, _WRITE_OFFSET)
+        self._read_index = ctypes.c_uint64.from_buffer(self._buf, _READ_OFFSET)
+        self._done = ctypes.c_uint64.from_buffer(self._buf, _DONE_OFFSET)
+        self._records = np.ndarray((capacity,), dtype=RECORD_DTYPE, buffer=self._buf,
+                                   offset=_HEADER_SIZE)
+        self._write = self._write_cache = self._write_index.value
+        self._read = self._read_cache = self._read_index.value
+
+    @classmethod
+    def attach(cls, name):
+        """Attach to a ring buffer created by another process."""
+        return cls(name=name, _create=False)
+
+    @property
+    def name(self):
+        """Shared memory block name to pass to attach()."""
+        return self.shm.name
+
+    # Producer side
+
+    def put(self, event, event_time, turn=0, se=math.nan, model_output=math.nan):
+        """Append one record without blocking (arguments as TapJournal.append).
+
+        Returns:
+            bool: False if the buffer was full and the record was dropped
+        """
+        write = self._write
+        if write - self._read_cache >= self.capacity:
+            self._read_cache = self._read_index.value
+            if write - self._read_cache >= self.capacity:
+                return False
+        _RECORD.pack_into(self._buf, _HEADER_SIZE + (write & self._mask) * _RECORD.size,
+                          event_time, event, turn, se, model_output)
+        self._write = write + 1
+        self._write_index.value = self._write
+        return True
+
+    def mark_done(self):
+        """Tell the consumer that no more records will be put."""
+        self._done.value = 1
+
+    # Consumer side
+
+    @property
+    def done(self):
+        """Whether the producer has called mark_done()."""
+        return self._done.value == 1
+
+    def __len__(self):
+        """Number of records waiting to be read."""
+        return self._write_index.value - self._read
+
+    def get(self):
+        """Take the oldest record.
+
+        Returns:
+            tuple: (time, event, turn, se, model_output), or None if empty
+        """
+        read = self._read
+        if read >= self._write_cache:
+            self._write_cache = self._write_index.value
+            if read >= self._write_cache:
+                return None
+        record = _RECORD.unpack_from(self._buf, _HEADER_SIZE + (read & self._mask) * _RECORD.size)
+        self._read = read + 1
+        self._read_index.value = self._read
+        return record
+
+    def peek(self, max_records=None):
+        """Waiting records as a view of the buffer, without taking them.
+
+        Returns the contiguous run of records up to the end of the ring, so a
+        full drain may take two calls. The view is only valid until advance();
+        copy it to keep the records.
+
+        Args:
+            max_records: Upper limit on the number of records
+
+        Returns:
+            ndarray: RECORD_DTYPE view (possibly empty)
+        """
+        self._write_cache = self._write_index.value
+        start = self._read & self._mask
+        count = max(0, min(self._write_cache - self._read, self.capacity - start))
+        if max_records is not None:
+            count = min(count, max_records)
+        return self._records[start:start + count]
+
+    def advance(self, count):
+        """Release records returned by peek()."""
+        self._read += count
+        self._read_index.value = self._read
+
+    # Lifetime
+
+    def close(self):
+        """Detach from the shared memory (views returned by peek() must be gone)."""
+        if self._buf is None:
+            return
+        self._records = self._write_index = self._read_index = self._done = None
+        self._buf = None
+        self.shm.close()
+
+    def unlink(self):
+        """Free the shared memory block (creator only, after both sides are done)."""
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -3,52 +3,112 @@ Main experiment runner for cooperative tapping task.
 Handles experiment flow, data collection, and UI interactions.
 """
 import os
+import gc
 import datetime
+import platform
 import numpy as np
-import pandas as pd
 
-# PsychoPyのオーディオ設定を先に行う（ミリ秒精度の時間測定のため）
-from psychopy import prefs
-# PTBを最優先に設定（要件に従い、ミリ秒精度を確保）
-prefs.hardware['audioLib'] = ['ptb']  # PTBのみを使用してミリ秒精度を最大化
-# 音声バッファサイズを最小に設定（ミリ秒精度のため）
-prefs.hardware['audioBufferSize'] = 128  # PTBでの最高精度タイミング用
-# 低レイテンシーモードを最高精度に設定
-prefs.hardware['audioLatencyMode'] = 1  # 最高精度モード（ミリ秒精度を確保）
+from ..models import SEAModel, BayesModel, BIBModel
+from ..data import (
+    write_session, export_session_csv, SessionCatalog, TapJournal, JOURNAL_FILE,
+    EVENT_STIM, EVENT_PLAYER, EVENT_STAGE
+)
+from ..analysis.metrics import alternating_series
+from ..analysis.online import OnlineMetrics
+from .scheduler import sleep_until, KeyboardInput
+from .buffers import SessionBuffer
+from . import ring_buffer
+from .event_process import EventProcess, print_online_report
 
-# その他のpsychopyモジュールをインポート
-from psychopy import visual, core, event, sound
+# PsychoPyは実際にセッションを開始するときに読み込む（_load_psychopy）。
+# インポートだけでオーディオ設定などのグローバルな副作用が生じるため。
+prefs = core = visual = event = sound = None
 
-# ガベージコレクションを最適化して実験中のメモリ使用を効率化
-import gc
-gc.disable()  # 実験中の自動GCを無効化してタイミングの乱れを防止
+# プロセス優先度は1プロセスにつき1回だけ変更する
+_priority_raised = False
 
-# プロセス優先度を最大化して実験の時間精度を向上
-try:
-    import platform
-    if platform.system() == 'Windows':
-        # Windowsの場合
-        import ctypes
-        process_handle = ctypes.windll.kernel32.GetCurrentProcess()
-        ctypes.windll.kernel32.SetPriorityClass(process_handle, 0x00000080)  # HIGH_PRIORITY_CLASS
-        print("INFO: プロセス優先度を高に設定しました")
-    elif platform.system() == 'Darwin' or platform.system() == 'Linux':
-        # Mac/Linuxの場合
-        import os
-        try:
-            os.nice(-10)  # 優先度を上げる（管理者権限が必要な場合あり）
-            print("INFO: プロセス優先度を上げました")
-        except OSError:
-            print("INFO: プロセス優先度の変更が許可されていません（管理者権限が必要な場合があります）")
-except Exception as e:
-    print(f"INFO: プロセス優先度の設定に失敗しましたが続行します: {e}")
 
-from ..models import SEAModel, BayesModel, BIBModel
+def create_model(model_type, config):
+    """Model of the given type with the configured parameters.
+    
+    Args:
+        model_type: Type of model to use ('sea', 'bayes', or 'bib')
+        config: Configuration object
+    """
+    if model_type.lower() == 'sea':
+        return SEAModel(config)
+    elif model_type.lower() == 'bayes':
+        return BayesModel(config, n_hypothesis=config.BAYES_N_HYPOTHESIS)
+    elif model_type.lower() == 'bib':
+        return BIBModel(config, n_hypothesis=config.BAYES_N_HYPOTHESIS,
+                        l_memory=config.BIB_L_MEMORY)
+    else:
+        raise ValueError(f"Unknown model type: {model_type}")
+
+
+def _load_psychopy():
+    """Import PsychoPy's clock on first use, after applying the low-latency audio settings."""
+    global prefs, core
+    if core is None:
+        # PsychoPyのオーディオ設定を先に行う（ミリ秒精度の時間測定のため）
+        from psychopy import prefs
+        # PTBを最優先に設定（要件に従い、ミリ秒精度を確保）
+        prefs.hardware['audioLib'] = ['ptb']  # PTBのみを使用してミリ秒精度を最大化
+        # 音声バッファサイズを最小に設定（ミリ秒精度のため）
+        prefs.hardware['audioBufferSize'] = 128  # PTBでの最高精度タイミング用
+        # 低レイテンシーモードを最高精度に設定
+        prefs.hardware['audioLatencyMode'] = 1  # 最高精度モード（ミリ秒精度を確保）
+        from psychopy import core
+
+
+def _load_psychopy_io():
+    """Import the display, keyboard and audio parts of PsychoPy on first use."""
+    global visual, event, sound
+    _load_psychopy()
+    # visual/event/soundはディスプレイと音声デバイスを必要とするため、必要になるまで読み込まない
+    if visual is None:
+        from psychopy import visual, event, sound
+
+
+def configure_process():
+    """Process-wide settings for a timing-critical session.
+    
+    Disables automatic garbage collection (re-enabled by ExperimentRunner.run
+    when the session ends) and raises the process priority once per process.
+    """
+    global _priority_raised
+    
+    # ガベージコレクションを最適化して実験中のメモリ使用を効率化
+    gc.disable()  # 実験中の自動GCを無効化してタイミングの乱れを防止
+    
+    if _priority_raised:
+        return
+    _priority_raised = True
+    
+    # プロセス優先度を最大化して実験の時間精度を向上
+    try:
+        if platform.system() == 'Windows':
+            # Windowsの場合
+            import ctypes
+            process_handle = ctypes.windll.kernel32.GetCurrentProcess()
+            ctypes.windll.kernel32.SetPriorityClass(process_handle, 0x00000080)  # HIGH_PRIORITY_CLASS
+            print("INFO: プロセス優先度を高に設定しました")
+        elif platform.system() == 'Darwin' or platform.system() == 'Linux':
+            # Mac/Linuxの場合
+            try:
+                os.nice(-10)  # 優先度を上げる（管理者権限が必要な場合あり）
+                print("INFO: プロセス優先度を上げました")
+            except OSError:
+                print("INFO: プロセス優先度の変更が許可されていません（管理者権限が必要な場合があります）")
+    except Exception as e:
+        print(f"INFO: プロセス優先度の設定に失敗しましたが続行します: {e}")
+
 
 class ExperimentRunner:
     """Runner for the cooperative tapping experiment."""
     
-    def __init__(self, config, model_type='sea', output_dir='data/raw', user_id='anonymous'):
+    def __init__(self, config, model_type='sea', output_dir='data/raw', user_id='anonymous',
+                 export_csv=False, journal=True, event_process=False):
         """Initialize experiment with configuration and model.
         
         Args:
@@ -56,24 +116,27 @@ class ExperimentRunner:
             model_type: Type of model to use ('sea', 'bayes', 'bib')
             output_dir: Directory to save output data
             user_id: Subject/participant ID for data organization
+            export_csv: Also write the per-series CSV files next to the session archive
+            journal: Journal every tap to disk while the session runs (see src.data.journal)
+            event_process: Journal and compute the online statistics in a separate
+                process fed through shared memory (see src.experiment.event_process)
         """
         self.config = config
         self.model_type = model_type
         self.output_dir = output_dir
         self.user_id = user_id
+        self.export_csv = export_csv
+        self.use_journal = journal
+        self.use_event_process = event_process
+        self.journal = None
+        self.events_offloaded = False
+        self.experiment_dir = None
         
         # 実験終了を管理するフラグ
         self.final_turn_reached = False
         
         # Initialize model based on type
-        if model_type.lower() == 'sea':
-            self.model = SEAModel(config)
-        elif model_type.lower() == 'bayes':
-            self.model = BayesModel(config)
-        elif model_type.lower() == 'bib':
-            self.model = BIBModel(config, l_memory=1)
-        else:
-            raise ValueError(f"Unknown model type: {model_type}")
+        self.model = create_model(model_type, config)
         
         # Initialize experiment data
         self.reset_data()
@@ -97,29 +160,36 @@ class ExperimentRunner:
     
     def reset_data(self):
         """Reset experiment data."""
-        # すべて空の配列から開始（初期値なし）
-        self.stim_tap = []
-        self.player_tap = []
+        # タップ・SE・仮説はセッション全体分を事前確保したバッファに記録する
+        n_hypothesis = (len(self.model.get_hypothesis())
+                        if hasattr(self.model, 'get_hypothesis') else 0)
+        self.buffers = SessionBuffer(self.config, n_hypothesis)
+        
+        # 記録中は全タップ(full_*)と分析対象タップが同じバッファを共有する
+        # （analyze_data で分離される）
+        self.stim_tap = self.full_stim_tap = self.buffers.stim_tap
+        self.player_tap = self.full_player_tap = self.buffers.player_tap
+        self.stim_se = self.buffers.stim_se
+        
+        # For Bayesian models, store hypothesis data
+        self.hypo = self.buffers.hypo
         
-        # Initialize empty lists for derived measures
+        # Derived measures (computed by analyze_data)
         self.stim_iti = []
         self.player_iti = []
         self.stim_itiv = []
         self.player_itiv = []
-        self.stim_se = []
         self.player_se = []
         self.stim_sev = []
         self.player_sev = []
         
-        # For Bayesian models, store hypothesis data
-        self.hypo = []
-        
-        # Keep original full data for research purposes
-        self.full_stim_tap = []
-        self.full_player_tap = []
+        # Stage 2の逐次統計（セッション中に参照可能）
+        self.online_metrics = OnlineMetrics(window=self.config.ONLINE_WINDOW)
     
     def setup_minimal_environment(self):
         """実験に必要な最小限の環境を設定（瞑目実験用）"""
+        _load_psychopy_io()
+        
         # 音声環境の設定
         self._setup_audio()
         
@@ -245,6 +315,7 @@ class ExperimentRunner:
     def setup_ui(self):
         """実験環境をセットアップ - ウィンドウ表示を含む完全な環境"""
         print("INFO: ウィンドウ表示を含む実験環境をセットアップします")
+        _load_psychopy_io()
         
         # 音声環境のセットアップ
         self._setup_audio()
@@ -315,6 +386,37 @@ class ExperimentRunner:
         else:
             self.text = None
     
+    def _get_keys(self):
+        """Return keys pressed since the last call (psychopy.event.getKeys)."""
+        return event.getKeys()
+    
+    def _wait_keys(self, keyList=None):
+        """Block until one of the given keys is pressed (psychopy.event.waitKeys)."""
+        return event.waitKeys(keyList=keyList)
+    
+    def _wait(self, secs):
+        """Wait for the given number of seconds (psychopy.core.wait)."""
+        core.wait(secs)
+    
+    def _sleep_until(self, deadline):
+        """Wait until self.clock reaches the given absolute time (sleep, then spin)."""
+        return sleep_until(self.clock, deadline)
+    
+    def _start_key_input(self):
+        """Start the background keyboard reader used by Stage 2."""
+        self.key_input = KeyboardInput(self.clock)
+        self.key_input.start()
+    
+    def _stop_key_input(self):
+        """Stop the background keyboard reader."""
+        if getattr(self, 'key_input', None) is not None:
+            self.key_input.stop()
+            self.key_input = None
+    
+    def _next_key_event(self):
+        """Block until the next key press and return (key, clock time of the press)."""
+        return self.key_input.get()
+    
     def run_stage1(self):
         """コンソールベースでStage 1を実行（瞑目実験用）"""
         stage1_num = 0
@@ -326,7 +428,7 @@ class ExperimentRunner:
         print("準備ができたらSpaceキーを押してください")
         
         # Spaceキーを待つ
-        event.waitKeys(keyList=['space'])
+        self._wait_keys(keyList=['space'])
         
         # 開始メッセージ
         print("開始! メトロノームのリズムに交互にタップしてください")# ExperimentRunnerクラスの__init__あたりに追加
@@ -364,7 +466,7 @@ class ExperimentRunner:
                         print("DEBUG: Sound_stim (Stage1) was playing, stopping it now.")
                         self.sound_stim.stop()
                         # PTBが停止を処理する時間を増やす
-                        core.wait(0.05) # 50ms
+                        self._wait(0.05) # 50ms
                 
                 # 音声再生
                 if self.sound_stim:
@@ -376,7 +478,7 @@ class ExperimentRunner:
                     
                     # 音声が確実に再生されるよう適切な待機時間を設定
                     # 0.3秒の音声ファイルに対して十分な再生時間を確保
-                    core.wait(0.35)  # 音声長さ + マージン
+                    self._wait(0.35)  # 音声長さ + マージン
                 else:
                     print("DEBUG: sound_stim is None, cannot play.")
                 
@@ -384,16 +486,16 @@ class ExperimentRunner:
                 # 刺激タップ時刻を記録
                 current_time = self.clock.getTime()
                 self.stim_tap.append(current_time)
-                self.full_stim_tap.append(current_time)
+                self._journal(EVENT_STIM, current_time, stage1_num)
             
             # キー入力をチェック
-            keys = event.getKeys()
+            keys = self._get_keys()
             if 'space' in keys:
                 # プレイヤータップ時刻を記録
                 current_time = self.clock.getTime()
                 self.player_tap.append(current_time)
-                self.full_player_tap.append(current_time)
                 player_taps += 1
+                self._journal(EVENT_PLAYER, current_time, player_taps)
                 
                 # プレイヤー音声再生
                 if self.sound_player:
@@ -402,7 +504,7 @@ class ExperimentRunner:
                         if hasattr(self.sound_player, 'status') and self.sound_player.status == 1: # PLAYING
                             print("DEBUG: Sound_player (Stage1) was playing, stopping it now.")
                             self.sound_player.stop()
-                            core.wait(0.05)  # 停止待機時間を調整 (50ms)
+                            self._wait(0.05)  # 停止待機時間を調整 (50ms)
                         
                         # 即時再生
                         if hasattr(self.sound_player, 'setVolume'): self.sound_player.setVolume(2.0)
@@ -443,9 +545,13 @@ class ExperimentRunner:
                 return True
     
     def run_stage2(self):
-        """コンソールベースでStage 2を実行（瞑目実験用）"""
-        flag = 1  # 0: Player's turn, 1: Stimulus turn
+        """コンソールベースでStage 2を実行（瞑目実験用）
+        
+        刺激音は絶対時刻の締切までスリープ＋スピンで待機して再生し、
+        プレイヤーのタップは入力スレッドのキューからタイムスタンプ付きで受け取る。
+        """
         turn = 0
+        total_turns = self.config.STAGE2 + self.config.BUFFER*2
         
         # ステージ間の連続性を保つため、コンソールに指示を表示
         print("\nStage 2: 交互タッピング開始")
@@ -473,151 +579,222 @@ class ExperimentRunner:
         # ランダム性を加味（自然なリズム変動を実現）
         random_second = time_to_next_tap + np.random.normal(0, self.config.SCALE)
         
-        # 状態をリセットして次のタップに備える
-        self.timer.reset()
+        # 次の刺激音の絶対時刻（self.clock基準）
+        next_stim_time = current_time + random_second
         
         # ログ出力
         print(f"INFO: Stage2開始 - 次のタップまでの待機時間: {random_second:.3f}秒")
         
-        # Stage 2の主要ループ
-        while True:
-            # 刺激側のターン
-            if self.sound_stim and self.timer.getTime() >= random_second and flag == 1:
-                # 音声の状態をチェック
-                if hasattr(self.sound_stim, 'status') and self.sound_stim.status == 1: # PLAYING
-                    # 既に再生中の場合は止めてから再生
-                    print("DEBUG: Sound_stim (Stage2) was playing, stopping it now.")
-                    self.sound_stim.stop()
-                    # 完全に停止するまで少し待機
-                    core.wait(0.05) # 50ms
-                    
-                # 音声の即時再生（待機なしで高精度を維持）
+        # キー入力スレッドを開始（Stage1の入力は破棄）
+        self._start_key_input()
+        
+        try:
+            # Stage 2の主要ループ
+            while True:
+                # 刺激側のターン: 締切までスリープし、直前はスピンで待機
+                self._sleep_until(next_stim_time)
+                
                 if self.sound_stim is not None:
-                    # 安全にsetVolumeを呼び出す（あれば）
-                    if hasattr(self.sound_stim, 'setVolume'):
-                        try:
-                            self.sound_stim.setVolume(2.0)  # 音量を最大に設定
-                        except Exception as vol_err:
-                            print(f"警告: 音量設定に失敗しましたが続行します: {vol_err}")
+                    # 再生中の場合は止めてから再生（停止待ちはしない）
+                    if hasattr(self.sound_stim, 'status') and self.sound_stim.status == 1: # PLAYING
+                        self.sound_stim.stop()
                     
                     # 最小レイテンシーでplay()を呼び出し
                     try:
                         self.sound_stim.play()
-                        print(f"[{turn+1}回目の刺激音]")
                     except Exception as play_err:
                         print(f"警告: 音声再生に失敗しましたが続行します: {play_err}")
                 
                 current_time = self.clock.getTime()
                 self.stim_tap.append(current_time)
-                self.full_stim_tap.append(current_time)
+                self._journal(EVENT_STIM, current_time, turn + 1)
+                print(f"[{turn+1}回目の刺激音]")
                 
-                # If using Bayesian models, store hypothesis data
+                # If using Bayesian models, store hypothesis data (copied into the preallocated history)
                 if hasattr(self.model, 'get_hypothesis'):
                     self.hypo.append(self.model.get_hypothesis())
                 
-                # プレイヤーのターンに切り替え
-                flag = 0
                 turn += 1
                 
                 # 最後のターンに達したら終了
-                if turn >= (self.config.STAGE2 + self.config.BUFFER*2):
+                if turn >= total_turns:
                     # 終了メッセージを表示
                     print(f"INFO: 最終ターン({turn})に到達しました。最後のタップを行ってください")
+                    print("最後のタップを行ってください (Spaceキー) または 終了 (Escキー)")
                     self.final_turn_reached = True
                     
-                    # プレイヤーがタップするまで待機
-                    waiting_for_final_tap = True
-                    while waiting_for_final_tap:
-                        # コンソールで最後のタップを促す
-                        print("最後のタップを行ってください (Spaceキー) または 終了 (Escキー)", end="\r")
-                        
-                        # キー入力をチェック
-                        final_keys = event.getKeys()
-                        if 'space' in final_keys:
-                            # 最後のタップを記録
-                            final_time = self.clock.getTime()
-                            self.player_tap.append(final_time)
-                            self.full_player_tap.append(final_time)
-                            
-                            # 音を鳴らす
-                            if self.sound_player is not None:
-                                try:
-                                    self.sound_player.play()
-                                except Exception as play_err:
-                                    print(f"警告: 最終タップの音声再生に失敗: {play_err}")
-                            
-                            # 完了メッセージを表示
-                            print("\n実験完了！お疲れ様でした")
-                            
-                            # 待機ループを終了
-                            waiting_for_final_tap = False
-                            print("INFO: プレイヤーの最終タップを記録しました")
-                        
-                        elif 'escape' in final_keys:
-                            # エスケープキーで中断
-                            print("\n実験が中断されました")
-                            return False
-                        
-                        # 短い待機で処理負荷を軽減
-                        core.wait(0.01)
+                    key, final_time = self._next_key_event()
+                    if key == 'escape':
+                        # エスケープキーで中断
+                        print("\n実験が中断されました")
+                        return False
                     
-                    # 実験を終了
-                    return True
-            
-            # プレイヤーのターン
-            if self.sound_player and flag == 0:
-                keys = event.getKeys()
-                if 'space' in keys:
-                    current_time = self.clock.getTime()
-                    self.player_tap.append(current_time)
-                    self.full_player_tap.append(current_time)
+                    # 最後のタップを記録
+                    self.player_tap.append(final_time)
+                    self._journal(EVENT_PLAYER, final_time, turn)
                     
-                    # プレイヤー音声再生
+                    # 音を鳴らす
                     if self.sound_player is not None:
-                        # 安全に状態をチェックして停止（必要な場合）
-                        if hasattr(self.sound_player, 'status') and self.sound_player.status == 1: # PLAYING
-                            print("DEBUG: Sound_player (Stage2) was playing, stopping it now.")
-                            self.sound_player.stop()
-                            core.wait(0.05)  # 停止完了を待機 (50ms)
-                            
-                        # 再生
                         try:
-                            if hasattr(self.sound_player, 'setVolume'): self.sound_player.setVolume(2.0)
                             self.sound_player.play()
-                            print(f"[{turn}回目のプレイヤータップ音]")
                         except Exception as play_err:
-                            print(f"警告: 音声再生に失敗しましたが続行します: {play_err}")
+                            print(f"警告: 最終タップの音声再生に失敗: {play_err}")
                     
-                    # 最小限の待機時間で高精度を維持
-                    core.wait(0.1)  # タイミング精度向上のため待機時間を短縮
+                    # 完了メッセージを表示
+                    print("\n実験完了！お疲れ様でした")
+                    print("INFO: プレイヤーの最終タップを記録しました")
                     
-                    # 同期エラー計算
-                    if len(self.player_tap) >= 2 and len(self.stim_tap) > 0:
-                        # 最後の刺激タップと直近2回のプレイヤータップを使用
-                        se = self.stim_tap[-1] - (self.player_tap[-1] + self.player_tap[-2])/2
-                        self.stim_se.append(se)
-                    else:
-                        # 十分なデータがない場合は0を使用
-                        se = 0.0
-                        self.stim_se.append(se)
-                    
-                    # モデルを使用して次のタイミングを推測
-                    random_second = self.model.inference(se)
-                    
-                    self.timer.reset()
-                    flag = 1
+                    # 実験を終了
+                    return True
                 
-                if 'escape' in keys:
+                # 次の推論をタップ待ちの間に先行計算（タップ後はSEによる補正のみ）
+                if self.config.LOOKAHEAD_INFERENCE:
+                    self.model.prepare()
+                
+                # プレイヤーのターン: 入力キューをブロッキングで待機（ポーリングなし）
+                key, tap_time = self._next_key_event()
+                if key == 'escape':
                     print("\n実験が中断されました")
                     return False
+                
+                self.player_tap.append(tap_time)
+                
+                # プレイヤー音声再生
+                if self.sound_player is not None:
+                    if hasattr(self.sound_player, 'status') and self.sound_player.status == 1: # PLAYING
+                        self.sound_player.stop()
+                    try:
+                        self.sound_player.play()
+                    except Exception as play_err:
+                        print(f"警告: 音声再生に失敗しましたが続行します: {play_err}")
+                
+                # 同期エラー計算
+                if len(self.player_tap) >= 2 and len(self.stim_tap) > 0:
+                    # 最後の刺激タップと直近2回のプレイヤータップを使用
+                    se = self.stim_tap[-1] - (self.player_tap[-1] + self.player_tap[-2])/2
+                    self.stim_se.append(se)
+                else:
+                    # 十分なデータがない場合は0を使用
+                    se = 0.0
+                    self.stim_se.append(se)
+                
+                # モデルを使用して次のタイミングを推測
+                random_second = self.model.inference(se)
+                
+                # 次の刺激はプレイヤーのタップ時刻を基準に予定する
+                # (従来プロトコルのタップ後待機 TAP_DELAY を固定値として加える)
+                next_stim_time = tap_time + self.config.TAP_DELAY + random_second
+                print(f"[{turn}回目のプレイヤータップ音]")
+                
+                # ジャーナル記録と逐次統計の更新（次の刺激の予定後に行う）
+                self._journal(EVENT_PLAYER, tap_time, turn, se, random_second)
+                if len(self.player_tap) >= 2 and not self.events_offloaded:
+                    self.online_metrics.update(self.stim_tap[-1], tap_time, se)
+                    self._report_online_metrics()
+        finally:
+            self._stop_key_input()
+    
+    def _get_experiment_dir(self):
+        """Session directory (fixed on first use, so the journal and the archive share it)."""
+        if self.experiment_dir is None:
+            # 日付をデータディレクトリ名に含める
+            date_str = datetime.datetime.now().strftime('%Y%m%d')
+            # 被験者IDを使用（設定されていない場合はデフォルト値を使用）
+            user_id = getattr(self, 'user_id', 'anonymous')
+            self.experiment_dir = os.path.join(
+                self.output_dir,
+                f"{date_str}_{user_id}",
+                f"{self.model_type}_{self.serial_num}"
+            )
+        return self.experiment_dir
+    
+    def _config_data(self):
+        """Experiment settings stored with the session."""
+        return {
+            'Model': self.model_type,
+            'SPAN': self.config.SPAN,
+            'STAGE1': self.config.STAGE1,
+            'STAGE2': self.config.STAGE2,
+            'BUFFER': self.config.BUFFER,
+            'SCALE': self.config.SCALE,
+            'TAP_DELAY': self.config.TAP_DELAY,
+            'ExperimentTime': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+    
+    def _open_journal(self):
+        """Start the tap journal of this session (the session continues without it on failure).
+        
+        With event_process, the journal and the online statistics are handled by an
+        EventProcess instead, which takes the journal's place (except on CPUs the
+        shared-memory ring buffer does not support, see ring_buffer.SUPPORTED).
+        """
+        if not (self.use_journal or self.use_event_process) or self.journal is not None:
+            return
+        try:
+            path = None
+            metadata = {
+                'model_type': self.model_type,
+                'user_id': getattr(self, 'user_id', 'anonymous'),
+                'experiment_id': self.serial_num,
+                'config': self._config_data()
+            }
+            if self.use_journal:
+                experiment_dir = self._get_experiment_dir()
+                os.makedirs(experiment_dir, exist_ok=True)
+                path = os.path.join(experiment_dir, JOURNAL_FILE)
+            use_event_process = self.use_event_process and ring_buffer.SUPPORTED
+            if self.use_event_process and not use_event_process:
+                print(f"警告: このCPU ({platform.machine()}) では共有メモリのリングバッファを"
+                      f"使用できないため、イベントプロセスを使わずに記録します")
+            if use_event_process:
+                self.journal = EventProcess(path, metadata=metadata,
+                                            window=self.config.ONLINE_WINDOW,
+                                            report_interval=self.config.ONLINE_REPORT_INTERVAL)
+                self.events_offloaded = True
+            elif path is not None:
+                self.journal = TapJournal(path, metadata=metadata)
+        except Exception as e:
+            print(f"警告: タップジャーナルを開始できませんでした: {e}")
+            self.journal = None
+            self.events_offloaded = False
+    
+    def _journal(self, event, event_time, turn=0, se=np.nan, model_output=np.nan):
+        """Queue one journal record (no I/O in the calling thread)."""
+        if self.journal is not None:
+            self.journal.append(event, event_time, turn, se, model_output)
+    
+    def _close_journal(self, completed, remove=False):
+        """Flush and close the journal; remove it once the session archive is written."""
+        if self.journal is None:
+            return
+        journal, self.journal = self.journal, None
+        try:
+            journal.close(completed=completed)
+            if remove and journal.path:
+                os.remove(journal.path)
+        except Exception as e:
+            print(f"警告: タップジャーナルの終了処理に失敗しました: {e}")
+    
+    def _report_online_metrics(self):
+        """Print the online Stage 2 statistics every ONLINE_REPORT_INTERVAL turns."""
+        interval = self.config.ONLINE_REPORT_INTERVAL
+        metrics = self.online_metrics
+        if not interval or metrics.turns % interval != 0:
+            return
+        print_online_report(metrics)
     
     def analyze_data(self):
         """Process and analyze the collected data."""
         print(f"INFO: データ分析開始 - 刺激タップ: {len(self.stim_tap)}回, プレイヤータップ: {len(self.player_tap)}回")
         
         # オリジナルデータを保持（バッファ処理前のデータを保持）
+        # 記録バッファから配列として取り出す（以降の処理はスライスのみで元データは変更しない）
         self.full_stim_tap = self.stim_tap.copy()
         self.full_player_tap = self.player_tap.copy()
+        self.stim_tap = self.full_stim_tap
+        self.player_tap = self.full_player_tap
+        self.stim_se = self.buffers.stim_se.copy()
+        self.hypo = self.buffers.hypo.copy()
         
         # 配列長が一致していない場合は調整
         stim_len = len(self.stim_tap)
@@ -648,61 +825,30 @@ class ExperimentRunner:
             return False
         
         try:
-            # 派生データのリスト初期化
-            self.stim_iti = []
-            self.player_iti = []
-            self.stim_itiv = []
-            self.player_itiv = []
-            self.player_se = []
-            self.stim_sev = []
-            self.player_sev = []
-            
             # Remove the first SE placeholder if it exists
-            if self.stim_se and len(self.stim_se) > 0:
-                del self.stim_se[0]
-            
-            # ITIの計算（バッファー除外後のデータから計算）
-            for t in range(1, len(self.stim_tap)):
-                # 刺激のITI計算: 現在の刺激タップと前回のプレイヤータップの差
-                if t-1 < len(self.player_tap):
-                    self.stim_iti.append(self.stim_tap[t] - self.player_tap[t-1])
-            
-            for t in range(len(self.player_tap)):
-                # プレイヤーのITI計算: 現在のプレイヤータップと対応する刺激タップの差
-                # 交互タッピングでは同じインデックス同士が対応するタップペア
-                if t < len(self.stim_tap):
-                    self.player_iti.append(self.player_tap[t] - self.stim_tap[t])
-            
-            # 同期誤差(SE)の計算
-            for t in range(len(self.player_tap)):
-                # プレイヤーSE計算: プレイヤータップと前後の刺激タップの中間点との差
-                if t < len(self.stim_tap) and t > 0:
-                    self.player_se.append(self.player_tap[t] - (self.stim_tap[t-1] + self.stim_tap[t])/2)
-            
-            # ITI変動の計算
-            for i in range(len(self.stim_iti) - 1):
-                self.stim_itiv.append(self.stim_iti[i+1] - self.stim_iti[i])
-            
-            for i in range(len(self.player_iti) - 1):
-                self.player_itiv.append(self.player_iti[i+1] - self.player_iti[i])
-            
-            # SE変動の計算
-            for i in range(len(self.stim_se) - 1):
-                self.stim_sev.append(self.stim_se[i+1] - self.stim_se[i])
-            
-            for i in range(len(self.player_se) - 1):
-                self.player_sev.append(self.player_se[i+1] - self.player_se[i])
+            if len(self.stim_se) > 0:
+                self.stim_se = self.stim_se[1:]
+            
+            # ITI・同期誤差(SE)・変動の計算（バッファー除外後のデータから計算）
+            derived = alternating_series(self.stim_tap, self.player_tap, self.stim_se)
+            self.stim_iti = derived['stim_iti']
+            self.player_iti = derived['player_iti']
+            self.player_se = derived['player_se']
+            self.stim_itiv = derived['stim_itiv']
+            self.player_itiv = derived['player_itiv']
+            self.stim_sev = derived['stim_sev']
+            self.player_sev = derived['player_sev']
             
             # ベイズモデル用の仮説データのバッファー処理
-            if self.hypo and len(self.hypo) > buffer_start:
+            if len(self.hypo) > buffer_start:
                 self.hypo = self.hypo[buffer_start:]
             
             # ITIの統計情報を出力（デバッグ用）
             if len(self.stim_iti) > 0:
-                print(f"INFO: 刺激ITI - 個数: {len(self.stim_iti)}, 平均: {sum(self.stim_iti)/len(self.stim_iti):.3f}秒, 最小: {min(self.stim_iti):.3f}秒, 最大: {max(self.stim_iti):.3f}秒")
+                print(f"INFO: 刺激ITI - 個数: {len(self.stim_iti)}, 平均: {self.stim_iti.mean():.3f}秒, 最小: {self.stim_iti.min():.3f}秒, 最大: {self.stim_iti.max():.3f}秒")
             
             if len(self.player_iti) > 0:
-                print(f"INFO: プレイヤーITI - 個数: {len(self.player_iti)}, 平均: {sum(self.player_iti)/len(self.player_iti):.3f}秒, 最小: {min(self.player_iti):.3f}秒, 最大: {max(self.player_iti):.3f}秒")
+                print(f"INFO: プレイヤーITI - 個数: {len(self.player_iti)}, 平均: {self.player_iti.mean():.3f}秒, 最小: {self.player_iti.min():.3f}秒, 最大: {self.player_iti.max():.3f}秒")
             
             # データを保存
             self._save_data_organized()
@@ -744,137 +890,90 @@ class ExperimentRunner:
     
     def _save_data_organized(self):
         """階層化されたディレクトリ構造でデータを保存する"""
-        # 日付をデータディレクトリ名に含める
-        date_str = datetime.datetime.now().strftime('%Y%m%d')
-        
         # 被験者IDを使用（設定されていない場合はデフォルト値を使用）
         user_id = getattr(self, 'user_id', 'anonymous')
         
         # 出力ディレクトリの構造化されたパス
-        experiment_dir = os.path.join(
-            self.output_dir,
-            f"{date_str}_{user_id}",
-            f"{self.model_type}_{self.serial_num}"
-        )
+        experiment_dir = self._get_experiment_dir()
         
         # ディレクトリが存在しない場合は作成
         os.makedirs(experiment_dir, exist_ok=True)
         
         print(f"INFO: データを階層化されたディレクトリに保存: {experiment_dir}")
         
-        # 全タップデータを保存（バッファ除去なし）
-        if len(self.full_stim_tap) > 0 and len(self.full_player_tap) > 0:
-            # 配列長の整合性をチェック
-            min_full_len = min(len(self.full_stim_tap), len(self.full_player_tap))
-            full_tap_df = pd.DataFrame({
-                'Stim_tap': self.full_stim_tap[:min_full_len],
-                'Player_tap': self.full_player_tap[:min_full_len]
-            })
-            full_tap_df.to_csv(os.path.join(experiment_dir, "raw_taps.csv"), index=False)
-        
-        # 処理済みのタップデータを保存（バッファ処理済み）
-        if len(self.stim_tap) > 0 and len(self.player_tap) > 0:
-            # 配列長の整合性をチェック
-            min_len = min(len(self.stim_tap), len(self.player_tap))
-            tap_df = pd.DataFrame({
-                'Stim_tap': self.stim_tap[:min_len],
-                'Player_tap': self.player_tap[:min_len]
-            })
-            tap_df.to_csv(os.path.join(experiment_dir, "processed_taps.csv"), index=False)
-        
-        # SE（同期誤差）データを保存 - 修正部分
-        # 各SEデータを別々のファイルに保存
-        if len(self.stim_se) > 0:
-            stim_se_df = pd.DataFrame({'Stim_SE': self.stim_se})
-            stim_se_df.to_csv(os.path.join(experiment_dir, "stim_synchronization_errors.csv"), index=False)
-        
-        if len(self.player_se) > 0:
-            player_se_df = pd.DataFrame({'Player_SE': self.player_se})
-            player_se_df.to_csv(os.path.join(experiment_dir, "player_synchronization_errors.csv"), index=False)
-        
-        # ITI（タップ間隔）データを保存
-        if len(self.stim_iti) > 0:
-            stim_iti_df = pd.DataFrame({'Stim_ITI': self.stim_iti})
-            stim_iti_df.to_csv(os.path.join(experiment_dir, "stim_intertap_intervals.csv"), index=False)
-        
-        if len(self.player_iti) > 0:
-            player_iti_df = pd.DataFrame({'Player_ITI': self.player_iti})
-            player_iti_df.to_csv(os.path.join(experiment_dir, "player_intertap_intervals.csv"), index=False)
-        
-        # 変動データを保存 - 同様に別々のファイルに保存
-        if len(self.stim_itiv) > 0:
-            stim_itiv_df = pd.DataFrame({'Stim_ITIv': self.stim_itiv})
-            stim_itiv_df.to_csv(os.path.join(experiment_dir, "stim_iti_variations.csv"), index=False)
-        
-        if len(self.player_itiv) > 0:
-            player_itiv_df = pd.DataFrame({'Player_ITIv': self.player_itiv})
-            player_itiv_df.to_csv(os.path.join(experiment_dir, "player_iti_variations.csv"), index=False)
-        
-        if len(self.stim_sev) > 0:
-            stim_sev_df = pd.DataFrame({'Stim_SEv': self.stim_sev})
-            stim_sev_df.to_csv(os.path.join(experiment_dir, "stim_se_variations.csv"), index=False)
-        
-        if len(self.player_sev) > 0:
-            player_sev_df = pd.DataFrame({'Player_SEv': self.player_sev})
-            player_sev_df.to_csv(os.path.join(experiment_dir, "player_se_variations.csv"), index=False)
-        
-        # 仮説データを保存（モデルの状態データ）
-        if self.hypo:
-            # 仮説データを文字列に変換して保存
-            hypo_data = []
-            for h in self.hypo:
-                hypo_data.append(','.join(map(str, h)))
-            
-            hypo_df = pd.DataFrame({'Hypothesis': hypo_data})
-            hypo_df.to_csv(os.path.join(experiment_dir, "model_hypotheses.csv"), index=False)
-        
-        # 実験設定情報を保存
-        config_data = {
-            'Model': self.model_type,
-            'SPAN': self.config.SPAN,
-            'STAGE1': self.config.STAGE1,
-            'STAGE2': self.config.STAGE2,
-            'BUFFER': self.config.BUFFER,
-            'SCALE': self.config.SCALE,
-            'ExperimentTime': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        # 全系列・仮説行列・メタデータを1つのセッションファイルにまとめて保存
+        series = {
+            'full_stim_tap': self.full_stim_tap,
+            'full_player_tap': self.full_player_tap,
+            'stim_tap': self.stim_tap,
+            'player_tap': self.player_tap,
+            'stim_se': self.stim_se,
+            'player_se': self.player_se,
+            'stim_iti': self.stim_iti,
+            'player_iti': self.player_iti,
+            'stim_itiv': self.stim_itiv,
+            'player_itiv': self.player_itiv,
+            'stim_sev': self.stim_sev,
+            'player_sev': self.player_sev
         }
         
-        config_df = pd.DataFrame([config_data])
-        config_df.to_csv(os.path.join(experiment_dir, "experiment_config.csv"), index=False)
+        # 実験設定情報
+        config_data = self._config_data()
+        
+        # データの長さ情報
+        lengths = {f"{name}_length": len(values) for name, values in series.items()}
+        lengths['hypo_length'] = len(self.hypo)
         
-        # メタデータファイル - データの長さ情報を含む
         metadata = {
-            'full_stim_tap_length': len(self.full_stim_tap),
-            'full_player_tap_length': len(self.full_player_tap),
-            'stim_tap_length': len(self.stim_tap),
-            'player_tap_length': len(self.player_tap),
-            'stim_se_length': len(self.stim_se),
-            'player_se_length': len(self.player_se),
-            'stim_iti_length': len(self.stim_iti),
-            'player_iti_length': len(self.player_iti),
-            'stim_itiv_length': len(self.stim_itiv),
-            'player_itiv_length': len(self.player_itiv),
-            'stim_sev_length': len(self.stim_sev),
-            'player_sev_length': len(self.player_sev),
-            'hypo_length': len(self.hypo) if self.hypo else 0
+            'model_type': self.model_type,
+            'user_id': user_id,
+            'experiment_id': self.serial_num,
+            'config': config_data,
+            'lengths': lengths
         }
         
-        metadata_df = pd.DataFrame([metadata])
-        metadata_df.to_csv(os.path.join(experiment_dir, "data_metadata.csv"), index=False)
+        session_path = write_session(experiment_dir, series, hypo=self.hypo, metadata=metadata)
+        print(f"INFO: セッションファイルを保存しました: {session_path}")
+        
+        # セッションファイルが保存されたのでジャーナルは不要
+        self._close_journal(completed=True, remove=True)
+        
+        # 従来形式のCSV（系列ごとに1ファイル）はオプションで出力
+        if self.export_csv:
+            export_session_csv(experiment_dir, {**series, 'hypo': self.hypo, 'metadata': metadata})
+        
+        # セッションカタログに登録（失敗してもデータ自体は保存済み）
+        try:
+            with SessionCatalog(self.output_dir) as catalog:
+                catalog.add(experiment_dir)
+        except Exception as e:
+            print(f"警告: セッションカタログの更新に失敗しました: {e}")
         
         print(f"INFO: すべてのデータが {experiment_dir} に正常に保存されました")
     
+    def configure_process(self):
+        """Apply the process-wide timing settings (see configure_process)."""
+        configure_process()
+    
     def run(self):
         """Run the complete experiment."""
         try:
+            # GC停止・プロセス優先度の設定（セッション開始時に明示的に行う）
+            self.configure_process()
+            
             # Set up UI
             self.setup_ui()
             
+            # タップジャーナルを開始（異常終了時は recover_session で復元可能）
+            self._open_journal()
+            
             # Run Stage 1 (metronome)
+            self._journal(EVENT_STAGE, np.nan, 1)
             if not self.run_stage1():
                 return False
             
             # Run Stage 2 (interactive tapping)
+            self._journal(EVENT_STAGE, np.nan, 2)
             if not self.run_stage2():
                 return False
             
@@ -890,7 +989,7 @@ class ExperimentRunner:
                     self.text.setText("Experiment completed!\nThank you for participating.")
                     self.text.draw()
                     self.win.flip()
-                    core.wait(3.0)
+                    self._wait(3.0)
                 except Exception as e:
                     print(f"注: GUI表示に失敗しましたが、実験は正常に完了しています: {e}")
             
@@ -908,6 +1007,9 @@ class ExperimentRunner:
             # 実験中断時もガベージコレクションを再有効化
             gc.enable()
             
+            # 保存前に終了した場合はジャーナルを残す
+            self._close_journal(completed=False)
+            
             # Clean up
             if self.win:
                 self.win.close()
\ No newline at end of file
@@ -0,0 +1,148 @@
+"""
+Timing primitives for the event-driven Stage 2 loop.
+Provides a hybrid sleep-then-spin wait on absolute deadlines and a keyboard
+reader that delivers timestamped key events through a queue.
+"""
+import queue
+import threading
+import time
+
+# Time before a deadline at which sleeping stops and busy-waiting takes over.
+# Large enough to absorb OS sleep overshoot, small enough to keep CPU load low.
+SPIN_MARGIN = 0.002
+
+
+def sleep_until(clock, deadline, spin_margin=SPIN_MARGIN, sleep=time.sleep):
+    """Wait until ``clock.getTime()`` reaches an absolute deadline.
+    
+    Sleeps in one call for all but the last ``spin_margin`` seconds, then
+    spins on the clock for sub-millisecond onset accuracy.
+    
+    Args:
+        clock: Clock with a getTime() method (e.g. psychopy.core.Clock)
+        deadline: Target time on ``clock`` (seconds)
+        spin_margin: Seconds before the deadline to switch from sleeping to spinning
+        sleep: Sleep function (injectable for tests)
+    
+    Returns:
+        float: Clock time when the wait ended
+    """
+    remaining = deadline - clock.getTime()
+    if remaining > spin_margin:
+        sleep(remaining - spin_margin)
+    
+    now = clock.getTime()
+    while now < deadline:
+        now = clock.getTime()
+    return now
+
+
+class KeyboardInput:
+    """Keyboard reader delivering (key, timestamp) events via a queue.
+    
+    With the Psychtoolbox or ioHub backend of psychopy.hardware.keyboard, a
+    background thread polls the keyboard: key-down times are taken by the
+    backend rather than by the polling thread, so the timestamp does not
+    depend on when the main loop looks at the queue.
+    
+    Otherwise keys come from psychopy.event.getKeys, which dispatches pyglet
+    window events and so must run on the main thread (on macOS pyglet events
+    cannot be dispatched from any other thread). In that case no thread is
+    started and get() polls the keyboard itself in the calling thread.
+    """
+    
+    # psychopy.hardware.keyboard backends that can be polled from a thread
+    THREADED_BACKENDS = ('ptb', 'iohub')
+    
+    def __init__(self, clock, key_list=('space', 'escape'), poll_interval=0.001):
+        """Initialize keyboard reader.
+        
+        Args:
+            clock: Clock the timestamps are reported on (e.g. psychopy.core.Clock)
+            key_list: Keys to report
+            poll_interval: Seconds between polls of the keyboard backend
+        """
+        self.clock = clock
+        self.key_list = list(key_list)
+        self.poll_interval = poll_interval
+        self.events = queue.Queue()
+        self._stop = threading.Event()
+        self._thread = None
+        self._keyboard = None
+        self._poll_in_caller = False
+    
+    def start(self):
+        """Start the reader thread, or main-thread polling without a threaded backend."""
+        try:
+            from psychopy.hardware import keyboard
+            self._keyboard = keyboard.Keyboard(clock=self.clock)
+            backend = getattr(self._keyboard, 'backend', None)
+            if backend not in self.THREADED_BACKENDS:
+                raise RuntimeError(f"backend '{backend}' is not thread-safe")
+            self._keyboard.clearEvents()
+        except Exception as e:
+            print(f"INFO: psychopy.hardware.keyboardのスレッド入力が使用できないため、"
+                  f"メインスレッドでevent.getKeysを使用します: {e}")
+            from psychopy import event
+            event.clearEvents()
+            self._keyboard = None
+            self._poll_in_caller = True
+            return
+        
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='KeyboardInput', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop the reader thread."""
+        self._poll_in_caller = False
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+    
+    def get(self, timeout=None):
+        """Return the next (key, timestamp) event.
+        
+        Args:
+            timeout: Seconds to wait (None waits indefinitely)
+        
+        Returns:
+            tuple: (key name, clock time of the key press), or None on timeout
+        """
+        if self._poll_in_caller:
+            return self._poll(timeout)
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+    
+    def clear(self):
+        """Drop all pending events."""
+        while True:
+            try:
+                self.events.get_nowait()
+            except queue.Empty:
+                return
+    
+    def _poll(self, timeout):
+        """Poll psychopy.event.getKeys in the calling (main) thread until a key arrives."""
+        from psychopy import event
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while True:
+            for name, t in event.getKeys(keyList=self.key_list, timeStamped=self.clock):
+                self.events.put((name, t))
+            try:
+                return self.events.get_nowait()
+            except queue.Empty:
+                pass
+            if deadline is not None and time.perf_counter() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+    
+    def _run(self):
+        """Poll the threaded keyboard backend until stopped."""
+        while not self._stop.is_set():
+            for key in self._keyboard.getKeys(keyList=self.key_list, waitRelease=False):
+                self.events.put((key.name, key.rt))
+            self._stop.wait(self.poll_interval)
@@ -0,0 +1,236 @@
+"""
+Headless simulation mode for the cooperative tapping experiment.
+Runs the ExperimentRunner stage logic against a virtual clock and a synthetic
+tapper, so whole sessions can be executed faster than real time without a
+display, audio device or keyboard.
+"""
+import numpy as np
+
+from .runner import ExperimentRunner
+
+
+class VirtualTimebase:
+    """Shared virtual time source for simulated clocks.
+    
+    Every clock read advances time by ``poll_interval`` to model the cost of
+    one iteration of a polling loop; waits advance it by the requested amount.
+    """
+    
+    def __init__(self, poll_interval=0.0005):
+        """Initialize timebase.
+        
+        Args:
+            poll_interval: Virtual seconds consumed by each clock read
+        """
+        self.poll_interval = poll_interval
+        self.now = 0.0
+    
+    def tick(self):
+        """Advance time by one polling interval."""
+        self.now += self.poll_interval
+    
+    def advance(self, secs):
+        """Advance time by the given number of seconds."""
+        if secs > 0:
+            self.now += secs
+
+
+class VirtualClock:
+    """Drop-in replacement for psychopy.core.Clock driven by a VirtualTimebase."""
+    
+    def __init__(self, timebase):
+        """Initialize clock at time zero.
+        
+        Args:
+            timebase: VirtualTimebase shared by all clocks of a session
+        """
+        self.timebase = timebase
+        self._t0 = timebase.now
+    
+    def getTime(self):
+        """Return seconds since the last reset."""
+        self.timebase.tick()
+        return self.timebase.now - self._t0
+    
+    def reset(self, newT=0.0):
+        """Reset the clock so that getTime() returns ``newT``."""
+        self._t0 = self.timebase.now - newT
+
+
+class SilentSound:
+    """Sound stand-in with the subset of the psychopy.sound.Sound API the runner uses."""
+    
+    def __init__(self):
+        self.status = 0
+        self.play_count = 0
+    
+    def play(self):
+        self.play_count += 1
+    
+    def stop(self):
+        self.status = 0
+    
+    def setVolume(self, volume):
+        pass
+
+
+class SimulatedTapper:
+    """Stochastic human tapper for alternating tapping.
+    
+    Aims each tap at the midpoint after the latest stimulus (``span / 2``)
+    with a Wing-Kristofferson style timekeeper and motor noise, linear phase
+    correction of the previous timing error and a minimum reaction time.
+    """
+    
+    def __init__(self, span, timekeeper_sd=0.03, motor_sd=0.015, correction=0.25,
+                 reaction_time=0.15, seed=None):
+        """Initialize tapper.
+        
+        Args:
+            span: Base interval in seconds (Config.SPAN)
+            timekeeper_sd: Standard deviation of the internal interval (seconds)
+            motor_sd: Standard deviation of the motor delay (seconds)
+            correction: Fraction of the previous timing error corrected on the next tap
+            reaction_time: Shortest possible interval after a stimulus (seconds)
+            seed: Seed for the tapper's random generator
+        """
+        self.span = span
+        self.timekeeper_sd = timekeeper_sd
+        self.motor_sd = motor_sd
+        self.correction = correction
+        self.reaction_time = reaction_time
+        self.rng = np.random.default_rng(seed)
+        self.last_error = 0.0
+    
+    def next_tap(self, stim_time):
+        """Plan the tap that answers a stimulus.
+        
+        Args:
+            stim_time: Time of the stimulus tap (seconds)
+        
+        Returns:
+            float: Planned player tap time (seconds)
+        """
+        target = self.span / 2
+        interval = (target - self.correction * self.last_error
+                    + self.rng.normal(0, self.timekeeper_sd)
+                    + self.rng.normal(0, self.motor_sd))
+        interval = max(self.reaction_time, interval)
+        self.last_error = interval - target
+        return stim_time + interval
+    
+    def reset(self):
+        """Reset tapper state to initial conditions."""
+        self.last_error = 0.0
+
+
+class SimulatedExperimentRunner(ExperimentRunner):
+    """ExperimentRunner running on a virtual clock with a synthetic tapper.
+    
+    Stage logic, SE computation, analyze_data and CSV output are inherited
+    unchanged; only the clock, key input, waits and sounds are replaced.
+    """
+    
+    def __init__(self, config, model_type='sea', output_dir='data/raw',
+                 user_id='simulated', tapper=None, poll_interval=0.0005, export_csv=False,
+                 journal=True, event_process=False):
+        """Initialize simulated experiment.
+        
+        Args:
+            config: Configuration object
+            model_type: Type of model to use ('sea', 'bayes', 'bib')
+            output_dir: Directory to save output data
+            user_id: Subject/participant ID for data organization
+            tapper: Synthetic participant (defaults to SimulatedTapper(config.SPAN))
+            poll_interval: Virtual seconds consumed by each clock read
+            export_csv: Also write the per-series CSV files next to the session archive
+            journal: Journal every tap to disk while the session runs
+            event_process: Journal and compute the online statistics in a separate process
+        """
+        super().__init__(config, model_type=model_type, output_dir=output_dir,
+                         user_id=user_id, export_csv=export_csv, journal=journal,
+                         event_process=event_process)
+        self.tapper = tapper if tapper is not None else SimulatedTapper(config.SPAN)
+        self.timebase = VirtualTimebase(poll_interval)
+        self._pending_tap = None
+        self._answered_stim = 0
+    
+    def setup_ui(self):
+        """Install virtual clocks and silent sounds instead of PsychoPy objects."""
+        self.clock = VirtualClock(self.timebase)
+        self.timer = VirtualClock(self.timebase)
+        self.sound_stim = SilentSound()
+        self.sound_player = SilentSound()
+        self.win = None
+        self.text = None
+    
+    setup_minimal_environment = setup_ui
+    
+    def configure_process(self):
+        """Leave GC and process priority alone; virtual time is unaffected by them."""
+    
+    def _plan_tap(self):
+        """Let the tapper answer the latest stimulus if it has not done so yet."""
+        if len(self.full_stim_tap) > self._answered_stim:
+            self._answered_stim = len(self.full_stim_tap)
+            self._pending_tap = self.tapper.next_tap(self.full_stim_tap[-1])
+    
+    def _get_keys(self):
+        """Report a space press once the tapper's planned tap time has passed."""
+        self._plan_tap()
+        if self._pending_tap is not None and self.clock.getTime() >= self._pending_tap:
+            self._pending_tap = None
+            return ['space']
+        return []
+    
+    def _next_key_event(self):
+        """Jump to the tapper's planned tap and report it with its exact timestamp."""
+        self._plan_tap()
+        tap_time, self._pending_tap = self._pending_tap, None
+        self._sleep_until(tap_time)
+        return 'space', tap_time
+    
+    def _sleep_until(self, deadline):
+        """Advance virtual time to the deadline on self.clock."""
+        self.timebase.advance(deadline - self.clock.getTime())
+        return self.clock.getTime()
+    
+    def _start_key_input(self):
+        """Key input comes from the tapper; nothing to start."""
+    
+    def _stop_key_input(self):
+        """Key input comes from the tapper; nothing to stop."""
+    
+    def _wait_keys(self, keyList=None):
+        """Return the first accepted key immediately."""
+        return [keyList[0]] if keyList else ['space']
+    
+    def _wait(self, secs):
+        """Advance virtual time instead of sleeping."""
+        self.timebase.advance(secs)
+
+
+def run_simulated_session(config, model_type='sea', output_dir='data/raw', seed=None,
+                          tapper=None, user_id='simulated', export_csv=False):
+    """Run one complete simulated session.
+    
+    Args:
+        config: Configuration object
+        model_type: Type of model to use ('sea', 'bayes', 'bib')
+        output_dir: Directory to save output data
+        seed: Seed for the model's (global NumPy) and the default tapper's random numbers
+        tapper: Synthetic participant (defaults to SimulatedTapper seeded with ``seed``)
+        user_id: Subject/participant ID for data organization
+        export_csv: Also write the per-series CSV files next to the session archive
+    
+    Returns:
+        SimulatedExperimentRunner: Runner holding the session data, or None if the run failed
+    """
+    if seed is not None:
+        np.random.seed(seed)
+    if tapper is None:
+        tapper = SimulatedTapper(config.SPAN, seed=seed)
+    
+    runner = SimulatedExperimentRunner(config, model_type=model_type, output_dir=output_dir,
+                                       user_id=user_id, tapper=tapper, export_csv=export_csv)
+    return runner if runner.run() else None
@@ -0,0 +1,220 @@
+"""
+Parameter sweeps over simulated sessions.
+Runs one headless simulated session (see simulation.py) per parameter point
+and seed, summarises it with the analysis metrics and memoises the summary on
+disk under a hash of model, configuration and seed, so extending a sweep only
+simulates the new points.
+"""
+import os
+import io
+import json
+import hashlib
+import tempfile
+import contextlib
+from concurrent.futures import as_completed
+
+import numpy as np
+import pandas as pd
+
+from ..config import Config
+from ..analysis.metrics import calculate_correlation
+from ..analysis.parallel import make_executor, resolve_n_jobs
+
+# Config attributes a sweep may vary
+SWEEP_PARAMETERS = ('SPAN', 'SCALE', 'BAYES_N_HYPOTHESIS', 'BIB_L_MEMORY', 'STAGE1', 'STAGE2', 'BUFFER')
+
+# Parameters that only take integer values
+_INTEGER_PARAMETERS = ('BAYES_N_HYPOTHESIS', 'BIB_L_MEMORY', 'STAGE1', 'STAGE2', 'BUFFER')
+
+def parameter_grid(**values):
+    """Full factorial design.
+
+    Args:
+        **values: Config attribute -> sequence of values
+
+    Returns:
+        list: One parameter dict per combination
+    """
+    points = [{}]
+    for name, options in values.items():
+        points = [dict(point, **{name: value}) for point in points for value in options]
+    return points
+
+def random_design(n_points, ranges, seed=None, log_scale=()):
+    """Random design with independent uniform draws per parameter.
+
+    Integer parameters (e.g. BAYES_N_HYPOTHESIS) are drawn uniformly from
+    their inclusive integer range.
+
+    Args:
+        n_points: Number of points
+        ranges: Config attribute -> (low, high)
+        seed: Seed for the design
+        log_scale: Parameters drawn log-uniformly
+
+    Returns:
+        list: One parameter dict per point
+    """
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name, (low, high) in ranges.items():
+        if name in _INTEGER_PARAMETERS:
+            columns[name] = rng.integers(int(low), int(high) + 1, size=n_points)
+        elif name in log_scale:
+            columns[name] = np.exp(rng.uniform(np.log(low), np.log(high), size=n_points))
+        else:
+            columns[name] = rng.uniform(low, high, size=n_points)
+    return [{name: values[i].item() for name, values in columns.items()} for i in range(n_points)]
+
+def point_key(model_type, params, seed):
+    """Hash identifying a (model, configuration, seed) point in the cache.
+
+    The key covers every result-relevant Config field (see
+    Config.parameter_hash), not only the varied ones, so changing a default
+    does not return results simulated with the old value.
+    """
+    normalised = {}
+    for name, value in params.items():
+        if name not in SWEEP_PARAMETERS:
+            raise ValueError(f"Unknown sweep parameter: {name}")
+        normalised[name] = int(value) if name in _INTEGER_PARAMETERS else float(f"{value:.12g}")
+    payload = json.dumps([model_type, Config.from_dict(normalised).parameter_hash(), seed])
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+class SweepCache:
+    """On-disk memo of sweep results, one JSON file per point."""
+
+    def __init__(self, directory):
+        """Open (or create) a cache directory.
+
+        Args:
+            directory: Directory holding the cached results
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key))
+
+    def get(self, key):
+        """Cached result of a point, or None."""
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, result):
+        """Store the result of a point (atomically)."""
+        tmp_path = self._path(key) + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        os.replace(tmp_path, self._path(key))
+
+def summarize_session(runner):
+    """Summary metrics of a finished (simulated) session.
+
+    Args:
+        runner: ExperimentRunner after run()
+
+    Returns:
+        dict: Turn count, mean/SD of SE and ITI for both sides and the SE-ITI correlation
+    """
+    summary = {'n_turns': len(runner.player_tap)}
+    for name in ('stim_se', 'player_se', 'stim_iti', 'player_iti'):
+        values = np.asarray(getattr(runner, name), dtype=float)
+        summary[f"{name}_mean"] = float(np.mean(values)) if len(values) else float('nan')
+        summary[f"{name}_sd"] = float(np.std(values, ddof=1)) if len(values) > 1 else float('nan')
+
+    # Correlation of the stimulus SE with the following stimulus ITI
+    n = min(len(runner.stim_se), len(runner.stim_iti))
+    summary['stim_se_iti_corr'] = (float(calculate_correlation(runner.stim_se[:n], runner.stim_iti[:n]))
+                                   if n > 2 else float('nan'))
+    return summary
+
+def simulate_point(model_type, params, seed, quiet=True):
+    """Run and summarise one simulated session.
+
+    Args:
+        model_type: Type of model to use ('sea', 'bayes', 'bib')
+        params: Config attribute -> value
+        seed: Seed of the session
+        quiet: Suppress the runner's console output
+
+    Returns:
+        dict: Summary metrics (see summarize_session), or {'failed': True}
+    """
+    from .simulation import run_simulated_session
+
+    config = Config.from_dict(params)
+
+    output = io.StringIO() if quiet else None
+    with tempfile.TemporaryDirectory() as output_dir:
+        with contextlib.redirect_stdout(output) if quiet else contextlib.nullcontext():
+            runner = run_simulated_session(config, model_type, output_dir, seed=seed)
+    if runner is None:
+        return {'failed': True}
+    return summarize_session(runner)
+
+def run_sweep(points, model_type='sea', seeds=(0,), cache_dir=None, n_jobs=1, quiet=True):
+    """Simulate every parameter point with every seed.
+
+    Points already in the cache are not simulated again; new results are
+    written to the cache as soon as they finish, in completion order. If a
+    point fails, the remaining points still run and are cached before its
+    exception is raised.
+
+    Args:
+        points: Parameter dicts (see parameter_grid and random_design)
+        model_type: Type of model to use ('sea', 'bayes', 'bib')
+        seeds: Seeds to run for every point
+        cache_dir: Directory of the result cache (None: no caching)
+        n_jobs: Worker processes (None / -1: one per CPU core)
+        quiet: Suppress the runners' console output
+
+    Returns:
+        DataFrame: One row per (point, seed) with the parameters, 'seed',
+            'cached' and the summary metrics
+    """
+    cache = SweepCache(cache_dir) if cache_dir is not None else None
+    tasks = [(dict(point), seed, point_key(model_type, point, seed))
+             for point in points for seed in seeds]
+
+    results = {}
+    pending = {}
+    for params, seed, key in tasks:
+        if key in results or key in pending:
+            continue
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            results[key] = (cached, True)
+        else:
+            pending[key] = (params, seed)
+
+    n_workers = min(resolve_n_jobs(n_jobs), max(1, len(pending)))
+    errors = []
+    with make_executor(n_workers) as executor:
+        futures = {executor.submit(simulate_point, model_type, params, seed, quiet): key
+                   for key, (params, seed) in pending.items()}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                errors.append(e)
+                continue
+            key = futures[future]
+            if cache is not None:
+                cache.put(key, result)
+            results[key] = (result, False)
+    if errors:
+        # Every other point has finished and is cached by now
+        raise errors[0]
+
+    rows = []
+    for params, seed, key in tasks:
+        result, cached = results[key]
+        rows.append(dict(params, seed=seed, cached=cached, **result))
+    return pd.DataFrame(rows)
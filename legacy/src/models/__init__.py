@@ -5,5 +5,9 @@ from .base import BaseModel
 from .sea import SEAModel
 from .bayes import BayesModel
 from .bib import BIBModel
+from .batch import BatchSEAModel, BatchBayesModel, BatchBIBModel
 
-__all__ = ['BaseModel', 'SEAModel', 'BayesModel', 'BIBModel']
\ No newline at end of file
+__all__ = [
+    'BaseModel', 'SEAModel', 'BayesModel', 'BIBModel',
+    'BatchSEAModel', 'BatchBayesModel', 'BatchBIBModel'
+]
\ No newline at end of file
@@ -15,6 +15,7 @@ class BaseModel(ABC):
         """
         self.config = config
         self.name = self.__class__.__name__
+        self._prepared = None  # Precomputed next inference (see prepare)
     
     @abstractmethod
     def inference(self, se):
@@ -28,6 +29,18 @@ class BaseModel(ABC):
         """
         pass
     
+    def prepare(self):
+        """Precompute the next inference before its SE is known.
+        
+        Called off the response path (e.g. while waiting for the player's
+        tap). Models that support it precompute everything that does not
+        depend on the SE and pre-sample their random draws, so the next
+        inference(se) only applies the SE (and may defer its state update
+        until the state is next read). The result of inference() has the
+        same distribution either way; models without speculation ignore this.
+        """
+        pass
+    
     def reset(self):
         """Reset model state to initial conditions."""
         pass
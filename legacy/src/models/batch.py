@@ -0,0 +1,237 @@
+"""
+Batched model implementations for Monte-Carlo simulation.
+Each model object holds the state of N independent agents as arrays and
+advances all of them with a single inference_batch call.
+"""
+import numpy as np
+from .base import BaseModel
+from .bayes import BayesModel
+
+
+def _sample_rows(p):
+    """Draw one categorical index per row of a probability matrix.
+    
+    Args:
+        p: Array of shape (n_agents, n_categories), rows summing to 1
+    
+    Returns:
+        numpy.ndarray: Sampled column index for each row
+    """
+    cdf = np.cumsum(p, axis=1)
+    u = np.random.random(p.shape[0]) * cdf[:, -1]
+    idx = (cdf <= u[:, None]).sum(axis=1)
+    return np.minimum(idx, p.shape[1] - 1)
+
+
+def _logsumexp_rows(a):
+    """Row-wise numerically stable log(sum(exp(a)))."""
+    a_max = np.max(a, axis=1, keepdims=True)
+    return a_max + np.log(np.sum(np.exp(a - a_max), axis=1, keepdims=True))
+
+
+class BatchSEAModel(BaseModel):
+    """SEA model (see SEAModel) advancing N independent agents at once."""
+    
+    def __init__(self, config, n_agents):
+        """Initialize batched SEA model.
+        
+        Args:
+            config: Configuration object
+            n_agents: Number of independent agents
+        """
+        self.n_agents = int(n_agents)
+        super().__init__(config)
+        self.reset()
+    
+    def inference(self, se):
+        """Alias of inference_batch so the BaseModel interface still holds."""
+        return self.inference_batch(se)
+    
+    def prepare(self):
+        """Batched inference is not speculated."""
+        pass
+    
+    def inference_batch(self, se):
+        """Adjust timing of every agent based on its average synchronization error.
+        
+        Args:
+            se: Synchronization errors, one per agent
+        
+        Returns:
+            numpy.ndarray: Time to wait before next tap for each agent (seconds)
+        """
+        self.n_updates += 1
+        self.modify += np.asarray(se, dtype=float)
+        avg_modify = self.modify / self.n_updates
+        return np.random.normal(
+            (self.config.SPAN / 2) - avg_modify,
+            self.config.SCALE
+        )
+    
+    def reset(self):
+        """Reset model state to initial conditions."""
+        self.n_updates = 0
+        self.modify = np.zeros(self.n_agents)
+    
+    def get_state(self):
+        """Get current model state for logging/analysis.
+        
+        Returns:
+            dict: Current state of the model
+        """
+        return {
+            "name": self.name,
+            "n_agents": self.n_agents,
+            "n_updates": self.n_updates,
+            "cumulative_modify": self.modify.tolist(),
+            "average_modify": (self.modify / self.n_updates).tolist()
+                              if self.n_updates else [0] * self.n_agents
+        }
+
+
+class BatchBayesModel(BayesModel):
+    """Bayesian model advancing N independent agents at once.
+    
+    ``likelihood`` and ``h_prov`` have shape (n_agents, n_hypothesis); row i
+    is the state of agent i.
+    """
+    
+    def __init__(self, config, n_agents, n_hypothesis=20, x_min=-3, x_max=3,
+                 sigma=0.3, log_domain=False):
+        """Initialize batched Bayesian model.
+        
+        Args:
+            config: Configuration object
+            n_agents: Number of independent agents
+            n_hypothesis: Number of hypotheses in the model
+            x_min: Minimum value for hypothesis space
+            x_max: Maximum value for hypothesis space
+            sigma: Standard deviation of the Gaussian likelihood and prediction noise
+            log_domain: Keep the posterior in log space (see BayesModel)
+        """
+        self.n_agents = int(n_agents)
+        super().__init__(config, n_hypothesis, x_min, x_max, sigma=sigma,
+                         log_domain=log_domain)
+        self.likelihood = np.tile(self.likelihood, (self.n_agents, 1))
+        self.reset()
+    
+    def inference(self, se):
+        """Alias of inference_batch so the BaseModel interface still holds."""
+        return self.inference_batch(se)
+    
+    def prepare(self):
+        """Batched inference is not speculated."""
+        pass
+    
+    def inference_batch(self, se):
+        """Perform Bayesian inference for every agent.
+        
+        Args:
+            se: Synchronization errors, one per agent
+        
+        Returns:
+            numpy.ndarray: Time to wait before next tap for each agent (seconds)
+        """
+        se = np.asarray(se, dtype=float)[:, None]
+        
+        # Bayesian learning, row-wise
+        if self.log_domain:
+            log_post = self._log_likelihood(se) + self.log_h_prov
+            log_post -= _logsumexp_rows(log_post)
+            self.log_h_prov = log_post
+            self.h_prov = np.exp(log_post)
+        else:
+            post_prov = self._likelihood_pdf(se) * self.h_prov
+            post_prov /= np.sum(post_prov, axis=1, keepdims=True)
+            self.h_prov = post_prov
+        
+        # Prediction based on one sampled hypothesis per agent
+        idx = _sample_rows(self.h_prov)
+        prediction = np.random.normal(
+            loc=self.likelihood[np.arange(self.n_agents), idx],
+            scale=self.sigma
+        )
+        
+        return (self.config.SPAN / 2) - prediction
+    
+    def reset(self):
+        """Reset model state to initial conditions."""
+        shape = (self.n_agents, self.n_hypothesis)
+        self.h_prov = np.full(shape, 1.0 / self.n_hypothesis)
+        self.log_h_prov = np.full(shape, -np.log(self.n_hypothesis))
+    
+    def get_state(self):
+        """Get current model state for logging/analysis.
+        
+        Returns:
+            dict: Current state of the model including hypotheses
+        """
+        state = super().get_state()
+        state["n_agents"] = self.n_agents
+        return state
+
+
+class BatchBIBModel(BatchBayesModel):
+    """BIB model advancing N independent agents at once.
+    
+    Each agent has its own hypothesis grid (rows of ``likelihood``) and its
+    own inverse-Bayesian memory (rows of ``memory``).
+    """
+    
+    def __init__(self, config, n_agents, n_hypothesis=20, l_memory=1, x_min=-3,
+                 x_max=3, sigma=0.3, log_domain=False):
+        """Initialize batched BIB model.
+        
+        Args:
+            config: Configuration object
+            n_agents: Number of independent agents
+            n_hypothesis: Number of hypotheses in the model
+            l_memory: Memory length for inverse Bayesian learning (0 for regular Bayesian)
+            x_min: Minimum value for hypothesis space
+            x_max: Maximum value for hypothesis space
+            sigma: Standard deviation of the Gaussian likelihood and prediction noise
+            log_domain: Keep the posterior in log space (see BayesModel)
+        """
+        self.l_memory = int(l_memory)
+        super().__init__(config, n_agents, n_hypothesis, x_min, x_max,
+                         sigma=sigma, log_domain=log_domain)
+    
+    def inference_batch(self, se):
+        """Perform BIB inference for every agent.
+        
+        Args:
+            se: Synchronization errors, one per agent
+        
+        Returns:
+            numpy.ndarray: Time to wait before next tap for each agent (seconds)
+        """
+        if self.l_memory > 0:
+            # Same rule as BIBModel, applied to every row at once
+            new_hypo = np.mean(self.memory, axis=1)
+            inv_h_prov = (1 - self.h_prov) / (self.n_hypothesis - 1)
+            idx = _sample_rows(inv_h_prov)
+            self.likelihood[np.arange(self.n_agents), idx] = new_hypo
+            
+            self.memory[:, :-1] = self.memory[:, 1:]
+            self.memory[:, -1] = se
+        
+        return super().inference_batch(se)
+    
+    def reset(self):
+        """Reset model state to initial conditions."""
+        super().reset()
+        if self.l_memory > 0:
+            self.memory = np.random.normal(
+                loc=0.0, scale=self.scale, size=(self.n_agents, self.l_memory)
+            )
+    
+    def get_state(self):
+        """Get current model state for logging/analysis.
+        
+        Returns:
+            dict: Current state of the model including memory
+        """
+        state = super().get_state()
+        if self.l_memory > 0:
+            state["memory"] = self.memory.tolist()
+        return state
@@ -3,13 +3,90 @@ Bayesian inference model for cooperative tapping task.
 Extracted and refactored from the original bayes.py
 """
 import numpy as np
-from scipy.stats import norm
 from .base import BaseModel
 
+
+def _logsumexp(a):
+    """Numerically stable log(sum(exp(a))) for a 1-D array."""
+    a_max = np.max(a)
+    return a_max + np.log(np.sum(np.exp(a - a_max)))
+
+
+# Largest hypothesis grid prepare() speculates on. Solving the choice thresholds
+# costs O(n_hypothesis²) per bisection step (about 2 ms up to 32 hypotheses, but
+# seconds for large grids), and prepare() runs while the tap is awaited, so
+# larger models skip the speculation and use the plain inference path.
+LOOKAHEAD_MAX_HYPOTHESES = 32
+
+
+def _choice_thresholds(log_weight, slope, uniform, bound=1e4, n_iter=70):
+    """SEs at which a prepared hypothesis draw moves on to the next hypothesis.
+    
+    With the hypotheses in ascending order (``slope`` ascending), the
+    posterior puts more mass on larger hypotheses the larger the SE, so the
+    cumulative probability F_k(se) of the first k+1 hypotheses decreases
+    with the SE. Inverse-CDF sampling with the uniform draw u picks the first
+    hypothesis with F_k(se) > u, i.e. hypothesis number
+    ``thresholds.searchsorted(se, side='right')`` where F_k(thresholds[k]) = u.
+    The thresholds are found by bisection, all at once.
+    
+    Args:
+        log_weight: SE-independent log-posterior terms, hypotheses ascending
+        slope: Coefficients of the SE in the log-posterior, ascending
+        uniform: Uniform draw of the hypothesis choice
+        bound: SEs beyond +-bound are treated as infinite
+        n_iter: Bisection steps (enough to reach float resolution from +-bound)
+    
+    Returns:
+        numpy.ndarray: n_hypothesis - 1 nondecreasing thresholds
+    """
+    k = np.arange(len(slope) - 1)
+    
+    def below(se):
+        # Whether F_k(se[k]) <= u, for every k
+        log_post = se[:, None] * slope + log_weight
+        log_post -= log_post.max(axis=1, keepdims=True)
+        cdf = np.exp(log_post).cumsum(axis=1)
+        return cdf[k, k] <= uniform * cdf[:, -1]
+    
+    lo = np.full(len(k), -bound)
+    hi = np.full(len(k), bound)
+    always = below(lo)
+    never = ~below(hi)
+    for _ in range(n_iter):
+        mid = 0.5 * (lo + hi)
+        is_below = below(mid)
+        hi = np.where(is_below, mid, hi)
+        lo = np.where(is_below, lo, mid)
+    hi[always] = -np.inf
+    hi[never] = np.inf
+    return np.maximum.accumulate(hi)
+
+
+def _committed_state(name):
+    """Attribute of the posterior state; a pending prepared inference is applied before reads."""
+    attr = '_' + name
+    
+    def get(self):
+        if self._pending is not None:
+            self._commit()
+        return getattr(self, attr)
+    
+    def set(self, value):
+        setattr(self, attr, value)
+    
+    return property(get, set)
+
+
 class BayesModel(BaseModel):
     """Bayesian inference model for cooperative tapping."""
     
-    def __init__(self, config, n_hypothesis=20, x_min=-3, x_max=3):
+    likelihood = _committed_state('likelihood')
+    h_prov = _committed_state('h_prov')
+    log_h_prov = _committed_state('log_h_prov')
+    
+    def __init__(self, config, n_hypothesis=20, x_min=-3, x_max=3, sigma=0.3,
+                 log_domain=False):
         """Initialize Bayesian model.
         
         Args:
@@ -17,16 +94,28 @@ class BayesModel(BaseModel):
             n_hypothesis: Number of hypotheses in the model
             x_min: Minimum value for hypothesis space
             x_max: Maximum value for hypothesis space
+            sigma: Standard deviation of the Gaussian likelihood and prediction noise
+            log_domain: Keep the posterior in log space and normalise with
+                logsumexp, so wide hypothesis ranges and large grids cannot
+                underflow to an all-zero posterior
         """
         super().__init__(config)
+        self._pending = None  # Prepared inference whose SE is not in the posterior yet
         self.n_hypothesis = int(n_hypothesis)
         self.x_min = x_min
         self.x_max = x_max
         self.scale = config.SCALE
+        self.sigma = sigma
+        self.log_domain = bool(log_domain)
+        
+        # Gaussian kernel constants, computed once instead of per hypothesis and turn
+        self._norm_const = 1.0 / (sigma * np.sqrt(2.0 * np.pi))
+        self._inv_two_var = 0.5 / (sigma * sigma)
         
         # Initialize likelihood and prior probability
         self.likelihood = np.linspace(x_min, x_max, n_hypothesis)
         self.h_prov = np.ones(self.n_hypothesis) / self.n_hypothesis
+        self.log_h_prov = np.full(self.n_hypothesis, -np.log(self.n_hypothesis))
     
     def inference(self, se):
         """Perform Bayesian inference using synchronization error.
@@ -37,24 +126,144 @@ class BayesModel(BaseModel):
         Returns:
             float: Time to wait before next tap (seconds)
         """
+        if self._prepared is not None:
+            return self._finish_inference(se)
+        
         # Bayesian learning
-        post_prov = np.array([norm(self.likelihood[i], 0.3).pdf(se) 
-                             for i in range(self.n_hypothesis)]) * self.h_prov
-        post_prov /= np.sum(post_prov)
-        self.h_prov = post_prov
+        if self.log_domain:
+            log_post = self._log_likelihood(se) + self.log_h_prov
+            log_post -= _logsumexp(log_post)
+            self.log_h_prov = log_post
+            self.h_prov = np.exp(log_post)
+        else:
+            post_prov = self._likelihood_pdf(se) * self.h_prov
+            post_prov /= np.sum(post_prov)
+            self.h_prov = post_prov
         
         # Prediction based on hypothesis
         prediction = np.random.normal(
             loc=np.random.choice(self.likelihood, p=self.h_prov), 
-            scale=0.3
+            scale=self.sigma
         )
         
         # Return time to wait
         return (self.config.SPAN / 2) - prediction
     
+    def prepare(self):
+        """Precompute the posterior up to its SE term (see BaseModel.prepare).
+        
+        Skipped for more than LOOKAHEAD_MAX_HYPOTHESES hypotheses.
+        """
+        if self.n_hypothesis > LOOKAHEAD_MAX_HYPOTHESES:
+            return
+        self._prepared = self._speculate(self.likelihood)
+    
+    def _speculate(self, hypotheses):
+        """Prepare the next inference for the given hypotheses up to its SE.
+        
+        The log-posterior after observing se is
+        log h - (se - x)^2 / 2sigma^2 = log h - x^2 / 2sigma^2 + se * x / sigma^2 + const,
+        so only the slope term depends on the SE. The draws for the hypothesis
+        choice and the prediction noise are made in the order inference() makes
+        them, and the SEs at which the drawn hypothesis changes are solved for
+        (see _choice_thresholds), so the interval of every hypothesis is known
+        in advance.
+        
+        The thresholds need the hypotheses in ascending order, so the choice is
+        made by inverse-CDF sampling over the sorted hypotheses. For the Bayes
+        model's fixed, ascending grid this is the draw inference() makes. After
+        a BIB replacement the grid is generally unsorted, and a seeded session
+        with lookahead then draws from the same distribution as one without,
+        but not the same values.
+        
+        Args:
+            hypotheses: Hypothesis values the next inference uses
+        
+        Returns:
+            tuple: (thresholds, intervals, hypotheses, log weights, slopes)
+        """
+        if self.log_domain:
+            log_prior = self.log_h_prov
+        else:
+            with np.errstate(divide='ignore'):
+                log_prior = np.log(self.h_prov)
+        log_weight = log_prior - hypotheses * hypotheses * self._inv_two_var
+        slope = hypotheses * (2.0 * self._inv_two_var)
+        uniform = np.random.random_sample()
+        noise = np.random.standard_normal()
+        
+        order = np.argsort(hypotheses, kind='stable')
+        thresholds = _choice_thresholds(log_weight[order], slope[order], uniform)
+        intervals = (self.config.SPAN / 2) - (hypotheses[order] + self.sigma * noise)
+        return thresholds, intervals, hypotheses, log_weight, slope
+    
+    def _finish_inference(self, se):
+        """Complete a prepared inference with the observed SE.
+        
+        Only looks up the precomputed interval; the posterior update is kept
+        pending and applied by _commit() when the state is next read (at the
+        latest by the next prepare()).
+        
+        Args:
+            se: Synchronization error
+            
+        Returns:
+            float: Time to wait before next tap (seconds)
+        """
+        thresholds, intervals, hypotheses, log_weight, slope = self._prepared
+        self._prepared = None
+        self._pending = (hypotheses, log_weight, slope, se)
+        return intervals[thresholds.searchsorted(se, side='right')]
+    
+    def _commit(self):
+        """Apply the SE of the last prepared inference to the posterior."""
+        hypotheses, log_weight, slope, se = self._pending
+        self._pending = None
+        log_post = slope * se
+        log_post += log_weight
+        log_post -= _logsumexp(log_post)
+        self._likelihood = hypotheses
+        self._h_prov = np.exp(log_post)
+        if self.log_domain:
+            self._log_h_prov = log_post
+    
+    def _likelihood_pdf(self, se):
+        """Evaluate the Gaussian likelihood of an SE under every hypothesis.
+        
+        Equivalent to ``norm(self.likelihood[i], self.sigma).pdf(se)`` for each
+        hypothesis, evaluated as a single array expression.
+        
+        Args:
+            se: Synchronization error
+            
+        Returns:
+            numpy.ndarray: Likelihood of ``se`` for each hypothesis
+        """
+        diff = se - self.likelihood
+        return self._norm_const * np.exp(-(diff * diff) * self._inv_two_var)
+    
+    def _log_likelihood(self, se):
+        """Evaluate the Gaussian log-likelihood of an SE under every hypothesis.
+        
+        The normalisation constant is omitted because it cancels when the
+        posterior is normalised.
+        
+        Args:
+            se: Synchronization error
+            
+        Returns:
+            numpy.ndarray: Unnormalised log-likelihood for each hypothesis
+        """
+        diff = se - self.likelihood
+        return -(diff * diff) * self._inv_two_var
+    
     def reset(self):
         """Reset model state to initial conditions."""
+        if self._pending is not None:
+            self._commit()  # Keeps the hypotheses of the last inference, as without lookahead
         self.h_prov = np.ones(self.n_hypothesis) / self.n_hypothesis
+        self.log_h_prov = np.full(self.n_hypothesis, -np.log(self.n_hypothesis))
+        self._prepared = None
     
     def get_state(self):
         """Get current model state for logging/analysis.
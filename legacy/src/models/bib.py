@@ -3,12 +3,15 @@ Bayesian-Inverse Bayesian (BIB) inference model for cooperative tapping task.
 Based on Gunji's Bayesian-Inverse Bayesian inference theory.
 """
 import numpy as np
-from .bayes import BayesModel
+from .bayes import BayesModel, LOOKAHEAD_MAX_HYPOTHESES, _committed_state
 
 class BIBModel(BayesModel):
     """Bayesian-Inverse Bayesian inference model."""
     
-    def __init__(self, config, n_hypothesis=20, l_memory=1, x_min=-3, x_max=3):
+    memory = _committed_state('memory')
+    
+    def __init__(self, config, n_hypothesis=20, l_memory=1, x_min=-3, x_max=3,
+                 sigma=0.3, log_domain=False):
         """Initialize BIB model.
         
         Args:
@@ -17,8 +20,11 @@ class BIBModel(BayesModel):
             l_memory: Memory length for inverse Bayesian learning (0 for regular Bayesian)
             x_min: Minimum value for hypothesis space
             x_max: Maximum value for hypothesis space
+            sigma: Standard deviation of the Gaussian likelihood and prediction noise
+            log_domain: Keep the posterior in log space (see BayesModel)
         """
-        super().__init__(config, n_hypothesis, x_min, x_max)
+        super().__init__(config, n_hypothesis, x_min, x_max, sigma=sigma,
+                         log_domain=log_domain)
         self.l_memory = int(l_memory)
         
         # Initialize memory for inverse Bayesian learning
@@ -34,6 +40,11 @@ class BIBModel(BayesModel):
         Returns:
             float: Time to wait before next tap (seconds)
         """
+        if self._prepared is not None:
+            # The inverse Bayesian replacement was made in prepare(); the memory
+            # is updated together with the posterior (see _commit)
+            return self._finish_inference(se)
+        
         # Inverse Bayesian learning
         if self.l_memory > 0:
             # Calculate new hypothesis based on memory
@@ -52,6 +63,32 @@ class BIBModel(BayesModel):
         # Continue with regular Bayesian inference
         return super().inference(se)
     
+    def prepare(self):
+        """Precompute the inverse Bayesian replacement and the posterior (see BaseModel.prepare).
+        
+        The replacement depends only on the memory and the current posterior,
+        so it is drawn here in full; it takes effect in the next inference().
+        Skipped for more than LOOKAHEAD_MAX_HYPOTHESES hypotheses.
+        """
+        if self.n_hypothesis > LOOKAHEAD_MAX_HYPOTHESES:
+            return
+        hypotheses = self.likelihood
+        if self.l_memory > 0:
+            inv_h_prov = (1 - self.h_prov) / (self.n_hypothesis - 1)
+            cdf = np.cumsum(inv_h_prov)
+            cdf /= cdf[-1]
+            hypotheses = hypotheses.copy()
+            hypotheses[cdf.searchsorted(np.random.random_sample(), side='right')] = np.mean(self.memory)
+        self._prepared = self._speculate(hypotheses)
+    
+    def _commit(self):
+        """Apply the last prepared inference and add its SE to the memory."""
+        se = self._pending[-1]
+        super()._commit()
+        if self.l_memory > 0:
+            self._memory[:-1] = self._memory[1:]
+            self._memory[-1] = se
+    
     def reset(self):
         """Reset model state to initial conditions."""
         super().reset()
@@ -40,6 +40,11 @@ class SEAModel(BaseModel):
         # Calculate average modification
         avg_modify = self.modify / len(self.se_history)
         
+        # Speculated: the random part was drawn in prepare()
+        if self._prepared is not None:
+            base_interval, self._prepared = self._prepared, None
+            return base_interval - avg_modify
+        
         # Generate random interval with normal distribution
         random_interval = np.random.normal(
             (self.config.SPAN / 2) - avg_modify, 
@@ -48,10 +53,15 @@ class SEAModel(BaseModel):
         
         return random_interval
     
+    def prepare(self):
+        """Pre-sample the random interval around SPAN/2 (see BaseModel.prepare)."""
+        self._prepared = (self.config.SPAN / 2) + np.random.normal(0.0, self.config.SCALE)
+    
     def reset(self):
         """Reset model state to initial conditions."""
         self.se_history = []
         self.modify = 0
+        self._prepared = None
     
     def get_state(self):
         """Get current model state for logging/analysis.
@@ -0,0 +1,512 @@
+"""
+Tests for analysis tools.
+"""
+import time
+import pytest
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from src.analysis.network import (
+    create_recurrence_network, pairwise_distances, recurrence_threshold,
+    calculate_network_metrics, fit_degree_distribution, plot_recurrence_matrix,
+    SlidingRecurrenceWindow, embed_time_series, analyze_sliding_window,
+    analyze_recurrence_network, analyze_recurrence_networks
+)
+from src.analysis.parameter_estimation import (
+    prctile, autocorr, bootstrap_ci, estimate_parameters_from_human_data
+)
+from src.analysis import model_fitting
+from src.analysis.online import RunningSeriesStats, OnlineMetrics
+from src.analysis.metrics import (
+    calculate_iti, calculate_se, calculate_variations,
+    pad_sessions, iti_array, cross_iti_array, se_array
+)
+from src.analysis.model_fitting import (
+    observations_from_taps, session_observations, session_log_likelihood, fit_model,
+    fit_participants
+)
+from src.models import SEAModel, BayesModel, BIBModel
+
+
+def reference_recurrence_network(time_series, epsilon=None, recurrence_rate=0.05,
+                                 delay=1, embedding_dim=1):
+    """Original double-loop implementation, kept as a regression reference."""
+    if embedding_dim > 1:
+        vectors = []
+        for i in range(len(time_series) - (embedding_dim-1)*delay):
+            vectors.append([time_series[i + j*delay] for j in range(embedding_dim)])
+        states = np.array(vectors)
+    else:
+        states = np.array(time_series).reshape(-1, 1)
+    
+    N = len(states)
+    distances = np.zeros((N, N))
+    for i in range(N):
+        for j in range(i+1, N):
+            distances[i, j] = distances[j, i] = np.linalg.norm(states[i] - states[j])
+    
+    if epsilon is None:
+        sorted_distances = np.sort(distances[np.triu_indices(N, k=1)])
+        epsilon = sorted_distances[int(recurrence_rate * len(sorted_distances))]
+    
+    adjacency_matrix = np.zeros((N, N))
+    adjacency_matrix[distances <= epsilon] = 1
+    np.fill_diagonal(adjacency_matrix, 0)
+    return adjacency_matrix, epsilon
+
+
+class TestRecurrenceNetwork:
+    """Test suite for recurrence network construction."""
+    
+    @pytest.fixture
+    def time_series(self):
+        rng = np.random.default_rng(0)
+        return np.cumsum(rng.normal(0, 0.05, 120)) + 1.0
+    
+    @pytest.mark.parametrize('embedding_dim,delay', [(1, 1), (2, 1), (3, 2)])
+    def test_matches_reference(self, time_series, embedding_dim, delay):
+        """Test vectorized construction gives identical adjacency and epsilon."""
+        adjacency, epsilon = create_recurrence_network(
+            time_series, recurrence_rate=0.05, delay=delay, embedding_dim=embedding_dim
+        )
+        ref_adjacency, ref_epsilon = reference_recurrence_network(
+            list(time_series), recurrence_rate=0.05, delay=delay, embedding_dim=embedding_dim
+        )
+        assert epsilon == ref_epsilon
+        assert np.array_equal(adjacency, ref_adjacency)
+    
+    @pytest.mark.parametrize('embedding_dim', [2, 3])
+    def test_matches_reference_on_rounded_data(self, embedding_dim):
+        """Test identical adjacency on ms-rounded data, where many distances tie at epsilon."""
+        for seed in range(20):
+            series = np.round(np.random.default_rng(seed).normal(0.5, 0.05, 80), 3)
+            adjacency, epsilon = create_recurrence_network(
+                series, recurrence_rate=0.05, embedding_dim=embedding_dim
+            )
+            ref_adjacency, ref_epsilon = reference_recurrence_network(
+                list(series), recurrence_rate=0.05, embedding_dim=embedding_dim
+            )
+            assert epsilon == ref_epsilon
+            assert np.array_equal(adjacency, ref_adjacency)
+            sparse, _ = create_recurrence_network(
+                series, recurrence_rate=0.05, embedding_dim=embedding_dim, sparse=True
+            )
+            assert np.array_equal(sparse.toarray(), ref_adjacency)
+    
+    def test_fixed_epsilon(self, time_series):
+        """Test a given epsilon is used as-is."""
+        adjacency, epsilon = create_recurrence_network(time_series, epsilon=0.1)
+        ref_adjacency, _ = reference_recurrence_network(time_series, epsilon=0.1)
+        assert epsilon == 0.1
+        assert np.array_equal(adjacency, ref_adjacency)
+    
+    def test_blocked_distances(self, time_series):
+        """Test small memory budgets give the same distance matrix."""
+        states = np.column_stack([time_series[:-1], time_series[1:]])
+        full = pairwise_distances(states)
+        blocked = pairwise_distances(states, block_bytes=1)
+        assert np.array_equal(full, blocked)
+        assert np.array_equal(full, full.T)
+        assert np.all(np.diag(full) == 0)
+    
+    def test_threshold_selects_order_statistic(self):
+        """Test partition-based threshold equals the sorted-order value."""
+        distances = pairwise_distances(np.arange(10, dtype=float).reshape(-1, 1))
+        flat = np.sort(distances[np.triu_indices(10, k=1)])
+        for rate in [0.0, 0.05, 0.5, 0.99]:
+            assert recurrence_threshold(distances, rate) == flat[int(rate * len(flat))]
+    
+    
+    @pytest.mark.parametrize('embedding_dim', [1, 2, 3])
+    def test_sparse_matches_dense(self, time_series, embedding_dim):
+        """Test KD-tree sparse mode gives the same network as the dense engine."""
+        dense, epsilon = create_recurrence_network(time_series, embedding_dim=embedding_dim)
+        sparse, sparse_epsilon = create_recurrence_network(
+            time_series, embedding_dim=embedding_dim, sparse=True
+        )
+        assert sp.issparse(sparse) and sparse.format == 'csr'
+        assert sparse_epsilon == epsilon
+        assert np.array_equal(sparse.toarray(), dense)
+        
+        fixed, _ = create_recurrence_network(time_series, epsilon=0.05, sparse=True)
+        assert np.array_equal(fixed.toarray(), create_recurrence_network(time_series, epsilon=0.05)[0])
+    
+    def test_sparse_downstream(self, time_series, tmp_path):
+        """Test metrics, degree fit and plotting accept sparse adjacency."""
+        dense, _ = create_recurrence_network(time_series, recurrence_rate=0.1, embedding_dim=2)
+        sparse, _ = create_recurrence_network(time_series, recurrence_rate=0.1,
+                                              embedding_dim=2, sparse=True)
+        
+        dense_metrics = calculate_network_metrics(dense)
+        sparse_metrics = calculate_network_metrics(sparse)
+        for key, value in dense_metrics.items():
+            assert np.isclose(sparse_metrics[key], value, equal_nan=True), key
+        
+        dense_fit = fit_degree_distribution(dense)
+        sparse_fit = fit_degree_distribution(sparse)
+        assert sparse_fit['best_fit'] == dense_fit['best_fit']
+        assert np.isclose(sparse_fit['power_law_alpha'], dense_fit['power_law_alpha'], equal_nan=True)
+        
+        output_path = tmp_path / 'matrix.png'
+        plot_recurrence_matrix(sparse, output_path=str(output_path))
+        assert output_path.exists()
+    
+    @pytest.mark.parametrize('recurrence_rate', [0.02, 0.1, 0.5])
+    def test_csgraph_metrics_match_networkx(self, time_series, recurrence_rate):
+        """Test the csgraph backend against the NetworkX reference, including disconnected graphs."""
+        adjacency, _ = create_recurrence_network(time_series, recurrence_rate=recurrence_rate,
+                                                 embedding_dim=2)
+        metrics = calculate_network_metrics(adjacency)
+        reference = calculate_network_metrics(adjacency, backend='networkx')
+        assert metrics.keys() == reference.keys()
+        for key, value in reference.items():
+            assert np.isclose(metrics[key], value, equal_nan=True), key
+    
+    def test_unknown_metrics_backend(self):
+        """Test that an unknown metrics backend is rejected."""
+        with pytest.raises(ValueError):
+            calculate_network_metrics(np.zeros((3, 3)), backend='igraph')
+    
+    @pytest.mark.parametrize('epsilon', [None, 0.05])
+    @pytest.mark.parametrize('embedding_dim', [1, 3])
+    @pytest.mark.parametrize('step', [1, 7, 40])
+    def test_sliding_window_matches_rebuild(self, time_series, epsilon, embedding_dim, step):
+        """Test the incremental window equals a from-scratch network for every position."""
+        window_size = 30
+        states = embed_time_series(time_series, 1, embedding_dim)
+        window = SlidingRecurrenceWindow(states, window_size - (embedding_dim - 1), epsilon)
+        for i in range(0, len(time_series) - window_size + 1, step):
+            window.slide(i)
+            expected, expected_epsilon = create_recurrence_network(
+                time_series[i:i+window_size], epsilon, embedding_dim=embedding_dim
+            )
+            assert window.epsilon == expected_epsilon
+            assert np.array_equal(window.ordered_adjacency(), expected)
+            assert np.array_equal(window.degrees, np.count_nonzero(window.adjacency, axis=1))
+    
+    @pytest.mark.parametrize('recurrence_rate', [0.05, 0.3])
+    def test_sliding_window_threshold_with_ties(self, time_series, recurrence_rate):
+        """Test the bucketed threshold on a series with many equal distances."""
+        quantized = np.round(np.asarray(time_series) * 4) / 4
+        states = embed_time_series(quantized, 1, 1)
+        window = SlidingRecurrenceWindow(states, 25, recurrence_rate=recurrence_rate)
+        for i in list(range(0, len(quantized) - 25 + 1, 3)) + [2, 60]:
+            window.slide(i)
+            expected, expected_epsilon = create_recurrence_network(
+                quantized[i:i+25], recurrence_rate=recurrence_rate
+            )
+            assert window.epsilon == expected_epsilon
+            assert np.array_equal(window.ordered_adjacency(), expected)
+            assert np.array_equal(window.degrees, np.count_nonzero(window.adjacency, axis=1))
+    
+    def test_sliding_window_cost_scales_with_step(self):
+        """Test a short slide costs a small fraction of a rebuild and needs no copy."""
+        states = np.random.default_rng(0).normal(size=(1200, 2))
+        window = SlidingRecurrenceWindow(states, 1000)
+        start = time.perf_counter()
+        window.slide(0)
+        rebuild = time.perf_counter() - start
+        start = time.perf_counter()
+        for i in range(1, 21):
+            window.slide(i)
+        assert (time.perf_counter() - start) / 20 < rebuild / 20
+        assert np.shares_memory(window.ordered_adjacency(), window.adjacency)
+    
+    def test_sliding_window_analysis(self, time_series):
+        """Test incremental and sparse sliding-window analysis agree."""
+        dense = analyze_sliding_window(time_series, window_size=40, step=5, embedding_dim=2)
+        sparse = analyze_sliding_window(time_series, window_size=40, step=5, embedding_dim=2,
+                                        sparse=True)
+        assert len(dense) == (len(time_series) - 40) // 5 + 1
+        assert list(dense.columns) == list(sparse.columns)
+        for column in dense.columns:
+            if column == 'best_fit':
+                assert (dense[column] == sparse[column]).all()
+            else:
+                assert np.allclose(dense[column], sparse[column], equal_nan=True), column
+
+    @pytest.mark.parametrize('sparse', [False, True])
+    def test_parallel_sliding_window(self, time_series, sparse):
+        """Test process-pool analysis returns the serial results in the same order."""
+        serial = analyze_sliding_window(time_series, window_size=30, step=4, embedding_dim=2,
+                                        sparse=sparse)
+        parallel = analyze_sliding_window(time_series, window_size=30, step=4, embedding_dim=2,
+                                          sparse=sparse, n_jobs=2, chunk_size=3)
+        pd.testing.assert_frame_equal(parallel, serial)
+
+    def test_analyze_recurrence_networks(self, time_series):
+        """Test the pooled analyses of several series match the single-series ones."""
+        series = {'long': time_series, 'short': time_series[:30], 'tiny': time_series[:10]}
+        networks, windows = analyze_recurrence_networks(series, n_jobs=2)
+        assert set(networks) == {'long', 'short'} and set(windows) == {'long'}
+        expected = analyze_recurrence_network(time_series, embedding_dim=2)
+        assert np.array_equal(networks['long'][0], expected[0])
+        assert networks['long'][2] == expected[2]
+        pd.testing.assert_frame_equal(
+            windows['long'],
+            analyze_sliding_window(time_series, window_size=30, step=5, embedding_dim=2)
+        )
+
+
+class TestParameterEstimation:
+    """Test suite for the port of estimate_parameters_from_human_data."""
+    
+    @pytest.fixture
+    def data_dir(self, tmp_path):
+        rng = np.random.default_rng(0)
+        for i in range(3):
+            taps = np.cumsum(rng.normal(0.5, 0.05, size=80))
+            players = np.tile(['1', '2'], 40)
+            session_dir = (tmp_path / 'human_human' / '20261014'
+                           / f'P{i}_Q{i}_human_human_20261014_15000{i}')
+            session_dir.mkdir(parents=True)
+            table = pd.DataFrame({'player_id': players, 'timestamp': taps,
+                                  'cycle': np.repeat(np.arange(40), 2)})
+            table.to_csv(session_dir / 'stage2_cooperative_taps.csv', index=False)
+        return tmp_path
+    
+    def test_prctile_matches_matlab(self):
+        """Test MATLAB's midpoint percentile definition."""
+        assert np.allclose(prctile([1, 2, 3, 4], [25, 50, 0, 100]), [1.5, 2.5, 1, 4])
+    
+    def test_autocorr(self):
+        """Test autocorrelation against the direct sum."""
+        x = np.random.default_rng(1).normal(size=50)
+        xc = x - x.mean()
+        expected = [np.sum(xc[:len(x) - k] * xc[k:]) / np.sum(xc ** 2) for k in range(11)]
+        assert np.allclose(autocorr(x, 10), expected)
+    
+    @pytest.mark.parametrize('method', ['bca', 'percentile'])
+    def test_bootstrap_chunking(self, method):
+        """Test chunked resampling gives the same interval as one block."""
+        x = np.random.default_rng(2).normal(1, 0.1, size=300)
+        whole = bootstrap_ci(x, n_boot=500, method=method, seed=3)
+        chunked = bootstrap_ci(x, n_boot=500, method=method, seed=3, block_bytes=8 * 300 * 7)
+        assert np.allclose(whole, chunked)
+        assert whole[0] < np.std(x, ddof=1) < whole[1]
+    
+    @pytest.mark.parametrize('n_jobs', [1, 2])
+    def test_estimate_parameters(self, data_dir, n_jobs):
+        """Test parameters estimated from human-human sessions."""
+        params = estimate_parameters_from_human_data(str(data_dir), seed=0, n_jobs=n_jobs)
+        assert set(params) == {'SPAN_mean', 'SPAN_ci', 'SCALE_mean', 'SCALE_ci',
+                               'BAYES_N_HYPOTHESIS', 'BIB_L_MEMORY'}
+        assert params['SPAN_mean'] == pytest.approx(1.0, abs=0.05)
+        assert params['SCALE_mean'] == pytest.approx(0.05, abs=0.01)
+        assert params['SCALE_ci'][0] < params['SCALE_mean'] < params['SCALE_ci'][1]
+        assert params['BAYES_N_HYPOTHESIS'] == 10
+        assert params['BIB_L_MEMORY'] >= 1
+    
+    def test_no_sessions(self, tmp_path):
+        """Test an empty data directory is reported."""
+        with pytest.raises(ValueError):
+            estimate_parameters_from_human_data(str(tmp_path))
+
+
+class TestModelFitting:
+    """Test suite for maximum-likelihood model fitting."""
+    
+    class _Config:
+        SPAN = 2.0
+        SCALE = 0.1
+    
+    def simulate(self, model, n_turns=80, seed=0):
+        """Closed-loop session with a noisy partner reacting to the model."""
+        rng = np.random.default_rng(seed)
+        se, output = [0.0], []
+        for _ in range(n_turns):
+            output.append(model.inference(se[-1]))
+            se.append(rng.normal(0, 0.1) + 0.3 * (output[-1] - 1.0))
+        return np.array(se[:-1]), np.array(output)
+    
+    def test_observations_from_taps(self):
+        """Test SE/interval reconstruction from alternating taps."""
+        stim = [0.0, 2.0, 4.1, 6.0]
+        player = [1.0, 3.0, 5.0, 7.0]
+        se, output = observations_from_taps(stim, player)
+        assert np.allclose(se, [2.0 - 2.0, 4.1 - 4.0])
+        assert np.allclose(output, [4.1 - 3.0, 6.0 - 5.0])
+    
+    def test_observations_burn_in(self):
+        """Test replay from the first Stage 2 turn with burn-in and the post-tap delay."""
+        stim = [0.0, 2.0, 4.1, 6.0, 8.2]
+        player = [1.0, 3.0, 5.0, 7.0, 9.0]
+        se, output = observations_from_taps(stim, player, first_turn=2, burn_in=1, tap_delay=0.1)
+        assert np.allclose(se, [4.1 - 4.0, 6.0 - 6.0])
+        assert np.isnan(output[0]) and np.isclose(output[1], 8.2 - 7.0 - 0.1)
+    
+    def test_fit_recovers_scale_from_simulated_session(self, tmp_path):
+        """Test SCALE is recovered from a saved runner session with STAGE1 != BUFFER."""
+        from src.config import Config
+        from src.data import read_session
+        from src.experiment.simulation import run_simulated_session
+        config = Config(STAGE1=6, STAGE2=150, BUFFER=3, SCALE=0.05)
+        run_simulated_session(config, 'sea', str(tmp_path), seed=0)
+        session = read_session(str(next(tmp_path.glob('*/*'))))
+        se, output = session_observations(session)
+        assert len(se) == config.STAGE2 + 2 * config.BUFFER - 1
+        assert np.count_nonzero(np.isnan(output)) == config.BUFFER
+        
+        # Replaying every call from the first Stage 2 turn leaves only the model's noise
+        mean_se = np.cumsum(se) / np.arange(1, len(se) + 1)
+        residuals = output - (config.SPAN / 2 - mean_se)
+        assert abs(np.nanmean(residuals)) < 0.02
+        fit = fit_model([session], 'sea')
+        assert fit['params']['SCALE'] == pytest.approx(0.05, rel=0.15)
+        assert fit['n_observations'] == config.STAGE2 + config.BUFFER - 1
+    
+    def test_sea_likelihood(self):
+        """Test the SEA likelihood against the model's predictive density."""
+        from scipy import stats
+        se = np.array([0.1, -0.2, 0.05])
+        output = np.array([0.9, 1.05, 1.0])
+        mean = 1.0 - np.cumsum(se) / np.arange(1, 4)
+        expected = stats.norm(mean, 0.1).logpdf(output).sum()
+        assert session_log_likelihood('sea', {'SCALE': 0.1}, se, output) == pytest.approx(expected)
+    
+    def test_bayes_likelihood_matches_model(self):
+        """Test the vectorized Bayes likelihood against stepping BayesModel."""
+        from scipy import stats
+        np.random.seed(0)
+        se, output = self.simulate(BayesModel(self._Config, n_hypothesis=15, sigma=0.4), 30)
+        model = BayesModel(self._Config, n_hypothesis=15, sigma=0.4)
+        expected = 0.0
+        for s, o in zip(se, output):
+            model.inference(s)
+            density = model.h_prov @ stats.norm(model.likelihood, 0.4).pdf(1.0 - o)
+            expected += np.log(density)
+        params = {'n_hypothesis': 15, 'sigma': 0.4}
+        assert session_log_likelihood('bayes', params, se, output) == pytest.approx(expected)
+    
+    def test_bib_common_random_numbers(self):
+        """Test the simulated BIB likelihood is reproducible and leaves NumPy's state alone."""
+        np.random.seed(1)
+        se, output = self.simulate(BIBModel(self._Config, l_memory=2), 30)
+        params = {'n_hypothesis': 20, 'l_memory': 2, 'sigma': 0.3, 'SCALE': 0.1}
+        state = np.random.get_state()[1].copy()
+        first = session_log_likelihood('bib', params, se, output, n_particles=50, seed=3)
+        assert np.array_equal(np.random.get_state()[1], state)
+        assert session_log_likelihood('bib', params, se, output, n_particles=50, seed=3) == first
+        assert np.isfinite(first)
+    
+    def test_fit_recovers_parameters(self):
+        """Test SEA and Bayes parameters are recovered from simulated sessions."""
+        np.random.seed(2)
+        sea_sessions = [self.simulate(SEAModel(self._Config), seed=i) for i in range(4)]
+        fit = fit_model(sea_sessions, 'sea')
+        assert fit['params']['SCALE'] == pytest.approx(0.1, rel=0.15)
+        assert fit['n_sessions'] == 4 and fit['n_observations'] == 320
+        
+        bayes_sessions = [self.simulate(BayesModel(self._Config, n_hypothesis=20), seed=i)
+                          for i in range(4)]
+        fit = fit_model(bayes_sessions, 'bayes', grid={'n_hypothesis': (5, 20)})
+        assert fit['params']['n_hypothesis'] == 20
+        assert fit['params']['sigma'] == pytest.approx(0.3, rel=0.15)
+    
+    def test_cache_and_parallel(self, tmp_path, monkeypatch):
+        """Test cached points are not re-evaluated and a pool gives the same fit."""
+        np.random.seed(3)
+        groups = {
+            'P1': [self.simulate(BIBModel(self._Config), 20, seed=0)],
+            'P2': [self.simulate(BIBModel(self._Config), 20, seed=1)],
+        }
+        options = dict(grid={'n_hypothesis': (10,), 'l_memory': (1, 2)}, n_particles=20,
+                       maxiter=20, cache_path=str(tmp_path / 'cache.json'))
+        serial = fit_participants(groups, 'bib', **options)
+        assert (tmp_path / 'cache.json').exists()
+        
+        calls = []
+        evaluate = model_fitting.session_log_likelihood
+        monkeypatch.setattr(model_fitting, 'session_log_likelihood',
+                            lambda *args, **kwargs: calls.append(1) or evaluate(*args, **kwargs))
+        cached = fit_participants(groups, 'bib', **options)
+        assert calls == []
+        assert cached['P1']['params'] == serial['P1']['params']
+        
+        monkeypatch.undo()
+        parallel = fit_participants(groups, 'bib', n_jobs=2, **dict(options, cache_path=None))
+        for name in groups:
+            assert parallel[name]['params'] == serial[name]['params']
+            assert parallel[name]['log_likelihood'] == pytest.approx(serial[name]['log_likelihood'])
+
+
+class TestMetrics:
+    @pytest.fixture
+    def taps(self):
+        rng = np.random.default_rng(0)
+        stim = np.cumsum(rng.normal(1.0, 0.05, 30))
+        player = stim + 0.5 + rng.normal(0, 0.02, 30)
+        return stim, player
+
+    def test_matches_loop_definitions(self, taps):
+        """Array metrics match the original per-index loops"""
+        stim, player = taps
+        player = player[:25]
+        assert np.allclose(calculate_iti(stim), [stim[i+1] - stim[i] for i in range(len(stim) - 1)])
+        assert np.allclose(calculate_se(stim, player),
+                           [player[i] - (stim[i-1] + stim[i])/2 for i in range(1, 25)])
+        se = calculate_se(player, stim)
+        assert np.allclose(calculate_variations(se), np.diff(se))
+        assert np.allclose(cross_iti_array(player, stim, lag=1), stim[1:25] - player[:24])
+        assert isinstance(calculate_iti(list(stim)), np.ndarray)
+
+    def test_short_input(self):
+        assert len(calculate_iti([1.0])) == 0
+        assert len(calculate_se([1.0], [1.5])) == 0
+        assert len(cross_iti_array([], [], lag=1)) == 0
+
+    def test_batches(self, taps):
+        """2-D batches give the per-session results, NaN where a session has ended"""
+        stim, player = taps
+        sessions = [(stim, player), (stim[:20], player[:18])]
+        stim_batch = pad_sessions([s for s, _ in sessions])
+        player_batch = pad_sessions([p for _, p in sessions])
+        assert stim_batch.shape == (2, 30)
+
+        se = se_array(stim_batch, player_batch)
+        iti = iti_array(player_batch)
+        for row, (s, p) in enumerate(sessions):
+            expected_se = calculate_se(s, p)
+            assert np.allclose(se[row, :len(expected_se)], expected_se)
+            assert np.isnan(se[row, len(expected_se):]).all()
+            expected_iti = calculate_iti(p)
+            assert np.allclose(iti[row, :len(expected_iti)], expected_iti)
+            assert np.isnan(iti[row, len(expected_iti):]).all()
+
+
+class TestOnlineMetrics:
+    def test_running_stats_match_batch(self):
+        """Streaming statistics agree with the batch computations"""
+        rng = np.random.default_rng(1)
+        values = 1000.0 + np.cumsum(rng.normal(0, 0.1, 200))
+        stats = RunningSeriesStats(window=15)
+        for value in values:
+            stats.update(value)
+        assert stats.n == 200
+        assert np.isclose(stats.mean, values.mean())
+        assert np.isclose(stats.std, values.std(ddof=1))
+        assert np.isclose(stats.rolling_mean, values[-15:].mean())
+        assert np.isclose(stats.rolling_std, values[-15:].std(ddof=1))
+        assert np.isclose(stats.lag1_autocorr, autocorr(values, 1)[1])
+
+    def test_empty_and_reset(self):
+        stats = RunningSeriesStats(window=3)
+        assert np.isnan(stats.std) and np.isnan(stats.rolling_mean)
+        stats.update(1.0)
+        stats.reset()
+        assert stats.n == 0
+        with pytest.raises(ValueError):
+            RunningSeriesStats(window=0)
+
+    def test_series_match_runner_definitions(self):
+        rng = np.random.default_rng(2)
+        stim = np.cumsum(rng.normal(1.0, 0.05, 40))
+        player = stim + 0.5 + rng.normal(0, 0.02, 40)
+        metrics = OnlineMetrics(window=5)
+        for t in range(40):
+            metrics.update(stim[t], player[t], 0.0)
+        assert metrics.turns == 40
+        assert np.isclose(metrics['player_iti'].mean, cross_iti_array(stim, player).mean())
+        assert np.isclose(metrics['stim_iti'].std, cross_iti_array(player, stim, lag=1).std(ddof=1))
+        assert np.isclose(metrics['player_se'].rolling_mean, se_array(stim, player)[-5:].mean())
+        assert set(metrics.snapshot()) == {'stim_se', 'player_se', 'stim_iti', 'player_iti'}
@@ -0,0 +1,93 @@
+"""
+Tests for the experiment configuration.
+"""
+import os
+import json
+import argparse
+import dataclasses
+import pytest
+from src.config import Config
+
+
+class TestConfig:
+    """Test suite for the immutable Config."""
+
+    def test_immutable_and_hashable(self):
+        """Configs cannot be changed in place and equal configs hash equal"""
+        config = Config()
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            config.SPAN = 1.0
+        assert config == Config()
+        assert hash(config) == hash(Config())
+        assert len({config, Config(), Config(SPAN=1.0)}) == 2
+
+    def test_no_directories_on_construction(self, tmp_path):
+        """Only create_directories() touches the filesystem"""
+        config = Config(BASE_DIR=str(tmp_path / "base"))
+        assert not os.path.exists(config.DATA_DIR)
+        assert config.create_directories() is config
+        assert os.path.isdir(config.RAW_DATA_DIR)
+        assert os.path.isdir(config.SOUND_DIR)
+
+    def test_type_coercion(self):
+        """Values are coerced to the field types"""
+        config = Config(SPAN=2, STAGE2='30', SHOW_TAP='false', WRITE_OUTPUT=0)
+        assert config.SPAN == 2.0 and isinstance(config.SPAN, float)
+        assert config.STAGE2 == 30
+        assert config.SHOW_TAP is False and config.WRITE_OUTPUT is False
+        assert Config(SPAN=2).parameter_hash() == Config().parameter_hash()
+
+    def test_replace_derives_paths(self, tmp_path):
+        """Paths left at their defaults follow a changed parent directory"""
+        base = str(tmp_path)
+        config = Config().replace(BASE_DIR=base)
+        assert config.RAW_DATA_DIR == os.path.join(base, 'data', 'raw')
+        assert config.SOUND_STIM == os.path.join(base, 'assets', 'sounds', 'stim_beat.wav')
+
+        custom = config.replace(RAW_DATA_DIR='/raw').replace(DATA_DIR='/data')
+        assert custom.RAW_DATA_DIR == '/raw'
+        assert custom.PROCESSED_DATA_DIR == os.path.join('/data', 'processed')
+        assert config.replace() is config
+
+    def test_parameter_hash(self):
+        """The parameter hash ignores paths and changes with the parameters"""
+        config = Config()
+        assert config.parameter_hash() == config.replace(BASE_DIR='/elsewhere').parameter_hash()
+        assert config.parameter_hash() != config.replace(SCALE=0.2).parameter_hash()
+        assert 'DATA_DIR' not in config.parameters()
+        for setting in ('LOOKAHEAD_INFERENCE', 'ONLINE_WINDOW', 'ONLINE_REPORT_INTERVAL',
+                        'SHOW_TAP', 'WRITE_OUTPUT'):
+            assert setting not in config.parameters()
+        assert config.parameter_hash() == config.replace(
+            LOOKAHEAD_INFERENCE=True, ONLINE_REPORT_INTERVAL=0, SHOW_TAP=True, WRITE_OUTPUT=False
+        ).parameter_hash()
+
+    def test_from_dict_is_cached(self):
+        """from_dict returns the same object for the same values"""
+        config = Config.from_dict({'STAGE2': 30, 'SPAN': 1.5})
+        assert config.STAGE2 == 30 and config.SPAN == 1.5
+        assert Config.from_dict({'SPAN': 1.5, 'STAGE2': 30}) is config
+        with pytest.raises(TypeError):
+            Config.from_dict({'UNKNOWN': 1})
+
+    def test_from_dict_unhashable_values(self):
+        """Unhashable values are rejected with a TypeError naming the field"""
+        with pytest.raises(TypeError, match='SPAN'):
+            Config.from_dict({'SPAN': [1.5]})
+        with pytest.raises(TypeError, match='SHOW_TAP'):
+            Config.from_dict({'SHOW_TAP': {'on': True}})
+
+    def test_from_file(self, tmp_path):
+        """Configs load from JSON files"""
+        path = tmp_path / "config.json"
+        path.write_text(json.dumps({'BUFFER': 3, 'SCALE': 0.05}))
+        config = Config.from_file(str(path))
+        assert config.BUFFER == 3 and config.SCALE == 0.05
+
+    def test_from_args(self):
+        """Command-line arguments that are set override the defaults"""
+        args = argparse.Namespace(span=1.0, stage1=None, stage2=20, model='sea')
+        config = Config.from_args(args)
+        assert config.SPAN == 1.0
+        assert config.STAGE1 == Config().STAGE1
+        assert config.STAGE2 == 20
@@ -0,0 +1,324 @@
+"""
+Tests for session storage and loading.
+"""
+import os
+import pytest
+import numpy as np
+import pandas as pd
+from src.data import (
+    SESSION_FILE, SERIES, write_session, read_session, find_sessions, load_sessions,
+    export_session_csv, SessionCatalog, MatlabSession, load_matlab_sessions, concat_stage2,
+    STAGE2_COLUMNS, JOURNAL_FILE, EVENT_STIM, EVENT_PLAYER, EVENT_STAGE, TapJournal,
+    read_journal, find_journals, recover_session
+)
+from src.analysis.metrics import alternating_series
+from src.data import matlab_loader
+
+
+class TestSessionStore:
+    """Test suite for the single-file session archive."""
+    
+    @pytest.fixture
+    def session(self):
+        rng = np.random.default_rng(0)
+        series = {name: rng.normal(size=30 - i).tolist() for i, name in enumerate(SERIES)}
+        hypo = [rng.normal(size=20) for _ in range(12)]
+        metadata = {
+            'model_type': 'bib',
+            'user_id': 'P3',
+            'experiment_id': '202610161200',
+            'config': {'Model': 'bib', 'SPAN': 2.0},
+            'lengths': {'stim_tap_length': len(series['stim_tap'])}
+        }
+        return series, hypo, metadata
+    
+    def test_round_trip(self, session, tmp_path):
+        """Test every series, the hypothesis matrix and metadata survive a round trip."""
+        series, hypo, metadata = session
+        path = write_session(str(tmp_path / 'bib_202610161200'), series, hypo, metadata)
+        assert path.endswith(SESSION_FILE)
+        
+        data = read_session(str(tmp_path / 'bib_202610161200'))
+        for name in SERIES:
+            assert data[name].dtype == np.float64
+            assert np.array_equal(data[name], series[name])
+        assert data['hypo'].shape == (12, 20)
+        assert np.array_equal(data['hypo'], np.vstack(hypo))
+        assert data['metadata'] == metadata
+    
+    def test_partial_read(self, session, tmp_path):
+        """Test that only the requested series are returned."""
+        series, hypo, metadata = session
+        path = write_session(str(tmp_path), series, hypo, metadata)
+        data = read_session(path, series=['stim_se'])
+        assert set(data) == {'stim_se', 'metadata'}
+    
+    def test_empty_hypotheses(self, session, tmp_path):
+        """Test sessions of models without hypotheses (SEA)."""
+        series, _, metadata = session
+        data = read_session(write_session(str(tmp_path), series, [], metadata))
+        assert data['hypo'].size == 0
+    
+    def test_load_sessions(self, session, tmp_path):
+        """Test batch loading of a data tree."""
+        series, hypo, metadata = session
+        for subdir in ('20261015_P1/sea_1', '20261016_P2/bib_2', '20261016_P2/bib_3'):
+            write_session(str(tmp_path / subdir), series, hypo, metadata)
+        paths = find_sessions(str(tmp_path))
+        assert len(paths) == 3 and paths == sorted(paths)
+        sessions = load_sessions(str(tmp_path), series=['player_iti'])
+        assert list(sessions) == paths
+        assert all(np.array_equal(s['player_iti'], series['player_iti']) for s in sessions.values())
+    
+    def test_csv_export(self, session, tmp_path):
+        """Test the legacy CSV layout written from an archive."""
+        series, hypo, metadata = session
+        write_session(str(tmp_path), series, hypo, metadata)
+        export_session_csv(str(tmp_path))
+        
+        taps = pd.read_csv(tmp_path / 'processed_taps.csv')
+        n = min(len(series['stim_tap']), len(series['player_tap']))
+        assert np.allclose(taps['Stim_tap'], series['stim_tap'][:n])
+        assert np.allclose(pd.read_csv(tmp_path / 'player_se_variations.csv')['Player_SEv'],
+                           series['player_sev'])
+        hypotheses = pd.read_csv(tmp_path / 'model_hypotheses.csv')['Hypothesis']
+        assert np.allclose(np.fromstring(hypotheses[0], sep=','), hypo[0])
+        assert pd.read_csv(tmp_path / 'experiment_config.csv')['SPAN'][0] == 2.0
+
+
+class TestSessionCatalog:
+    """Test suite for the SQLite session catalog."""
+    
+    @pytest.fixture
+    def data_root(self, tmp_path):
+        series = {name: np.arange(5.0) for name in SERIES}
+        metadata = {'lengths': {'full_stim_tap_length': 5, 'full_player_tap_length': 5}}
+        write_session(str(tmp_path / '20261003_P3' / 'bib_202610031015'), series, [], metadata)
+        write_session(str(tmp_path / '20261020_P3' / 'sea_202610201100'), series, [], metadata)
+        write_session(str(tmp_path / '20260930_P4' / 'bib_202609301400'), series, [], metadata)
+        
+        hc_dir = tmp_path / 'human_computer' / '20261012' / 'P3_bib_20261012_093000'
+        hc_dir.mkdir(parents=True)
+        (hc_dir / 'stage1_synchronous_taps.csv').write_text("Timestamp\n0.5\n1.0\n1.5\n")
+        (hc_dir / 'stage2_alternating_taps.csv').write_text(
+            "PlayerID,TapTime,CycleNumber\n1,2.0,1\n2,2.5,1\n"
+        )
+        hh_dir = tmp_path / 'human_human' / '20261014' / 'P1_P3_human_human_20261014_150000'
+        hh_dir.mkdir(parents=True)
+        (hh_dir / 'stage2_cooperative_taps.csv').write_text(
+            "PlayerID,TapTime,CycleNumber\n1,0.5,1\n"
+        )
+        return tmp_path
+    
+    def test_update_and_query(self, data_root):
+        """Test both layouts are indexed and can be filtered."""
+        with SessionCatalog(str(data_root)) as catalog:
+            assert catalog.update() == {'changed': 5, 'removed': 0}
+            assert len(catalog) == 5
+            
+            october_bib = catalog.query(participant='P3', model='BIB',
+                                        since='2026-10-01', until='2026-11-01')
+            assert [s['layout'] for s in october_bib] == ['runner', 'matlab']
+            assert october_bib[0]['n_taps'] == 10
+            assert october_bib[1]['n_taps'] == 5
+            assert october_bib[1]['started_at'] == '2026-10-12 09:30:00'
+            
+            hh = catalog.query(experiment_type='human_human')
+            assert len(hh) == 1 and hh[0]['partner'] == 'P3' and hh[0]['model'] is None
+            assert len(catalog.query(participant='P3')) == 4
+            
+            latest = catalog.latest(model='bib', layout='runner')
+            assert latest['experiment_id'] == '202610031015'
+            assert latest['files'] == [SESSION_FILE]
+            assert len(latest['content_hash']) == 64
+    
+    def test_incremental_update(self, data_root, monkeypatch):
+        """Test unchanged directories are skipped and removed sessions dropped."""
+        with SessionCatalog(str(data_root)) as catalog:
+            catalog.update()
+            listed = []
+            scandir = os.scandir
+            monkeypatch.setattr(os, 'scandir', lambda path: listed.append(path) or scandir(path))
+            assert catalog.update() == {'changed': 0, 'removed': 0}
+            monkeypatch.undo()
+            # At most the root, where the catalog database itself lives, is listed again
+            assert set(listed) <= {catalog.root}
+        
+        with SessionCatalog(str(data_root)) as catalog:
+            stage2 = (data_root / 'human_computer' / '20261012' / 'P3_bib_20261012_093000'
+                      / 'stage2_alternating_taps.csv')
+            old_hash = catalog.query(layout='matlab', model='bib')[0]['content_hash']
+            stage2.write_text("PlayerID,TapTime,CycleNumber\n1,2.0,1\n2,2.5,1\n1,3.0,2\n")
+            write_session(str(data_root / '20261021_P5' / 'bayes_202610210900'),
+                          {'stim_tap': [1.0]}, [], {})
+            (data_root / '20260930_P4' / 'bib_202609301400' / SESSION_FILE).unlink()
+            
+            # The in-place rewrite leaves the directory's entries unchanged
+            assert catalog.update() == {'changed': 1, 'removed': 1}
+            assert catalog.query(layout='matlab', model='bib')[0]['content_hash'] == old_hash
+            assert catalog.update(full=True) == {'changed': 1, 'removed': 0}
+            session = catalog.query(layout='matlab', model='bib')[0]
+            assert session['n_taps'] == 6 and session['content_hash'] != old_hash
+            assert catalog.latest()['participant'] == 'P5'
+            assert catalog.query(participant='P4') == []
+
+
+
+class TestMatlabLoader:
+    """Test suite for reading MATLAB DataRecorder sessions."""
+    
+    @pytest.fixture(params=['pyarrow', 'c'])
+    def data_root(self, request, tmp_path, monkeypatch):
+        if request.param == 'pyarrow':
+            pytest.importorskip('pyarrow')
+        monkeypatch.setattr(matlab_loader, '_CSV_ENGINE', request.param)
+        
+        hc_dir = tmp_path / 'human_computer' / '20261012' / 'P3_bib_20261012_093000'
+        hc_dir.mkdir(parents=True)
+        (hc_dir / 'stage1_synchronous_taps.csv').write_text(
+            "timestamp,sound_type,beat_number\n0.0,stim,1\n0.5,player,1\n1.0,stim,2\n"
+        )
+        (hc_dir / 'stage2_alternating_taps.csv').write_text(
+            "player_id,timestamp,turn,se,predicted_interval\n"
+            "stim,2.0,1,,\nplayer,2.52,1,0.02,1.0\nstim,3.0,2,,\nplayer,3.49,2,-0.01,0.98\n"
+            "stim,4.0,3,,\nplayer,4.5,3,0.0,1.0\n"
+        )
+        hh_dir = tmp_path / 'human_human' / '20261014' / 'P1_P3_human_human_20261014_150000'
+        hh_dir.mkdir(parents=True)
+        (hh_dir / 'stage1_metronome.csv').write_text("timestamp,sound_type,player\n0.0,1,1\n0.5,2,2\n")
+        (hh_dir / 'stage2_cooperative_taps.csv').write_text(
+            "PlayerID,TapTime,CycleNumber\n1,1.0,1\n2,1.5,1\n1,2.0,2\n2,2.55,2\n"
+        )
+        old_dir = tmp_path / '20250101' / 'P9_sea_202501011200'
+        old_dir.mkdir(parents=True)
+        (old_dir / 'processed_taps.csv').write_text("stim_tap,player_tap\n1,1.5\n2,2.5\n")
+        (old_dir / 'stage2_alternating_taps.csv').write_text(
+            "stim_tap,player_tap\n1,1.5\n2,2.5\n3,3.5\n"
+        )
+        (old_dir / 'debug_log.csv').write_text(
+            "turn,se,model_output,timer_reset_time\n1,0.01,1.0,2.0\n2,0.0,1.1,3.0\n"
+        )
+        return tmp_path
+    
+    def test_human_computer(self, data_root):
+        """Test a DataRecorder human-computer session."""
+        session = load_matlab_sessions(str(data_root), model='bib')[0]
+        assert session.experiment_type == 'human_computer'
+        assert session.participants == ('P3',)
+        assert list(session.stage1['source']) == ['stim', 'player', 'stim']
+        
+        stage2 = session.stage2
+        assert list(stage2.columns) == list(STAGE2_COLUMNS)
+        assert {c: str(t) for c, t in stage2.dtypes.items()} == STAGE2_COLUMNS
+        assert list(stage2['turn']) == [1, 1, 2, 2, 3, 3]
+        assert np.isnan(stage2['se'][0]) and stage2['se'][1] == 0.02
+        
+        stim, player = session.taps()
+        assert np.array_equal(stim, [2.0, 3.0, 4.0])
+        assert np.array_equal(player, [2.52, 3.49, 4.5])
+        series = session.to_series()
+        assert np.allclose(series['player_se'], [3.49 - 2.5, 4.5 - 3.5])
+        assert np.allclose(series['stim_iti'], [1.0, 1.0])
+        assert len(session.debug_log) == 0
+    
+    def test_human_human(self, data_root):
+        """Test a DataRecorder human-human session with PlayerID/TapTime columns."""
+        session = load_matlab_sessions(str(data_root), experiment_type='human_human')[0]
+        assert session.participants == ('P1', 'P3') and session.model is None
+        assert list(session.stage1['source']) == ['1', '2']
+        assert list(session.stage2['player']) == ['1', '2', '1', '2']
+        stim, player = session.taps()
+        assert np.array_equal(stim, [1.0, 2.0]) and np.array_equal(player, [1.5, 2.55])
+    
+    def test_pre_oop_layout(self, data_root):
+        """Test the two-column layout and debug log of the pre-OOP MATLAB runner."""
+        session = MatlabSession(str(data_root / '20250101' / 'P9_sea_202501011200'))
+        assert session.model == 'sea' and session.started_at == '2025-01-01 12:00:00'
+        assert list(session.stage2['player']) == ['stim', 'player'] * 3
+        assert list(session.stage2['turn']) == [1, 1, 2, 2, 3, 3]
+        assert np.array_equal(session.to_series(buffer=1)['stim_tap'], [2.0])
+        assert list(session.debug_log['model_output']) == [1.0, 1.1]
+    
+    def test_lazy_loading(self, data_root, monkeypatch):
+        """Test tables are read once, on first access."""
+        calls = []
+        read_table = matlab_loader._read_table
+        monkeypatch.setattr(matlab_loader, '_read_table',
+                            lambda *args: calls.append(args[0]) or read_table(*args))
+        sessions = load_matlab_sessions(str(data_root))
+        assert len(sessions) == 3 and calls == []
+        
+        table = concat_stage2(sessions)
+        assert len(table) == 16 and list(table['session'].unique()) == [0, 1, 2]
+        concat_stage2(sessions)
+        assert len(calls) == 3
+
+
+class TestTapJournal:
+    """Test suite for the append-only tap journal."""
+
+    @staticmethod
+    def write_session_journal(path, n_stage1=3, n_stage2=8, completed=False):
+        """Journal of an alternating session as written by ExperimentRunner."""
+        rng = np.random.default_rng(0)
+        stim = np.cumsum(rng.normal(1.0, 0.05, n_stage1 + n_stage2))
+        player = stim + 0.5 + rng.normal(0, 0.02, len(stim))
+        ses = []
+        journal = TapJournal(str(path), metadata={'model_type': 'sea', 'config': {'BUFFER': 2}},
+                             batch_size=4, flush_interval=0.05)
+        journal.append(EVENT_STAGE, np.nan, 1)
+        for i in range(n_stage1):
+            journal.append(EVENT_STIM, stim[i], i + 1)
+            journal.append(EVENT_PLAYER, player[i], i + 1)
+        journal.append(EVENT_STAGE, np.nan, 2)
+        for i in range(n_stage1, len(stim)):
+            journal.append(EVENT_STIM, stim[i], i)
+            se = stim[i] - (player[i - 1] + player[i - 2]) / 2
+            if i < len(stim) - 1:
+                ses.append(se)
+                journal.append(EVENT_PLAYER, player[i], i, se, 1.0)
+            else:
+                journal.append(EVENT_PLAYER, player[i], i)
+        journal.close(completed=completed)
+        return stim, player, np.array(ses)
+
+    def test_round_trip(self, tmp_path):
+        path = tmp_path / JOURNAL_FILE
+        stim, player, ses = self.write_session_journal(path)
+        metadata, records = read_journal(str(path))
+        assert metadata['model_type'] == 'sea'
+        # stage markers + taps + end record
+        assert len(records) == 2 + 2 * len(stim) + 1
+        assert np.allclose(records['time'][records['event'] == EVENT_STIM], stim)
+        assert np.allclose(records['se'][~np.isnan(records['se'])], ses)
+
+    def test_partial_record_is_ignored(self, tmp_path):
+        path = tmp_path / JOURNAL_FILE
+        self.write_session_journal(path)
+        _, records = read_journal(str(path))
+        with open(path, 'ab') as f:
+            f.write(b'\x00' * 7)
+        _, truncated = read_journal(str(path))
+        assert len(truncated) == len(records)
+        with pytest.raises(ValueError):
+            (tmp_path / 'other').write_bytes(b'garbage')
+            read_journal(str(tmp_path / 'other'))
+
+    def test_recover_session(self, tmp_path):
+        """Recovered archive matches the analysis of the journaled taps"""
+        experiment_dir = tmp_path / '20250101_p1' / 'sea_202501011200'
+        experiment_dir.mkdir(parents=True)
+        stim, player, ses = self.write_session_journal(experiment_dir / JOURNAL_FILE)
+        assert find_journals(str(tmp_path)) == [str(experiment_dir / JOURNAL_FILE)]
+
+        session_path = recover_session(str(experiment_dir / JOURNAL_FILE))
+        assert find_journals(str(tmp_path)) == []
+        session = read_session(session_path)
+        assert np.allclose(session['full_stim_tap'], stim)
+        assert np.allclose(session['player_tap'], player[2:])
+        assert np.allclose(session['stim_se'], ses[1:])
+        expected = alternating_series(stim[2:], player[2:], ses[1:])
+        for name, values in expected.items():
+            assert np.allclose(session[name], values), name
+        assert session['metadata']['recovered_from_journal']
+        assert not session['metadata']['completed']
@@ -1,7 +1,21 @@
+import time
 import pytest
 import numpy as np
+import pandas as pd
 from src.config import Config
+from src.data import SESSION_FILE, JOURNAL_FILE, read_session, recover_session
 from src.experiment.runner import ExperimentRunner
+from src.experiment.scheduler import sleep_until, KeyboardInput
+from src.experiment.simulation import (
+    SimulatedExperimentRunner, SimulatedTapper, VirtualClock, VirtualTimebase,
+    run_simulated_session
+)
+from src.experiment.buffers import TapSeries, HypothesisHistory, SessionBuffer
+from src.experiment.ring_buffer import ShmRingBuffer
+from src.experiment.event_process import EventProcess
+from src.data.journal import read_journal, TapJournal, EVENT_STIM, EVENT_PLAYER
+from src.experiment.sweep import parameter_grid, random_design, point_key, run_sweep
+from src.experiment.inference_server import InferenceServer, InferenceClient
 from src.models import SEAModel, BayesModel, BIBModel
 
 class TestExperimentRunner:
@@ -53,4 +67,409 @@ class TestExperimentRunner:
         # タップ時系列の整合性チェック
         assert len(runner.stim_tap) > len(runner.player_tap)
         assert all(t1 < t2 for t1, t2 in zip(runner.stim_tap[:-1], runner.stim_tap[1:]))
-        assert all(t1 < t2 for t1, t2 in zip(runner.player_tap[:-1], runner.player_tap[1:]))
\ No newline at end of file
+        assert all(t1 < t2 for t1, t2 in zip(runner.player_tap[:-1], runner.player_tap[1:]))
+
+class TestSimulatedExperiment:
+    @pytest.fixture
+    def config(self):
+        return Config(STAGE1=4, STAGE2=10, BUFFER=2)
+
+    def test_virtual_clock(self):
+        """Virtual clocks share one timebase and only move when read or waited on"""
+        timebase = VirtualTimebase(poll_interval=0.001)
+        clock = VirtualClock(timebase)
+        timebase.advance(1.5)
+        assert np.isclose(clock.getTime(), 1.501)
+        clock.reset()
+        assert np.isclose(clock.getTime(), 0.001)
+
+    @pytest.mark.parametrize('model_type', ['sea', 'bayes', 'bib'])
+    def test_simulated_session(self, config, model_type, tmp_path):
+        """A full session runs headless and writes its session archive"""
+        runner = run_simulated_session(config, model_type, str(tmp_path), seed=0)
+        assert runner is not None
+
+        total_turns = config.STAGE1 + config.STAGE2 + config.BUFFER * 2
+        assert len(runner.full_stim_tap) == total_turns
+        assert len(runner.full_player_tap) == total_turns
+        # Stimulus and player taps alternate
+        stim = np.array(runner.full_stim_tap)
+        player = np.array(runner.full_player_tap)
+        assert np.all(stim < player)
+        assert np.all(player[:-1] < stim[1:])
+
+        experiment_dirs = list(tmp_path.glob('*/*'))
+        assert len(experiment_dirs) == 1
+        assert [p.name for p in experiment_dirs[0].iterdir()] == [SESSION_FILE]
+        session = read_session(str(experiment_dirs[0]))
+        assert np.array_equal(session['full_stim_tap'], runner.full_stim_tap)
+        assert np.array_equal(session['stim_se'], runner.stim_se)
+        assert session['metadata']['model_type'] == model_type
+        assert len(session['hypo']) == len(runner.hypo)
+
+    def test_simulated_session_csv_export(self, config, tmp_path):
+        """CSV export writes the legacy per-series files next to the archive"""
+        runner = run_simulated_session(config, 'bib', str(tmp_path), seed=0, export_csv=True)
+        experiment_dir = next(tmp_path.glob('*/*'))
+        for name in (SESSION_FILE, 'raw_taps.csv', 'stim_synchronization_errors.csv',
+                     'model_hypotheses.csv', 'experiment_config.csv', 'data_metadata.csv'):
+            assert (experiment_dir / name).exists()
+        tap_df = pd.read_csv(experiment_dir / 'raw_taps.csv')
+        assert np.allclose(tap_df['Stim_tap'], runner.full_stim_tap)
+
+    def test_simulated_session_is_reproducible(self, config, tmp_path):
+        """Same seed gives the same session"""
+        first = run_simulated_session(config, 'bayes', str(tmp_path / 'a'), seed=3)
+        second = run_simulated_session(config, 'bayes', str(tmp_path / 'b'), seed=3)
+        assert np.allclose(first.stim_se, second.stim_se)
+        assert np.allclose(first.full_player_tap, second.full_player_tap)
+
+    def test_interrupted_session_is_recovered_from_journal(self, config, tmp_path):
+        """A session that fails before saving keeps its journal, which rebuilds the archive"""
+        complete = run_simulated_session(config, 'sea', str(tmp_path / 'complete'), seed=4)
+
+        np.random.seed(4)
+        runner = SimulatedExperimentRunner(config, 'sea', str(tmp_path / 'crashed'),
+                                           tapper=SimulatedTapper(config.SPAN, seed=4))
+        runner.analyze_data = lambda: 1 / 0
+        assert not runner.run()
+        journal_path = next((tmp_path / 'crashed').glob(f'*/*/{JOURNAL_FILE}'))
+
+        session = read_session(recover_session(str(journal_path)))
+        assert np.allclose(session['full_stim_tap'], complete.full_stim_tap)
+        assert np.allclose(session['full_player_tap'], complete.full_player_tap)
+        assert np.allclose(session['stim_se'], complete.stim_se)
+        assert np.allclose(session['player_iti'], complete.player_iti)
+
+    def test_event_process_journals_the_session(self, config, tmp_path):
+        """With event_process the journal is written by the event process and recovers the session"""
+        complete = run_simulated_session(config, 'sea', str(tmp_path / 'complete'), seed=4)
+
+        np.random.seed(4)
+        runner = SimulatedExperimentRunner(config, 'sea', str(tmp_path / 'crashed'),
+                                           tapper=SimulatedTapper(config.SPAN, seed=4),
+                                           event_process=True)
+        runner.analyze_data = lambda: 1 / 0
+        assert not runner.run()
+        assert runner.events_offloaded
+        journal_path = next((tmp_path / 'crashed').glob(f'*/*/{JOURNAL_FILE}'))
+
+        session = read_session(recover_session(str(journal_path)))
+        assert np.allclose(session['full_stim_tap'], complete.full_stim_tap)
+        assert np.allclose(session['stim_se'], complete.stim_se)
+        assert not session['metadata']['completed']
+
+    def test_lookahead_inference_does_not_change_the_session(self, config, tmp_path):
+        """Preparing the next inference while waiting for the tap gives the same session"""
+        lookahead = run_simulated_session(config.replace(LOOKAHEAD_INFERENCE=True), 'bayes',
+                                          str(tmp_path / 'a'), seed=3)
+        plain = run_simulated_session(config, 'bayes', str(tmp_path / 'b'), seed=3)
+        assert np.allclose(lookahead.stim_se, plain.stim_se)
+        assert np.allclose(lookahead.full_stim_tap, plain.full_stim_tap)
+
+    def test_online_metrics_follow_stage2(self, config, tmp_path):
+        """Online statistics are updated every Stage 2 turn"""
+        runner = run_simulated_session(config, 'sea', str(tmp_path), seed=0)
+        metrics = runner.online_metrics
+        assert metrics.turns == config.STAGE2 + config.BUFFER * 2 - 1
+        # analyze_data drops the first SE of the session
+        assert metrics['stim_se'].n == len(runner.stim_se) + 1
+        window = metrics['stim_se'].window
+        assert np.isclose(metrics['stim_se'].rolling_mean, np.mean(runner.stim_se[-window:]))
+
+    def test_stage2_stimulus_follows_tap_by_model_interval(self, config, tmp_path):
+        """Stage 2 stimuli follow the player tap by TAP_DELAY plus the model interval"""
+        runner = SimulatedExperimentRunner(config, 'sea', str(tmp_path),
+                                           tapper=SimulatedTapper(config.SPAN, seed=1))
+        intervals = []
+        inference = runner.model.inference
+        runner.model.inference = lambda se: intervals.append(inference(se)) or intervals[-1]
+        assert runner.run()
+
+        stim = np.array(runner.full_stim_tap[config.STAGE1 + 1:])
+        player = np.array(runner.full_player_tap[config.STAGE1:-1])
+        assert np.allclose(stim - player, config.TAP_DELAY + np.array(intervals), atol=2e-3)
+
+
+class TestSessionBuffer:
+    def test_tap_series(self):
+        series = TapSeries(2)
+        for value in (1.0, 2.0, 3.0):
+            series.append(value)
+        assert len(series) == 3
+        assert series[-1] == 3.0 and series[0] == 1.0
+        assert np.array_equal(series[1:], [2.0, 3.0])
+        assert np.array_equal(np.asarray(series), [1.0, 2.0, 3.0])
+        with pytest.raises(IndexError):
+            series[3]
+
+    def test_hypothesis_history_copies_rows(self):
+        """Later changes of the model's array do not alter recorded hypotheses"""
+        history = HypothesisHistory(4, 3)
+        live = np.array([0.2, 0.3, 0.5])
+        history.append(live)
+        live[:] = [1.0, 0.0, 0.0]
+        history.append(live)
+        assert np.array_equal(history.copy(), [[0.2, 0.3, 0.5], [1.0, 0.0, 0.0]])
+
+    def test_session_buffer_is_preallocated(self, tmp_path):
+        """A whole simulated session records without outgrowing its buffers"""
+        config = Config(STAGE1=4, STAGE2=10, BUFFER=2)
+        runner = SimulatedExperimentRunner(config, 'bayes', str(tmp_path),
+                                           tapper=SimulatedTapper(config.SPAN, seed=0))
+        buffers = runner.buffers
+        storage = [buffers.stim_tap._data, buffers.player_tap._data, buffers.hypo._data]
+        assert runner.run()
+        after = [buffers.stim_tap._data, buffers.player_tap._data, buffers.hypo._data]
+        assert all(a is b for a, b in zip(after, storage))
+        assert len(buffers.hypo) == config.STAGE2 + 2 * config.BUFFER
+        assert buffers.hypo.copy().shape[1] == config.BAYES_N_HYPOTHESIS
+
+class TestRingBuffer:
+    @pytest.fixture
+    def ring(self):
+        ring = ShmRingBuffer(capacity=6)
+        yield ring
+        ring.close()
+        ring.unlink()
+
+    def test_put_get_and_wraparound(self, ring):
+        assert ring.capacity == 8
+        reader = ShmRingBuffer.attach(ring.name)
+        for i in range(8):
+            assert ring.put(EVENT_STIM, float(i), i)
+        # Full: the record is dropped, not overwritten
+        assert not ring.put(EVENT_STIM, 8.0, 8)
+        record = reader.get()
+        assert record[:3] == (0.0, EVENT_STIM, 0) and np.isnan(record[3])
+        assert ring.put(EVENT_PLAYER, 8.0, 8, 0.1, 0.5)
+
+        first = reader.peek()
+        assert first['time'].tolist() == [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0]
+        reader.advance(len(first))
+        del first
+        # The record written after the wrap is at the start of the ring
+        second = reader.peek()
+        assert second[['time', 'se', 'model_output']].tolist() == [(8.0, 0.1, 0.5)]
+        reader.advance(len(second))
+        del second
+        assert reader.get() is None and len(reader) == 0
+        assert not reader.done
+        ring.mark_done()
+        assert reader.done
+        reader.close()
+
+    def test_event_process_writes_journal(self, tmp_path):
+        """Records put by the runner side arrive in the journal written by the other process"""
+        path = str(tmp_path / 'session.journal')
+        events = EventProcess(path, metadata={'model_type': 'sea'}, report_interval=0)
+        for i in range(100):
+            events.append(EVENT_STIM, i * 1.0, i)
+            events.append(EVENT_PLAYER, i * 1.0 + 0.5, i, 0.01 * i, 0.5)
+        events.close(completed=True, end_time=100.0)
+
+        metadata, records = read_journal(path)
+        assert metadata == {'model_type': 'sea'}
+        assert len(records) == 201
+        assert np.allclose(records['time'][:-1:2], np.arange(100))
+        assert np.allclose(records['se'][1:-1:2], 0.01 * np.arange(100))
+        assert records['turn'][-1] == 1
+
+    def test_unsupported_cpu_falls_back_to_journal(self, tmp_path, monkeypatch):
+        """Without x86 store ordering the ring buffer refuses and the runner journals in-process"""
+        from src.experiment import ring_buffer
+        monkeypatch.setattr(ring_buffer, 'SUPPORTED', False)
+        with pytest.raises(RuntimeError):
+            ShmRingBuffer(capacity=8)
+
+        runner = ExperimentRunner(Config(), model_type='sea', output_dir=str(tmp_path),
+                                  event_process=True)
+        runner._open_journal()
+        assert isinstance(runner.journal, TapJournal)
+        assert not runner.events_offloaded
+        runner._close_journal(completed=True)
+
+class TestParameterSweep:
+    BASE = {'STAGE1': 4, 'STAGE2': 8, 'BUFFER': 1}
+
+    def test_designs(self):
+        grid = parameter_grid(SCALE=[0.05, 0.1], BIB_L_MEMORY=[1, 2, 3])
+        assert len(grid) == 6
+        assert {'SCALE': 0.1, 'BIB_L_MEMORY': 3} in grid
+
+        design = random_design(20, {'SCALE': (0.01, 0.5), 'BAYES_N_HYPOTHESIS': (10, 30)},
+                               seed=0, log_scale=('SCALE',))
+        assert len(design) == 20
+        assert all(0.01 <= p['SCALE'] <= 0.5 for p in design)
+        assert all(isinstance(p['BAYES_N_HYPOTHESIS'], int) for p in design)
+        assert design == random_design(20, {'SCALE': (0.01, 0.5), 'BAYES_N_HYPOTHESIS': (10, 30)},
+                                       seed=0, log_scale=('SCALE',))
+
+    def test_point_key(self):
+        key = point_key('sea', {'SCALE': 0.1, 'SPAN': 2.0}, 0)
+        assert key == point_key('sea', {'SPAN': 2, 'SCALE': 0.1}, 0)
+        assert key != point_key('sea', {'SCALE': 0.1, 'SPAN': 2.0}, 1)
+        assert key != point_key('bib', {'SCALE': 0.1, 'SPAN': 2.0}, 0)
+        with pytest.raises(ValueError):
+            point_key('sea', {'NOT_A_PARAMETER': 1}, 0)
+        # The key covers the whole configuration, defaults included
+        assert point_key('sea', {'SCALE': Config.SCALE}, 0) == point_key('sea', {}, 0)
+
+    def test_sweep_caches_points_before_a_failure(self, tmp_path, monkeypatch):
+        """A failing point does not discard the results of the others"""
+        from src.experiment import sweep
+        simulate = sweep.simulate_point
+
+        def simulate_or_fail(model_type, params, seed, quiet=True):
+            if params['SCALE'] == 0.2:
+                raise RuntimeError("simulation failed")
+            return simulate(model_type, params, seed, quiet)
+
+        monkeypatch.setattr(sweep, 'simulate_point', simulate_or_fail)
+        points = [dict(self.BASE, SCALE=scale) for scale in (0.2, 0.05)]
+        with pytest.raises(RuntimeError):
+            run_sweep(points, 'sea', cache_dir=str(tmp_path))
+        assert point_key('sea', points[1], 0) in sweep.SweepCache(str(tmp_path))
+
+    def test_sweep_reuses_cached_points(self, tmp_path):
+        """Re-running a sweep only simulates the points that are not cached yet"""
+        points = [dict(self.BASE, SCALE=scale) for scale in (0.05, 0.2)]
+        first = run_sweep(points, 'sea', seeds=(0, 1), cache_dir=str(tmp_path))
+        assert len(first) == 4
+        assert not first['cached'].any()
+        # Taps of the whole session minus the leading buffer
+        assert (first['n_turns'] == 4 + 8 + 1).all()
+        assert len(list(tmp_path.glob('*.json'))) == 4
+
+        points.append(dict(self.BASE, SCALE=0.1))
+        second = run_sweep(points, 'sea', seeds=(0, 1), cache_dir=str(tmp_path))
+        assert second['cached'].tolist() == [True] * 4 + [False] * 2
+        assert np.allclose(second['stim_se_sd'][:4], first['stim_se_sd'])
+
+class TestInferenceServer:
+    @pytest.fixture
+    def server(self):
+        with InferenceServer(('127.0.0.1', 0)).start() as server:
+            yield server
+
+    def test_remote_model_matches_local(self, server):
+        """A served model gives the same intervals as a local one with the same random state"""
+        with InferenceClient(server.address) as client:
+            remote = client.open_session('bayes', SPAN=1.0, BAYES_N_HYPOTHESIS=10)
+            local = BayesModel(Config(SPAN=1.0), n_hypothesis=10)
+            for se in (0.05, -0.02, 0.1):
+                np.random.seed(0)
+                expected = local.inference(se)
+                np.random.seed(0)
+                assert remote.inference(se) == pytest.approx(expected)
+            remote.reset()
+            remote.close()
+
+    def test_sessions_and_errors(self, server):
+        with InferenceClient(server.address) as client:
+            sea = client.open_session('sea')
+            bib = client.open_session('bib')
+            assert sea.session_id != bib.session_id
+            assert np.isfinite(sea.inference(0.0)) and np.isfinite(bib.inference(0.0))
+            with pytest.raises(RuntimeError, match="Unknown model type"):
+                client.open_session('unknown')
+            with pytest.raises(RuntimeError, match="unexpected keyword"):
+                client.open_session('sea', NOT_A_FIELD=1)
+            sea.close()
+            with pytest.raises(RuntimeError, match="Unknown session"):
+                sea.inference(0.0)
+            # The connection survives errors
+            assert np.isfinite(bib.inference(0.01))
+
+    def test_round_trip_latency(self, server):
+        with InferenceClient(server.address) as client:
+            model = client.open_session('sea')
+            times = []
+            for _ in range(200):
+                start = time.perf_counter()
+                model.inference(0.01)
+                times.append(time.perf_counter() - start)
+        # Median guards against a single preemption on a loaded machine
+        assert np.median(times) < 0.001
+
+class TestScheduler:
+    class FakeClock:
+        def __init__(self):
+            self.now = 0.0
+            self.reads = 0
+
+        def getTime(self):
+            self.reads += 1
+            self.now += 0.0001
+            return self.now
+
+    def test_sleep_until_sleeps_then_spins(self):
+        """Most of the wait is one sleep call; only the margin is spun"""
+        clock = self.FakeClock()
+        sleeps = []
+
+        def fake_sleep(secs):
+            sleeps.append(secs)
+            clock.now += secs
+
+        end = sleep_until(clock, 1.0, spin_margin=0.002, sleep=fake_sleep)
+        assert len(sleeps) == 1
+        assert end >= 1.0
+        assert end - 1.0 < 0.0002
+        assert clock.reads < 40
+
+    def test_sleep_until_past_deadline_returns_immediately(self):
+        clock = self.FakeClock()
+        clock.now = 5.0
+        end = sleep_until(clock, 1.0, sleep=lambda secs: pytest.fail("should not sleep"))
+        assert end > 5.0
+
+    def test_sleep_until_real_clock_accuracy(self):
+        """Onset error against a real clock stays below a millisecond"""
+        import time
+
+        class PerfClock:
+            def getTime(self):
+                return time.perf_counter()
+
+        clock = PerfClock()
+        errors = []
+        for _ in range(5):
+            deadline = clock.getTime() + 0.02
+            errors.append(sleep_until(clock, deadline) - deadline)
+        # Median guards against a single preemption on a loaded machine
+        assert min(errors) >= 0
+        assert np.median(errors) < 0.001
+
+    def test_keyboard_input_queue(self):
+        key_input = KeyboardInput(clock=None)
+        assert key_input.get(timeout=0.01) is None
+        key_input.events.put(('space', 1.25))
+        key_input.events.put(('escape', 2.0))
+        assert key_input.get() == ('space', 1.25)
+        key_input.clear()
+        assert key_input.get(timeout=0.01) is None
+
+    def test_keyboard_input_polls_event_keys_on_calling_thread(self, monkeypatch):
+        """Without a threaded backend, event.getKeys only runs in the caller's thread"""
+        import sys
+        import types
+        import threading
+
+        threads = []
+        presses = [[], [('space', 1.5)]]
+
+        def get_keys(keyList=None, timeStamped=None):
+            threads.append(threading.current_thread())
+            return presses.pop(0) if presses else []
+
+        event = types.SimpleNamespace(getKeys=get_keys, clearEvents=lambda: None)
+        monkeypatch.setitem(sys.modules, 'psychopy', types.SimpleNamespace(event=event))
+
+        key_input = KeyboardInput(clock=None)
+        key_input.start()
+        assert key_input._thread is None
+        assert key_input.get(timeout=1.0) == ('space', 1.5)
+        assert key_input.get(timeout=0.01) is None
+        assert set(threads) == {threading.current_thread()}
+        key_input.stop()
@@ -0,0 +1,65 @@
+"""
+Import-time guards: the core packages load without heavy backends or side effects.
+"""
+import os
+import sys
+import json
+import subprocess
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Backends that must only be imported by the code paths that use them
+HEAVY_MODULES = ('psychopy', 'matplotlib', 'networkx', 'sklearn', 'pandas', 'scipy')
+
+# Generous upper bound on the import time of the core packages (seconds)
+IMPORT_BUDGET = 1.5
+
+
+def run_fresh(statement):
+    """Run an import statement in a fresh interpreter and report what it did."""
+    code = (
+        "import sys, gc, json, time\n"
+        "start = time.perf_counter()\n"
+        f"{statement}\n"
+        "elapsed = time.perf_counter() - start\n"
+        "print(json.dumps({'elapsed': elapsed, 'gc_enabled': gc.isenabled(),\n"
+        "                  'modules': sorted(m.split('.')[0] for m in sys.modules)}))\n"
+    )
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True,
+                            text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize('statement', [
+    "import src.models",
+    "import src.analysis; from src.analysis import calculate_iti, OnlineMetrics",
+    "import src.data",
+    "import src.experiment.runner",
+])
+def test_core_imports_skip_heavy_backends(statement):
+    report = run_fresh(statement)
+    loaded = [name for name in HEAVY_MODULES if name in report['modules']]
+    assert loaded == []
+
+
+def test_runner_import_has_no_process_side_effects():
+    """GC stays enabled until a session is started"""
+    report = run_fresh("import src.experiment")
+    assert report['gc_enabled']
+
+
+def test_core_import_time():
+    report = run_fresh("import src.experiment, src.analysis, src.data, src.models")
+    assert report['elapsed'] < IMPORT_BUDGET
+
+
+def test_lazy_names_resolve():
+    report = run_fresh(
+        "from src.analysis import fit_model, calculate_network_metrics\n"
+        "from src.data import MatlabSession\n"
+        "from src.experiment import run_sweep"
+    )
+    assert 'scipy' in report['modules']
+    assert 'pandas' in report['modules']
@@ -1,9 +1,14 @@
 """
 Tests for model implementations.
 """
+import time
 import pytest
 import numpy as np
-from src.models import SEAModel, BayesModel, BIBModel
+from scipy import stats
+from src.models import (
+    SEAModel, BayesModel, BIBModel,
+    BatchSEAModel, BatchBayesModel, BatchBIBModel
+)
 from src.config import Config
 
 class TestModels:
@@ -118,4 +123,206 @@ class TestModels:
         # Verify reset works
         model.reset()
         assert not np.array_equal(model.memory, np.array([0.1, -0.05]))
-        assert np.array_equal(model.h_prov, np.ones(20) / 20)
\ No newline at end of file
+        assert np.array_equal(model.h_prov, np.ones(20) / 20)
+    
+    def test_bayes_model_matches_reference_posterior(self, config):
+        """Test vectorized likelihood against the per-hypothesis scipy reference."""
+        from scipy.stats import norm
+        
+        model = BayesModel(config)
+        reference_h_prov = np.ones(20) / 20
+        np.random.seed(0)
+        
+        for se in [0.1, -0.05, 0.3, -0.2, 0.0]:
+            # Original per-hypothesis update
+            reference = np.array([norm(model.likelihood[i], 0.3).pdf(se)
+                                  for i in range(model.n_hypothesis)]) * reference_h_prov
+            reference_h_prov = reference / np.sum(reference)
+            
+            model.inference(se)
+            assert np.allclose(model.h_prov, reference_h_prov, rtol=1e-12, atol=0)
+        
+        # Same random stream as before, so outputs are reproducible under a seed
+        model.reset()
+        np.random.seed(1)
+        result = model.inference(0.1)
+        np.random.seed(1)
+        reference = np.array([norm(model.likelihood[i], 0.3).pdf(0.1)
+                              for i in range(model.n_hypothesis)]) / model.n_hypothesis
+        reference /= np.sum(reference)
+        expected = (config.SPAN / 2) - np.random.normal(
+            loc=np.random.choice(model.likelihood, p=reference), scale=0.3
+        )
+        assert np.isclose(result, expected)
+    
+    def test_bayes_model_log_domain(self, config):
+        """Test log-domain posterior matches linear posterior and survives underflow."""
+        linear = BayesModel(config)
+        log_model = BayesModel(config, log_domain=True)
+        
+        for se in [0.1, -0.05, 0.3, -0.2]:
+            linear.inference(se)
+            log_model.inference(se)
+        assert np.allclose(log_model.h_prov, linear.h_prov, rtol=1e-10, atol=1e-300)
+        
+        # SE far outside the hypothesis range underflows every likelihood to zero
+        model = BayesModel(config, n_hypothesis=10000, log_domain=True)
+        np.random.seed(42)
+        result = model.inference(25.0)
+        assert np.isfinite(result)
+        assert np.all(np.isfinite(model.h_prov))
+        assert np.isclose(np.sum(model.h_prov), 1.0)
+        assert np.argmax(model.h_prov) == model.n_hypothesis - 1
+        
+        model.reset()
+        assert np.allclose(model.h_prov, np.ones(10000) / 10000)
+        assert np.allclose(np.exp(model.log_h_prov), model.h_prov)
+    
+    def test_bib_model_log_domain(self, config):
+        """Test BIB model in log domain keeps a valid posterior."""
+        model = BIBModel(config, l_memory=2, log_domain=True)
+        np.random.seed(42)
+        for se in [0.1, -0.05, 30.0]:
+            assert isinstance(model.inference(se), float)
+        assert np.isclose(np.sum(model.h_prov), 1.0)
+    
+    @pytest.mark.parametrize("make_model", [
+        lambda config: SEAModel(config),
+        lambda config: BayesModel(config),
+        lambda config: BayesModel(config, log_domain=True),
+        lambda config: BIBModel(config, l_memory=0),
+        lambda config: BayesModel(config, n_hypothesis=200),
+    ])
+    def test_prepared_inference_matches_inference(self, config, make_model):
+        """Test speculative inference gives the same intervals and state as plain inference.
+        
+        Holds draw for draw while the hypotheses stay in ascending order, and
+        trivially above LOOKAHEAD_MAX_HYPOTHESES, where prepare() does nothing.
+        """
+        np.random.seed(0)
+        plain = make_model(config)
+        np.random.seed(0)
+        speculative = make_model(config)
+        ses = [0.0, 0.1, -0.05, 0.2, -0.3, 0.05] * 5
+        
+        np.random.seed(7)
+        expected = [plain.inference(se) for se in ses]
+        np.random.seed(7)
+        results = []
+        for se in ses:
+            speculative.prepare()
+            results.append(speculative.inference(se))
+        
+        assert np.allclose(results, expected)
+        for name in ('modify', 'h_prov', 'likelihood', 'memory'):
+            if hasattr(plain, name):
+                assert np.allclose(getattr(speculative, name), getattr(plain, name))
+    
+    def test_prepared_bib_inference_has_the_same_distribution(self, config):
+        """Test BIB speculation, which draws over the sorted hypotheses, keeps the interval distribution."""
+        ses = [0.0, 0.1, -0.05, 0.2]
+        plain, speculative = [], []
+        for seed in range(300):
+            np.random.seed(seed)
+            model = BIBModel(config, l_memory=3)
+            plain.append([model.inference(se) for se in ses])
+            np.random.seed(seed + 1000)
+            model = BIBModel(config, l_memory=3)
+            intervals = []
+            for se in ses:
+                model.prepare()
+                intervals.append(model.inference(se))
+            speculative.append(intervals)
+        result = stats.ks_2samp(np.ravel(plain), np.ravel(speculative))
+        assert result.pvalue > 0.01
+    
+    def test_prepare_is_cheap_for_large_grids(self, config):
+        """Test prepare() skips the O(n²) speculation for large hypothesis grids."""
+        model = BIBModel(config, n_hypothesis=2000, l_memory=2)
+        model.inference(0.1)
+        start = time.perf_counter()
+        model.prepare()
+        assert time.perf_counter() - start < 0.01
+        assert model._prepared is None
+        assert isinstance(model.inference(0.05), float)
+    
+    def test_prepared_inference_defers_posterior_update(self, config):
+        """Test a prepared inference only looks up its interval and commits the SE on next read."""
+        model = BIBModel(config, l_memory=2)
+        model.prepare()
+        model.inference(0.2)
+        assert model._pending is not None
+        assert np.isclose(np.sum(model.h_prov), 1.0)
+        assert model._pending is None
+        assert model.memory[-1] == 0.2
+    
+    def test_reset_discards_prepared_inference(self, config):
+        """Test reset drops a prepared inference, so the next one uses the reset state."""
+        model = BayesModel(config)
+        model.inference(0.5)
+        model.prepare()
+        model.reset()
+        assert model._prepared is None
+        model.inference(0.0)
+        assert np.isclose(np.sum(model.h_prov), 1.0)
+    
+    def test_batch_sea_model_matches_scalar(self, config):
+        """Test batched SEA model against independent scalar models."""
+        ses = np.array([[0.1, -0.2, 0.0], [-0.05, 0.1, 0.3]])
+        batch = BatchSEAModel(config, n_agents=3)
+        np.random.seed(3)
+        for row in ses:
+            results = batch.inference_batch(row)
+        assert results.shape == (3,)
+        
+        for i in range(3):
+            scalar = SEAModel(config)
+            for row in ses:
+                scalar.inference(row[i])
+            assert np.isclose(batch.modify[i] / batch.n_updates,
+                              scalar.modify / len(scalar.se_history))
+        
+        batch.reset()
+        assert np.array_equal(batch.modify, np.zeros(3))
+        assert not hasattr(batch, 'se_history')
+    
+    def test_batch_bayes_model_matches_scalar_posterior(self, config):
+        """Test each batch row follows the scalar Bayesian update."""
+        ses = np.array([[0.1, -0.3], [0.2, 0.0], [-0.1, 0.4]])
+        batch = BatchBayesModel(config, n_agents=2)
+        for row in ses:
+            results = batch.inference_batch(row)
+        assert results.shape == (2,)
+        assert np.allclose(batch.h_prov.sum(axis=1), 1.0)
+        
+        for i in range(2):
+            scalar = BayesModel(config)
+            for row in ses:
+                scalar.inference(row[i])
+            assert np.allclose(batch.h_prov[i], scalar.h_prov)
+        
+        log_batch = BatchBayesModel(config, n_agents=2, log_domain=True)
+        for row in ses:
+            log_batch.inference_batch(row)
+        assert np.allclose(log_batch.h_prov, batch.h_prov)
+    
+    def test_batch_bib_model_inference(self, config):
+        """Test batched BIB model keeps per-agent memory and hypotheses."""
+        batch = BatchBIBModel(config, n_agents=4, l_memory=2)
+        initial_likelihood = batch.likelihood.copy()
+        np.random.seed(42)
+        
+        batch.inference_batch(np.full(4, 0.1))
+        results = batch.inference_batch(np.array([-0.05, 0.0, 0.05, 0.1]))
+        
+        assert results.shape == (4,)
+        assert np.allclose(batch.h_prov.sum(axis=1), 1.0)
+        assert np.array_equal(batch.memory[:, 0], np.full(4, 0.1))
+        assert np.array_equal(batch.memory[:, 1], [-0.05, 0.0, 0.05, 0.1])
+        # Inverse Bayesian step changes exactly one hypothesis per agent per turn
+        assert np.all((batch.likelihood != initial_likelihood).sum(axis=1) >= 1)
+        assert np.all((batch.likelihood != initial_likelihood).sum(axis=1) <= 2)
+        
+        batch.reset()
+        assert batch.memory.shape == (4, 2)
+        assert np.array_equal(batch.h_prov, np.full((4, 20), 1 / 20))